@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Agent daemon for pub-sub-demo project.
+Keeps progress, state, blockers and the git snapshot warm in memory and serves
+update-progress.py and generate-handoff.py commands over a Unix socket.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from agentlib import project
+from agentlib.daemon import AgentDaemon, daemon_command, socket_path
+from agentlib.scripts import load_tool
+
+
+def get_project_root() -> Path:
+    """Find the project root directory."""
+    return project.find_project_root()
+
+
+def start(root: Path) -> None:
+    """Run the daemon in the foreground until stopped."""
+    os.chdir(root)
+    update_progress = load_tool('update-progress')
+    generate_handoff = load_tool('generate-handoff')
+
+    daemon = AgentDaemon(
+        root,
+        tools={'update-progress': update_progress, 'generate-handoff': generate_handoff},
+        warmers=[
+            # Under the shared lock, like any other reader
+            project.read_progress,
+            project.load_state,
+            project.load_blockers,
+            generate_handoff.get_git_snapshot,
+        ],
+    )
+    print(f"Agent daemon listening on {socket_path(root)}", flush=True)
+    daemon.serve_forever()
+
+
+def main():
+    """Main function to handle command line arguments."""
+    command = sys.argv[1] if len(sys.argv) > 1 else "start"
+
+    try:
+        root = get_project_root()
+
+        if command == "start":
+            start(root)
+
+        elif command in ("status", "stop"):
+            output = daemon_command(root, command)
+            if output is None:
+                print("Agent daemon not running")
+                sys.exit(1)
+            print(output, end="")
+
+        else:
+            print("Usage:")
+            print("  python3 agent-daemon.py [start]   # Run the daemon in the foreground")
+            print("  python3 agent-daemon.py status    # Check whether the daemon is running")
+            print("  python3 agent-daemon.py stop      # Stop a running daemon")
+
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
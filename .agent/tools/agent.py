@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the pub-sub-demo agent tools.
+Dispatches `agent <command>` to update-progress.py, generate-handoff.py or
+agent-daemon.py inside this process, so root discovery and loaded documents
+are shared and only the modules a command needs are imported.
+"""
+
+import io
+import sys
+from typing import List, Optional, Tuple
+
+from agentlib import profiling, project
+from agentlib.daemon import forward_to_daemon
+from agentlib.scripts import load_tool
+
+# Subcommands handled by update-progress.py, passed through unchanged
+PROGRESS_COMMANDS = ('show', 'display', 'update', 'task', 'phase', 'compact', 'batch', 'trend', 'scan', 'aggregate',
+                     'metrics')
+
+
+def print_usage() -> None:
+    """Print command line usage."""
+    print("Usage:")
+    print("  python3 agent.py [show]                                  # Show current progress")
+    print("  python3 agent.py update <category> <component> <value>   # Update component")
+    print("  python3 agent.py task <task_name> <status> [owner]       # Add/update task")
+    print("      [--priority N] [--estimate HOURS] [--depends-on TASK[,TASK]]")
+    print("  python3 agent.py phase <phase_name>                      # Update project phase")
+    print("  python3 agent.py compact | batch [file|-]                # Fold journal / apply JSONL operations")
+    print("  python3 agent.py trend [days] | scan | aggregate         # See update-progress.py")
+    print("  python3 agent.py metrics [--output FILE] [--serve [HOST:]PORT]  # Prometheus metrics export")
+    print("  python3 agent.py handoff [notes] [--delta]               # Generate a handoff report")
+    print("  python3 agent.py history [terms...] [--since 30d]        # Search handoff history")
+    print("  python3 agent.py archive [--older-than DAYS]             # Pack old untracked handoffs into the archive")
+    print("      [--include-tracked]                                  # Also git-tracked ones (commit the result)")
+    print("  python3 agent.py daemon [start|status|stop]              # Manage the agent daemon")
+
+
+def resolve(argv: List[str]) -> Tuple[Optional[str], List[str]]:
+    """Map `agent` arguments to (tool, tool argv); tool is None for help."""
+    command = argv[0] if argv else 'show'
+    if command in PROGRESS_COMMANDS:
+        return 'update-progress', argv or ['show']
+    if command == 'handoff':
+        return 'generate-handoff', argv[1:]
+    if command in ('history', 'archive'):
+        return 'generate-handoff', argv
+    if command == 'daemon':
+        return 'agent-daemon', argv[1:]
+    return None, argv
+
+
+def run(tool: str, argv: List[str]) -> None:
+    """Run a tool's main() in this process."""
+    module = load_tool(tool)
+    sys.argv = [f'{tool}.py', *argv]
+    module.main()
+
+
+if __name__ == "__main__":
+    argv = profiling.configure('agent', sys.argv[1:], lambda: project.cache_dir())
+    tool, argv = resolve(argv)
+    if tool is None:
+        print_usage()
+        sys.exit(0 if argv[:1] in (['help'], ['-h'], ['--help']) else 1)
+
+    exit_code = None
+    stdin = None
+    # A metrics server runs until interrupted, so it is never handed to the daemon
+    if tool != 'agent-daemon' and not (argv[:1] == ['metrics'] and '--serve' in argv):
+        # batch reads operations from stdin; forward them to the daemon with the request
+        stdin = sys.stdin.read() if argv[:1] == ["batch"] and argv[1:2] in ([], ["-"]) else None
+        exit_code = forward_to_daemon(tool, project.find_project_root, argv, stdin)
+    if exit_code is None:
+        if stdin is not None:
+            sys.stdin = io.StringIO(stdin)
+        run(tool, argv)
+    else:
+        sys.exit(exit_code)
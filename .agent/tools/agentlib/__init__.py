@@ -0,0 +1,4 @@
+"""
+Shared helpers for the pub-sub-demo agent tools.
+Imported by the scripts in .agent/tools (the script directory is on sys.path).
+"""
@@ -0,0 +1,200 @@
+"""
+Org-level progress across many projects built from this template.
+
+Projects are directories with `.agent/current/progress.json`, found by
+walking a root directory or listed in a manifest. Each one is loaded on a
+thread pool (git runs as a subprocess, so threads overlap well) into a small
+summary: overall and per-category completion, health, blockers, task counts
+and git branch / modified files. The other projects are only read: their
+summaries, parsed blockers and git snapshots are cached under the invoking
+project's cache (one directory per project path), keyed on the stat of
+their inputs, so a warm run mostly costs a few stats per project and never
+dirties another checkout.
+
+Category roll-ups are weighted by component weight, exactly as if every
+project's components were one tree.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .doc_cache import stat_key
+from .fsutil import atomic_write_text
+from .git_snapshot import load_git_snapshot
+from .progress_store import ProgressJournal
+from .state_docs import apply_blockers, load_parsed, parse_blockers
+
+SUMMARY_VERSION = 1
+DEFAULT_MAX_DEPTH = 4
+# Aggregate reports tolerate slightly older git status than the per-project tools
+GIT_MAX_AGE = 60.0
+SKIP_DIRS = {'node_modules', 'dist', 'build', 'coverage', 'venv', '__pycache__'}
+
+
+class ProjectSummary(NamedTuple):
+    name: str
+    path: Path
+    overall: Optional[float] = None
+    phase: Optional[str] = None
+    health: Optional[str] = None
+    blockers: List[str] = []
+    # category -> (weighted score sum, total weight)
+    categories: Dict[str, Tuple[float, float]] = {}
+    tasks: Dict[str, int] = {}
+    branch: Optional[str] = None
+    modified: Optional[int] = None
+    error: Optional[str] = None
+
+
+def is_project(path: Path) -> bool:
+    return (path / '.agent' / 'current' / 'progress.json').is_file()
+
+
+def discover_projects(root: Path, max_depth: int = DEFAULT_MAX_DEPTH) -> List[Path]:
+    """Project directories at most `max_depth` levels below `root` (root included)."""
+    found = []
+    stack = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        if is_project(directory):
+            found.append(directory)
+        if depth >= max_depth:
+            continue
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name in SKIP_DIRS:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((Path(entry.path), depth + 1))
+    return sorted(found)
+
+
+def read_manifest(manifest: Path) -> List[Path]:
+    """Project paths listed one per line (relative to the manifest), '#' comments allowed."""
+    projects = []
+    with open(manifest, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                projects.append((manifest.parent / line).resolve())
+    return projects
+
+
+def summarize_progress(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a loaded progress document an aggregate report needs."""
+    metrics = progress['metrics']
+    return {
+        'overall': progress['components'].overall(),
+        'phase': metrics['phase'],
+        'health': metrics['health'],
+        'blockers': list(metrics['blockers']),
+        'categories': {category.name: [category.weighted_sum, category.total_weight]
+                       for category in progress['components'].categories()},
+        'tasks': {status: len(names) for status, names in progress['tasks'].items()},
+    }
+
+
+def project_cache_dir(cache_dir: Path, path: Path) -> Path:
+    """The directory under `cache_dir` holding the caches for the project at `path`."""
+    digest = hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:16]
+    return cache_dir / f'{path.name}-{digest}'
+
+
+def _load_summary(path: Path, cache_dir: Optional[Path]) -> Dict[str, Any]:
+    current = path / '.agent' / 'current'
+    journal = ProgressJournal(current / 'progress.json')
+    blockers_file = current / 'blockers.md'
+    key = [list(entry) if entry else None
+           for entry in stat_key([journal.snapshot_file, journal.journal_file, blockers_file])]
+
+    cache_file = cache_dir / 'progress-summary.json' if cache_dir else None
+    if cache_file is not None:
+        try:
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+            if cached.get('version') == SUMMARY_VERSION and cached.get('key') == key:
+                return cached['summary']
+        except (OSError, ValueError):
+            pass
+
+    with open(journal.snapshot_file, 'r') as f:
+        progress = journal.replay(json.load(f))
+    if blockers_file.exists():
+        apply_blockers(progress, load_parsed(blockers_file, parse_blockers, cache_dir / 'docs' if cache_dir else None))
+    summary = summarize_progress(progress)
+    if cache_file is not None:
+        try:
+            atomic_write_text(cache_file, json.dumps({'version': SUMMARY_VERSION, 'key': key, 'summary': summary}))
+        except OSError:
+            pass
+    return summary
+
+
+def load_project(path: Path, name: str, git: bool = True, cache_dir: Optional[Path] = None) -> ProjectSummary:
+    """Summarize one project, caching under `cache_dir` (if given); failures are reported in `error`."""
+    try:
+        summary = _load_summary(path, cache_dir)
+        branch = modified = None
+        if git and (path / '.git').exists():
+            snapshot = load_git_snapshot(path, cache_dir, GIT_MAX_AGE)
+            branch, modified = snapshot.branch, len(snapshot.modified_files())
+        return ProjectSummary(
+            name, path, summary['overall'], summary['phase'], summary['health'], summary['blockers'],
+            {category: tuple(sums) for category, sums in summary['categories'].items()},
+            summary['tasks'], branch, modified)
+    except Exception as e:
+        return ProjectSummary(name, path, error=str(e) or type(e).__name__)
+
+
+def load_projects(projects: List[Path], root: Optional[Path] = None, workers: Optional[int] = None,
+                  git: bool = True, cache_dir: Optional[Path] = None) -> List[ProjectSummary]:
+    """Summarize projects concurrently; names are paths relative to `root` when possible.
+
+    `cache_dir` (normally the invoking project's `.agent/cache/aggregate`)
+    keeps per-project caches; without it every project is read afresh.
+    """
+    def name_of(path: Path) -> str:
+        if root is not None:
+            try:
+                return str(path.relative_to(root)) if path != root else path.name
+            except ValueError:
+                pass
+        return str(path)
+
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda path: load_project(
+            path, name_of(path), git, project_cache_dir(cache_dir, path) if cache_dir else None), projects))
+
+
+def rollup(summaries: List[ProjectSummary]) -> Dict[str, Any]:
+    """Combined completion, health and blocker counts over all loaded projects."""
+    loaded = [summary for summary in summaries if summary.error is None]
+    categories: Dict[str, List[float]] = {}
+    for summary in loaded:
+        for category, (weighted_sum, total_weight) in summary.categories.items():
+            sums = categories.setdefault(category, [0.0, 0.0])
+            sums[0] += weighted_sum
+            sums[1] += total_weight
+
+    total_sum = sum(sums[0] for sums in categories.values())
+    total_weight = sum(sums[1] for sums in categories.values())
+    health: Dict[str, int] = {}
+    for summary in loaded:
+        health[summary.health or 'unknown'] = health.get(summary.health or 'unknown', 0) + 1
+    return {
+        'projects': len(loaded),
+        'failed': len(summaries) - len(loaded),
+        'overall': round(total_sum / total_weight, 1) if total_weight else 0.0,
+        'categories': {category: sums[0] / sums[1] if sums[1] else 0.0
+                       for category, sums in sorted(categories.items())},
+        'health': health,
+        'blockers': sum(len(summary.blockers) for summary in loaded),
+    }
@@ -0,0 +1,125 @@
+"""
+Timing, result files and comparison for the agent tool benchmarks.
+
+Results are JSON documents with one entry per (benchmark, size); every entry
+stores per-call timings in seconds so runs from different commits can be
+compared with `compare_results`.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .fsutil import atomic_write_json
+
+RESULTS_VERSION = 1
+# Fast operations are looped until one sample takes at least this long
+MIN_SAMPLE_TIME = 0.01
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5) -> Dict[str, Any]:
+    """Time `fn` like timeit: calibrate a loop count, then take `repeat` samples."""
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    number = max(1, int(MIN_SAMPLE_TIME / first)) if first > 0 else 1000
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return summarize(samples, number)
+
+
+def measure_command(argv: Sequence[str], cwd: Path, repeat: int = 5,
+                    env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Time a command end to end (process start-up included)."""
+    run_env = dict(os.environ, **(env or {}))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=cwd, env=run_env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, 1)
+
+
+def summarize(samples: List[float], number: int) -> Dict[str, Any]:
+    return {
+        'repeat': len(samples),
+        'number': number,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'max': max(samples),
+    }
+
+
+def git_commit(root: Path) -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root,
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def new_results(root: Path, config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(root),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': config,
+        'results': [],
+    }
+
+
+def save_results(path: Path, results: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_json(path, results, indent=2)
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        results = json.load(f)
+    if results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Unsupported benchmark results version in {path}")
+    return results
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = 0.25) -> List[Dict[str, Any]]:
+    """Pair entries by (name, size) and flag median slow-downs above `threshold`."""
+    base = {(r['name'], r['size']): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        before = base.get((result['name'], result['size']))
+        if before is None:
+            continue
+        ratio = result['median'] / before['median'] if before['median'] else float('inf')
+        rows.append({
+            'name': result['name'],
+            'size': result['size'],
+            'baseline': before['median'],
+            'current': result['median'],
+            'ratio': ratio,
+            'regression': ratio > 1 + threshold,
+        })
+    return rows
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
@@ -0,0 +1,123 @@
+"""
+Group changed files by component for the handoff "Code Changes" section.
+
+Paths are classified with the same .agent/components.json globs the scanner
+uses: a path belongs to the component whose matching glob is most specific
+(a literal file beats a glob, a deeper base directory beats a shallower one).
+Paths no component claims fall back to an area of the repository
+("frontend (other)", "infrastructure", "docs", ...). Line counts come from
+the snapshot's single `git diff --numstat -z` call, so grouping thousands of
+files costs no extra git work.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .git_snapshot import GitSnapshot
+from .handoff_delta import FileChange
+from .scanner import compile_glob, glob_base, match_files
+
+# Fallback areas for unclaimed paths, first match wins
+AREAS = [
+    ('apps/client/**', 'frontend (other)'),
+    ('apps/server/**', 'backend (other)'),
+    ('packages/**', 'shared (other)'),
+    ('.agent/**', 'agent tooling'),
+    ('.github/**', 'infrastructure'),
+    ('scripts/**', 'infrastructure'),
+    ('Dockerfile*', 'infrastructure'),
+    ('docker-compose*', 'infrastructure'),
+    ('Makefile', 'infrastructure'),
+    ('*.json', 'infrastructure'),
+    ('*.yaml', 'infrastructure'),
+    ('.*', 'infrastructure'),
+    ('docs/**', 'docs'),
+    ('docs-site/**', 'docs'),
+    ('**/*.md', 'docs'),
+    ('test/**', 'tests'),
+]
+OTHER = 'other'
+
+
+class ComponentChanges(NamedTuple):
+    component: str
+    files: List[FileChange]
+    insertions: int
+    deletions: int
+    # Files without line counts (binary, untracked)
+    uncounted: int
+
+
+def _specificity(glob: str) -> Tuple[bool, int]:
+    return (not any(char in glob for char in '*?['), len(glob_base(glob)))
+
+
+class ChangeClassifier:
+    """Maps repository paths to component paths (or fallback areas)."""
+
+    def __init__(self, component_globs: Dict[str, List[str]], known: Optional[Set[str]] = None):
+        # Components missing from progress.json are ignored
+        self.component_globs = {name: globs for name, globs in component_globs.items()
+                                if known is None or name in known}
+        # One alternation tried in order, instead of a regex per area
+        self._areas = re.compile('|'.join(f'(?P<a{index}>{compile_glob(glob).pattern})'
+                                          for index, (glob, _) in enumerate(AREAS)))
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], known: Optional[Set[str]] = None) -> 'ChangeClassifier':
+        """Build from a loaded components.json (None: fallback areas only)."""
+        components = (config or {}).get('components', {})
+        return cls({name: spec.get('sources', []) if isinstance(spec, dict) else spec
+                    for name, spec in components.items()}, known)
+
+    def area(self, path: str) -> str:
+        match = self._areas.match(path)
+        return AREAS[int(match.lastgroup[1:])][1] if match else OTHER
+
+    def classify(self, paths: Iterable[str]) -> Dict[str, str]:
+        """{path: component or area} for every path."""
+        ordered = sorted(set(paths))
+        best: Dict[str, Tuple[Tuple[bool, int], str]] = {}
+        for name, globs in self.component_globs.items():
+            for glob in globs:
+                rank = _specificity(glob)
+                for path in match_files(ordered, [glob]):
+                    if path not in best or rank > best[path][0]:
+                        best[path] = (rank, name)
+        return {path: best[path][1] if path in best else self.area(path) for path in ordered}
+
+
+def snapshot_changes(snapshot: GitSnapshot) -> List[FileChange]:
+    """Every changed path in a snapshot with its line counts (untracked files are new)."""
+    changes = []
+    untracked = set(snapshot.untracked)
+    for path in snapshot.modified_files():
+        if path in snapshot.numstat:
+            insertions, deletions = snapshot.numstat[path]
+            changes.append(FileChange(path, insertions, deletions, 'modified'))
+        elif path in untracked:
+            changes.append(FileChange(path, None, None, 'new'))
+        else:
+            # e.g. a mode change or conflict without a numstat entry
+            changes.append(FileChange(path, 0, 0, 'modified'))
+    return changes
+
+
+def group_changes(changes: List[FileChange], classifier: ChangeClassifier) -> List[ComponentChanges]:
+    """Changes per component, most lines changed first; files sorted by lines changed."""
+    owners = classifier.classify(change.path for change in changes)
+    groups: Dict[str, List[FileChange]] = {}
+    for change in changes:
+        groups.setdefault(owners[change.path], []).append(change)
+
+    summaries = []
+    for component, files in groups.items():
+        files.sort(key=lambda change: (-((change.insertions or 0) + (change.deletions or 0)), change.path))
+        summaries.append(ComponentChanges(
+            component, files,
+            sum(change.insertions or 0 for change in files),
+            sum(change.deletions or 0 for change in files),
+            sum(1 for change in files if change.insertions is None),
+        ))
+    summaries.sort(key=lambda group: (-(group.insertions + group.deletions), -len(group.files), group.component))
+    return summaries
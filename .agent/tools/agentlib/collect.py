@@ -0,0 +1,85 @@
+"""
+Concurrent collection of report inputs with per-source timeouts.
+
+A handoff needs the progress document, the git snapshot and blockers.md.
+Instead of gathering them one after another, `collect()` starts every source
+at once on an asyncio loop: coroutine sources (git subprocesses) run on the
+loop, plain callables (file reads, JSON parsing) run on a small thread pool.
+Each source has its own timeout. A source that fails or times out does not
+fail the collection; its error is recorded in `Collected.degraded` and the
+report renders that section as unavailable.
+
+A timed-out git subprocess is killed. A timed-out disk read cannot be
+interrupted: its result is ignored, but the thread finishes in the
+background before the process exits.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from . import profiling
+
+# Longest a source may take unless it sets its own timeout (seconds)
+DEFAULT_TIMEOUT = 10.0
+MAX_WORKERS = 4
+
+
+class Source(NamedTuple):
+    """One input: `load` is a coroutine function or a blocking callable."""
+    name: str
+    load: Callable[[], Any]
+    timeout: float = DEFAULT_TIMEOUT
+
+
+class Collected(NamedTuple):
+    values: Dict[str, Any]
+    # source name -> why it is missing
+    degraded: Dict[str, str]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.values.get(name, default)
+
+
+def describe_error(error: BaseException, timeout: float) -> str:
+    if isinstance(error, asyncio.TimeoutError):
+        return f"timed out after {timeout:g}s"
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+async def _load(source: Source, executor: ThreadPoolExecutor) -> Any:
+    with profiling.span(f'collect {source.name}'):
+        if asyncio.iscoroutinefunction(source.load):
+            return await asyncio.wait_for(source.load(), source.timeout)
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(executor, source.load), source.timeout)
+
+
+async def collect_async(sources: List[Source], max_workers: int = MAX_WORKERS) -> Collected:
+    """Load every source concurrently; failures and timeouts are recorded, not raised."""
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='collect')
+    try:
+        results = await asyncio.gather(*(_load(source, executor) for source in sources),
+                                       return_exceptions=True)
+    finally:
+        # Do not wait for reads that timed out
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    values: Dict[str, Any] = {}
+    degraded: Dict[str, str] = {}
+    for source, result in zip(sources, results):
+        if isinstance(result, Exception):
+            degraded[source.name] = describe_error(result, source.timeout)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            values[source.name] = result
+    return Collected(values, degraded)
+
+
+def collect(sources: List[Source], max_workers: int = MAX_WORKERS,
+            timeouts: Optional[Dict[str, float]] = None) -> Collected:
+    """Run `collect_async` on a fresh event loop; `timeouts` overrides per-source limits."""
+    if timeouts:
+        sources = [source._replace(timeout=timeouts.get(source.name, source.timeout)) for source in sources]
+    return asyncio.run(collect_async(sources, max_workers))
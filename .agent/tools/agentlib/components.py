@@ -0,0 +1,149 @@
+"""
+Hierarchical component tree for progress["components"].
+
+Components can nest to any depth (e.g. backend.sharedb.ops.snapshot). In
+JSON a leaf is either a plain score (weight 1) or {"score": 80, "weight": 2};
+any other object is a group of child components. Every node caches the
+weighted score sum and total weight of its subtree, so changing one score
+only walks the path to the root and any node's completion is an O(1) read.
+The flat two-level layout is the depth-2 case and gives the same overall
+completion as before (the mean over all components).
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+Path = Union[str, Sequence[str]]
+
+
+def split_path(path: Path) -> List[str]:
+    """Normalize 'a.b.c' or ['a', 'b', 'c'] to a list of names."""
+    if isinstance(path, str):
+        return [part for part in path.split('.') if part]
+    return list(path)
+
+
+class ComponentNode:
+    """A group of components or a single scored component."""
+
+    __slots__ = ('name', 'parent', 'children', 'score', 'weight', 'explicit_weight',
+                 'weighted_sum', 'total_weight')
+
+    def __init__(self, name: str, parent: Optional['ComponentNode'] = None):
+        self.name = name
+        self.parent = parent
+        self.children: Optional[Dict[str, 'ComponentNode']] = None
+        self.score = 0
+        self.weight = 1
+        self.explicit_weight = False
+        self.weighted_sum = 0.0
+        self.total_weight = 0.0
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.children is None
+
+    @property
+    def completion(self) -> float:
+        """Weighted mean score of this subtree."""
+        if self.total_weight == 0:
+            return 0.0
+        return self.weighted_sum / self.total_weight
+
+    @property
+    def path(self) -> str:
+        names = []
+        node: Optional[ComponentNode] = self
+        while node is not None and node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+    def to_json(self) -> Any:
+        if self.children is None:
+            if self.explicit_weight:
+                return {"score": self.score, "weight": self.weight}
+            return self.score
+        return {name: child.to_json() for name, child in self.children.items()}
+
+
+class ComponentTree:
+    """Component tree with incrementally maintained subtree aggregates."""
+
+    def __init__(self) -> None:
+        self.root = ComponentNode('')
+        self.root.children = {}
+
+    @classmethod
+    def from_json(cls, components: Dict[str, Any]) -> 'ComponentTree':
+        """Build a tree from the JSON layout, computing aggregates bottom-up."""
+        tree = cls()
+        tree._build(tree.root, components)
+        return tree
+
+    def _build(self, node: ComponentNode, data: Dict[str, Any]) -> None:
+        for name, value in data.items():
+            child = ComponentNode(name, node)
+            node.children[name] = child
+            if isinstance(value, dict) and "score" not in value:
+                child.children = {}
+                self._build(child, value)
+            else:
+                if isinstance(value, dict):
+                    child.score = value["score"]
+                    child.weight = value.get("weight", 1)
+                    child.explicit_weight = "weight" in value
+                else:
+                    child.score = value
+                child.weighted_sum = child.score * child.weight
+                child.total_weight = child.weight
+            node.weighted_sum += child.weighted_sum
+            node.total_weight += child.total_weight
+
+    def to_json(self) -> Dict[str, Any]:
+        return self.root.to_json()
+
+    def find(self, path: Path) -> Optional[ComponentNode]:
+        """Look up a node by dotted path; None if it does not exist."""
+        node = self.root
+        for name in split_path(path):
+            if node.children is None or name not in node.children:
+                return None
+            node = node.children[name]
+        return node
+
+    def set_score(self, path: Path, score: int) -> int:
+        """Set a leaf score and update aggregates up to the root. Returns the old score."""
+        node = self.find(path)
+        if node is None or not node.is_leaf:
+            raise KeyError(f"Component '{'.'.join(split_path(path))}' not found")
+
+        old_score = node.score
+        delta = (score - old_score) * node.weight
+        node.score = score
+        while node is not None:
+            node.weighted_sum += delta
+            node = node.parent
+        return old_score
+
+    def overall(self) -> float:
+        """Overall completion, rounded like metrics.overall_completion."""
+        return round(self.root.completion, 1)
+
+    def categories(self) -> Iterator[ComponentNode]:
+        """Top-level nodes in document order."""
+        return iter(self.root.children.values())
+
+    def walk(self, node: Optional[ComponentNode] = None,
+             depth: int = 0) -> Iterator[Tuple[int, ComponentNode]]:
+        """Depth-first (depth, node) pairs below `node` (default: the root)."""
+        node = node or self.root
+        if node.children is None:
+            return
+        for child in node.children.values():
+            yield depth, child
+            if not child.is_leaf:
+                yield from self.walk(child, depth + 1)
+
+    def leaf_paths(self, node: Optional[ComponentNode] = None) -> List[str]:
+        """Dotted paths of all leaves, for error messages."""
+        return [child.path for _, child in self.walk(node) if child.is_leaf]
@@ -0,0 +1,230 @@
+"""
+Opt-in agent daemon and its thin client.
+
+The daemon (started with agent-daemon.py) keeps the agent tools imported and
+their parsed documents and git snapshot warm in memory, refreshes them when
+.agent/current or the git index change, and runs tool commands sent over a
+Unix domain socket. The CLIs call `forward_to_daemon()` first and fall back
+to running in-process when no daemon is listening or AGENT_NO_DAEMON is set.
+Once a request has been sent there is no fallback: a timeout or malformed
+reply is reported as an error, since the daemon may have run the command.
+
+Protocol: one JSON request line {"tool", "argv", "cwd", "stdin"} and one JSON
+response line {"exit", "stdout"} per connection. While a command runs the
+daemon sends a blank keepalive line every KEEPALIVE_INTERVAL seconds, so the
+client timeout only bounds silence, not how long a command (e.g. `scan`) takes.
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional
+
+from . import doc_cache, profiling
+
+CLIENT_TIMEOUT = 30.0
+KEEPALIVE_INTERVAL = 5.0
+DAEMON_TOOL = '_daemon'
+
+
+def socket_path(root: Path) -> Path:
+    """Unix socket of the daemon serving `root`."""
+    return root / '.agent' / 'cache' / 'agentd.sock'
+
+
+def _request(root: Path, payload: Dict[str, Any], timeout: float = CLIENT_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """Send one request. None if no daemon accepted the connection, so nothing was sent."""
+    path = socket_path(root)
+    if not path.exists():
+        return None
+    # Only clients that find a socket pay for importing the socket module
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        try:
+            conn.connect(str(path))
+        except OSError:
+            # A stale socket (ECONNREFUSED) or one removed since the check (ENOENT)
+            return None
+        try:
+            conn.sendall(json.dumps(payload).encode() + b'\n')
+            conn.shutdown(socket.SHUT_WR)
+            with conn.makefile('rb') as f:
+                line = f.readline()
+                while line == b'\n':
+                    # Keepalive: the command is still running
+                    line = f.readline()
+            response = json.loads(line)
+            if not isinstance(response, dict):
+                raise ValueError(f"unexpected reply {response!r}")
+            return response
+        except (OSError, ValueError) as e:
+            # The daemon may already be running the command; running it again here could apply it twice
+            return {'exit': 1, 'stdout': (f"Error: agent daemon did not answer ({e}); "
+                                          "the command may still have run. Check before retrying, "
+                                          "or set AGENT_NO_DAEMON=1\n")}
+
+
+def forward_to_daemon(tool: str, find_root: Callable[[], Path], argv: List[str],
+                      stdin: Optional[str] = None) -> Optional[int]:
+    """Run a tool command in the daemon. Returns its exit code, or None to run in-process."""
+    if os.environ.get('AGENT_NO_DAEMON') or profiling.enabled():
+        # Profiling measures this process, so never hand the command off
+        return None
+    try:
+        root = find_root()
+    except RuntimeError:
+        return None
+
+    response = _request(root, {'tool': tool, 'argv': argv, 'cwd': os.getcwd(), 'stdin': stdin})
+    if response is None:
+        return None
+
+    sys.stdout.write(response.get('stdout', ''))
+    sys.stdout.flush()
+    return response.get('exit', 1)
+
+
+def daemon_command(root: Path, command: str) -> Optional[str]:
+    """Send a control command (status, stop) to the daemon; None if not running."""
+    response = _request(root, {'tool': DAEMON_TOOL, 'argv': [command]}, timeout=5.0)
+    return None if response is None else response.get('stdout', '')
+
+
+class AgentDaemon:
+    """Serves tool commands from one process with warm in-memory state."""
+
+    def __init__(self, root: Path, tools: Dict[str, ModuleType], warmers: List[Callable[[], Any]]):
+        self.root = root
+        self.tools = tools
+        self.warmers = warmers
+        self.requests = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._running = False
+        self._watcher = None
+
+    def warm(self, changed: Optional[List[Path]] = None) -> None:
+        """Reload cached documents, e.g. after a watcher event."""
+        with self._lock:
+            self.refreshes += 1
+            for warmer in self.warmers:
+                try:
+                    warmer()
+                except Exception:
+                    # A half-written or invalid file; the next request reloads it
+                    doc_cache.invalidate()
+
+    def run_tool(self, tool: str, argv: List[str], cwd: Optional[str], stdin: Optional[str]) -> Dict[str, Any]:
+        """Run a tool's main() with captured output, as if invoked from the CLI."""
+        module = self.tools.get(tool)
+        if module is None:
+            return {'exit': 2, 'stdout': f"Unknown tool: {tool}\n"}
+
+        output = io.StringIO()
+        saved = sys.argv, sys.stdin, os.getcwd()
+        exit_code = 0
+        try:
+            sys.argv = [f'{tool}.py', *argv]
+            sys.stdin = io.StringIO(stdin or '')
+            if cwd:
+                os.chdir(cwd)
+            with redirect_stdout(output), redirect_stderr(output):
+                module.main()
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            output.write(f"Error: {e}\n")
+            exit_code = 1
+        finally:
+            sys.argv, sys.stdin = saved[0], saved[1]
+            os.chdir(saved[2])
+
+        if exit_code != 0:
+            # A failed command may have mutated a cached document before failing
+            doc_cache.invalidate()
+        return {'exit': exit_code, 'stdout': output.getvalue()}
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if request.get('tool') == DAEMON_TOOL:
+            command = (request.get('argv') or ['status'])[0]
+            if command == 'stop':
+                self._running = False
+                return {'exit': 0, 'stdout': "Agent daemon stopping\n"}
+            watcher = type(self._watcher).__name__ if self._watcher else 'none'
+            return {'exit': 0, 'stdout': (f"Agent daemon running (pid {os.getpid()}, watcher {watcher}, "
+                                          f"{self.requests} requests, {self.refreshes} refreshes)\n")}
+
+        with self._lock:
+            self.requests += 1
+            return self.run_tool(request.get('tool', ''), request.get('argv', []),
+                                 request.get('cwd'), request.get('stdin'))
+
+    def respond(self, conn: Any, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a request on a worker thread, sending keepalives to the client while it runs."""
+        result: Dict[str, Any] = {}
+        worker = threading.Thread(target=lambda: result.update(self.handle(request)),
+                                  name='agent-request', daemon=True)
+        worker.start()
+        worker.join(KEEPALIVE_INTERVAL)
+        while worker.is_alive():
+            try:
+                conn.sendall(b'\n')
+            except OSError:
+                # The client went away; let the command finish anyway
+                pass
+            worker.join(KEEPALIVE_INTERVAL)
+        return result or {'exit': 1, 'stdout': "Error: request failed in the agent daemon\n"}
+
+    def serve_forever(self) -> None:
+        path = socket_path(self.root)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            if daemon_command(self.root, 'status') is not None:
+                raise RuntimeError(f"Agent daemon already running on {path}")
+            path.unlink()
+
+        self.warm()
+        from .watch import start_watcher
+        self._watcher = start_watcher([
+            (self.root / '.agent' / 'current', None),
+            (self.root / '.git', {'index', 'HEAD'}),
+        ], self.warm)
+
+        import socket
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen(16)
+        server.settimeout(1.0)
+        self._running = True
+        try:
+            while self._running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    conn.settimeout(CLIENT_TIMEOUT)
+                    try:
+                        with conn.makefile('rb') as f:
+                            request = json.loads(f.readline())
+                        response = self.respond(conn, request)
+                    except (OSError, ValueError) as e:
+                        response = {'exit': 1, 'stdout': f"Error: bad request ({e})\n"}
+                    try:
+                        conn.sendall(json.dumps(response).encode() + b'\n')
+                    except OSError:
+                        pass
+        finally:
+            server.close()
+            if self._watcher is not None:
+                self._watcher.stop()
+            try:
+                path.unlink()
+            except OSError:
+                pass
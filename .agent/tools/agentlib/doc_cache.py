@@ -0,0 +1,49 @@
+"""
+In-process cache of parsed agent documents.
+
+Entries are keyed on the stat (mtime, size, inode) of the files they were
+parsed from and re-validated with a cheap stat on every access, so a
+long-running process never serves a document older than what is on disk.
+One-shot CLI runs simply miss; the agent daemon keeps hits warm.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+StatKey = Tuple[Optional[Tuple[int, int, int]], ...]
+
+_entries: Dict[str, Tuple[StatKey, Any]] = {}
+
+
+def stat_key(paths: Sequence[Path]) -> StatKey:
+    """Stat fingerprint of a set of files (None for missing files)."""
+    key = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            key.append(None)
+        else:
+            key.append((st.st_mtime_ns, st.st_size, st.st_ino))
+    return tuple(key)
+
+
+def cached(name: str, paths: Sequence[Path], loader: Callable[[], Any]) -> Any:
+    """Return the cached value for `name` if `paths` are unchanged, else reload it."""
+    key = stat_key(paths)
+    entry = _entries.get(name)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+
+    value = loader()
+    _entries[name] = (key, value)
+    return value
+
+
+def invalidate(name: Optional[str] = None) -> None:
+    """Drop one cached entry, or all of them."""
+    if name is None:
+        _entries.clear()
+    else:
+        _entries.pop(name, None)
@@ -0,0 +1,197 @@
+"""
+Synthetic agent projects for benchmarks.
+
+`make_project` lays out a throw-away project (package.json, .agent/ state,
+handoff history) inside a git repository with modified and untracked files,
+so the real tools can run against it unchanged.
+"""
+
+import json
+import shutil
+import subprocess
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict
+
+from .schema import CURRENT_VERSION
+from .task_store import TASK_STATUSES
+from .timeseries import TimeSeries
+
+CATEGORIES = ('frontend', 'backend', 'shared', 'infrastructure')
+GROUP_SIZE = 100
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent.parent / 'templates'
+
+GIT = ['git', '-c', 'user.name=bench', '-c', 'user.email=bench@example.com',
+       '-c', 'commit.gpgsign=false', '-c', 'core.hooksPath=/dev/null']
+
+
+def component_name(index: int) -> str:
+    return f'component_{index:06d}'
+
+
+def component_path(index: int) -> str:
+    """Dotted component path (below its category) of synthetic component `index`."""
+    return f'group_{index // GROUP_SIZE:04d}.{component_name(index)}'
+
+
+def category_of(index: int) -> str:
+    return CATEGORIES[index % len(CATEGORIES)]
+
+
+def task_name(index: int) -> str:
+    return f'task-{index:06d}'
+
+
+def progress_document(components: int, tasks: int) -> Dict[str, Any]:
+    """A progress.json with `components` leaves (two levels deep) and `tasks` tasks."""
+    tree: Dict[str, Dict[str, Dict[str, int]]] = {category: {} for category in CATEGORIES}
+    for index in range(components):
+        group, name = component_path(index).split('.')
+        tree[category_of(index)].setdefault(group, {})[name] = (index * 37) % 101
+
+    statuses = list(TASK_STATUSES)
+    task_lists: Dict[str, list] = {status: [] for status in statuses}
+    metadata = {}
+    for index in range(tasks):
+        name = task_name(index)
+        task_lists[statuses[index % len(statuses)]].append(name)
+        if index % 10 == 0:
+            metadata[name] = {"created": "2026-01-01T00:00:00", "updated": "2026-01-01T00:00:00",
+                              "owner": f"dev{index % 7}"}
+
+    document = {
+        "components": tree,
+        "tasks": task_lists,
+        "metrics": {"overall_completion": 0, "phase": "benchmark", "health": "green", "blockers": []},
+        "metadata": {"format_version": CURRENT_VERSION, "version": "1.0.0", "project": "pub-sub-demo",
+                     "created": "2026-01-01T00:00:00", "last_updated": "2026-01-01T00:00:00"},
+    }
+    if metadata:
+        document["task_metadata"] = metadata
+    return document
+
+
+def planned_task_metadata(tasks: int) -> Dict[str, Dict[str, Any]]:
+    """Priorities, estimates and dependencies for `tasks` synthetic tasks (chains of three)."""
+    metadata: Dict[str, Dict[str, Any]] = {}
+    for index in range(tasks):
+        meta: Dict[str, Any] = {"estimate": index % 8 + 1}
+        if index % 5 == 0:
+            meta["priority"] = index % 4
+        if index % 3:
+            meta["depends_on"] = [task_name(index - 1)]
+        metadata[task_name(index)] = meta
+    return metadata
+
+
+def handoff_text(index: int, when: datetime) -> str:
+    lines = [
+        "# Handoff Report",
+        "",
+        "**Project**: pub-sub-demo",
+        f"**Date**: {when:%Y-%m-%d %H:%M:%S}",
+        f"**Session**: {when:%Y%m%d_%H%M%S}",
+        "",
+        "## Session Summary",
+        "",
+        f"Worked on {component_name(index)} and {task_name(index)}.",
+        "",
+        "### What I Completed",
+        "",
+        *[f"- ✅ {task_name(index * 3 + n)}" for n in range(3)],
+        "",
+        "### What's In Progress",
+        "",
+        f"- 🔄 {'ShareDB presence' if index % 5 == 0 else 'Cursor sync'} for {component_name(index)}",
+        "",
+        "### Code Changes",
+        "",
+        *[f"    - `src/module_{(index + n) % 997:04d}.ts` - Modified during session" for n in range(10)],
+        "",
+        "### Overall Progress",
+        f"- **Completion**: {(index * 0.37) % 100:.1f}%",
+        "",
+        "### Branch",
+        "",
+        f"- Current: `{'main' if index % 3 else 'feature/presence'}`",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def write_history(root: Path, handoffs: int) -> None:
+    handoffs_dir = root / '.agent' / 'history' / 'handoffs'
+    handoffs_dir.mkdir(parents=True, exist_ok=True)
+    start = datetime(2026, 1, 1, 9, 0, 0)
+    text = ""
+    for index in range(handoffs):
+        when = start + timedelta(hours=index * 7)
+        text = handoff_text(index, when)
+        (handoffs_dir / f'handoff-{when:%Y%m%d_%H%M%S}.md').write_text(text)
+    (root / '.agent' / 'history' / 'latest-handoff.md').write_text(text)
+
+
+def write_series(root: Path, days: int) -> None:
+    """Record hourly overall/category scores rising from 20% over `days` days."""
+    end = datetime.now().timestamp()
+    hours = days * 24
+    with TimeSeries(root / '.agent' / 'cache' / 'progress.series') as series:
+        for hour in range(hours):
+            value = 20 + 70 * hour / hours
+            series.append([('', value)] + [(category, value) for category in CATEGORIES],
+                          ts=end - (hours - hour) * 3600)
+
+
+def write_source_tree(root: Path, files: int) -> Dict[str, Any]:
+    """Write `files` TypeScript modules (every fifth with a test) and return a component map for them."""
+    components: Dict[str, Any] = {}
+    for index in range(files):
+        group = f'src/{category_of(index)}/group_{index // GROUP_SIZE:04d}'
+        module = root / group / f'module_{index:06d}.ts'
+        module.parent.mkdir(parents=True, exist_ok=True)
+        todo = '// TODO: handle errors\n' if index % 7 == 0 else ''
+        module.write_text(f"import {{ helper }} from './module_{max(index - 1, 0):06d}';\n{todo}"
+                          f"export const value{index} = helper({index});\n" * 20)
+        if index % 5 == 0:
+            test = root / group / '__tests__' / f'module_{index:06d}.test.ts'
+            test.parent.mkdir(exist_ok=True)
+            test.write_text(f"import {{ value{index} }} from '../module_{index:06d}';\n")
+        components.setdefault(f'{category_of(index)}.group_{index // GROUP_SIZE:04d}', [f'{group}/*.ts'])
+    return {'version': 1, 'components': components}
+
+
+def init_git_repo(root: Path, files: int) -> None:
+    """Commit `files` tracked sources, then modify half of them and add as many untracked."""
+    src = root / 'src'
+    src.mkdir(parents=True, exist_ok=True)
+    for index in range(files):
+        (src / f'module_{index:06d}.ts').write_text(f"export const value{index} = {index};\n")
+
+    subprocess.run([*GIT, 'init', '-q', '-b', 'main'], cwd=root, check=True)
+    subprocess.run([*GIT, 'add', '-A'], cwd=root, check=True)
+    subprocess.run([*GIT, 'commit', '-q', '-m', 'Synthetic baseline'], cwd=root, check=True)
+
+    for index in range(0, files, 2):
+        with open(src / f'module_{index:06d}.ts', 'a') as f:
+            f.write(f"export const changed{index} = true;\n")
+    for index in range(files):
+        (src / f'untracked_{index:06d}.ts').write_text(f"export const draft{index} = {index};\n")
+
+
+def make_project(root: Path, components: int, tasks: int, handoffs: int, git_files: int) -> Path:
+    """Create a synthetic project in `root` (which must not exist yet)."""
+    agent_dir = root / '.agent'
+    (agent_dir / 'current').mkdir(parents=True)
+    (root / 'package.json').write_text('{"name": "pub-sub-demo-bench", "private": true}\n')
+
+    with open(agent_dir / 'current' / 'progress.json', 'w') as f:
+        json.dump(progress_document(components, tasks), f, indent=4)
+    (agent_dir / 'current' / 'state.md').write_text("# Benchmark State\n\nSynthetic project.\n")
+    (agent_dir / 'current' / 'blockers.md').write_text("# Current Blockers\n\n*No active blockers currently*\n")
+    shutil.copytree(TEMPLATES_DIR, agent_dir / 'templates')
+    (root / '.gitignore').write_text(".agent/cache/\n.agent/current/.lock\n.agent/current/progress.journal.jsonl\n"
+                                     ".agent/current/progress.journal.rejected.jsonl\n.agent/history/archive/.lock\n")
+
+    write_history(root, handoffs)
+    init_git_repo(root, git_files)
+    return root
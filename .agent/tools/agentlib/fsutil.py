@@ -0,0 +1,112 @@
+"""
+Crash- and concurrency-safe file helpers for the agent tools.
+
+Writes go to a temporary file in the target directory, are fsynced and then
+renamed over the target, so readers see either the old or the new content.
+`state_lock` is an fcntl-based reader/writer lock: readers share it, writers
+take it exclusively for their read-modify-write.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+from . import profiling
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None
+
+LOCK_FILE_NAME = '.lock'
+
+
+def fsync_dir(directory: Path) -> None:
+    """Persist a rename by syncing the containing directory (POSIX only)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_umask = None
+
+
+def _new_file_mode(path: Path) -> int:
+    """The mode `open(path, 'w')` would give: the existing file's, else 0o666 less the umask."""
+    global _umask
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        pass
+    if _umask is None:
+        # The umask can only be read by setting it; do it once per process
+        _umask = os.umask(0o022)
+        os.umask(_umask)
+    return 0o666 & ~_umask
+
+
+@contextmanager
+def atomic_writer(path: Path, binary: bool = False) -> Iterator[IO]:
+    """Stream text (or bytes) into `path`; it is replaced atomically when the block exits cleanly."""
+    # tempfile is imported on the first write; read-only commands never load it
+    import tempfile
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        # mkstemp creates the file 0600; keep the mode readers of the target expect
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, _new_file_mode(path))
+        with os.fdopen(fd, 'wb' if binary else 'w') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        profiling.record_file_written(tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    fsync_dir(path.parent)
+
+
+def atomic_write_text(path: Path, content: str) -> None:
+    """Atomically replace `path` with `content`."""
+    with atomic_writer(path) as f:
+        f.write(content)
+
+
+def atomic_write_json(path: Path, data: Any, indent: int = 4) -> None:
+    """Atomically replace `path` with `data` serialized as JSON."""
+    atomic_write_text(path, json.dumps(data, indent=indent))
+
+
+@contextmanager
+def state_lock(directory: Path, exclusive: bool = False) -> Iterator[None]:
+    """Hold a shared (default) or exclusive lock on a state directory.
+
+    Without fcntl (e.g. on Windows) this is a no-op and only the atomic
+    writes protect the files.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    directory.mkdir(parents=True, exist_ok=True)
+    fd = os.open(directory / LOCK_FILE_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        with profiling.span('acquire exclusive lock' if exclusive else 'acquire shared lock', 'lock'):
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
@@ -0,0 +1,376 @@
+"""
+Single-pass git snapshot for the agent tools.
+
+Collects branch, staged/unstaged/untracked status, renames and per-file
+numstat from one `git status --porcelain=v2 -z --branch` call plus at most
+one `git diff --numstat` call. Snapshots are cached under .agent/cache and
+reused while the index, HEAD and the previously dirty paths are unchanged.
+
+`load_git_snapshot_async` is the asyncio flavour used when handoff inputs are
+collected concurrently: it starts the status and diff calls together and
+kills them if the caller times out.
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import profiling
+from .fsutil import atomic_write_text
+
+CACHE_VERSION = 1
+# Edits to files that were clean last time do not touch the stat key, so a
+# cached snapshot is only trusted for a few seconds (e.g. back-to-back hooks)
+DEFAULT_MAX_AGE = 5.0
+
+# Last payload per cache file, for long-running processes
+_memo: Dict[Path, Dict] = {}
+
+# Well-known hash of the empty tree, used to diff before the first commit
+EMPTY_TREE = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
+
+
+@dataclass
+class GitSnapshot:
+    """Point-in-time view of the working tree."""
+
+    branch: str = 'unknown'
+    head: Optional[str] = None
+    upstream: Optional[str] = None
+    ahead: int = 0
+    behind: int = 0
+    staged: List[str] = field(default_factory=list)
+    unstaged: List[str] = field(default_factory=list)
+    untracked: List[str] = field(default_factory=list)
+    conflicted: List[str] = field(default_factory=list)
+    renames: Dict[str, str] = field(default_factory=dict)
+    numstat: Dict[str, Tuple[Optional[int], Optional[int]]] = field(default_factory=dict)
+    is_repo: bool = True
+
+    def modified_files(self) -> List[str]:
+        """All changed paths (staged, unstaged, untracked), deduplicated."""
+        seen = dict.fromkeys(self.staged + self.unstaged + self.conflicted + self.untracked)
+        return list(seen)
+
+    def excluding(self, prefix: str) -> 'GitSnapshot':
+        """Copy without the paths under `prefix` (e.g. files the tools write themselves)."""
+        def keep(path: str) -> bool:
+            return not path.startswith(prefix)
+
+        return replace(
+            self,
+            staged=[p for p in self.staged if keep(p)],
+            unstaged=[p for p in self.unstaged if keep(p)],
+            untracked=[p for p in self.untracked if keep(p)],
+            conflicted=[p for p in self.conflicted if keep(p)],
+            renames={new: old for new, old in self.renames.items() if keep(new)},
+            numstat={p: counts for p, counts in self.numstat.items() if keep(p)},
+        )
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['numstat'] = {path: list(counts) for path, counts in self.numstat.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'GitSnapshot':
+        data = dict(data)
+        data['numstat'] = {path: tuple(counts) for path, counts in data.get('numstat', {}).items()}
+        return cls(**data)
+
+
+def _run_git(root: Path, args: List[str]) -> Optional[bytes]:
+    """Run a git command and return raw stdout, or None on failure."""
+    # Imported here so fresh-cache readers never pay for subprocess
+    import subprocess
+    try:
+        with profiling.span(f'git {args[0]}', 'subprocess', argv=['git', *args]):
+            result = subprocess.run(['git', *args], capture_output=True, cwd=root)
+    except OSError:
+        return None
+    profiling.record_read(len(result.stdout))
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+async def _run_git_async(root: Path, args: List[str]) -> Optional[bytes]:
+    """`_run_git` as an asyncio subprocess; the process is killed if the caller is cancelled."""
+    import asyncio
+    import subprocess
+    with profiling.span(f'git {args[0]}', 'subprocess', argv=['git', *args]):
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                'git', *args, cwd=root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError:
+            return None
+        try:
+            stdout, _ = await proc.communicate()
+        except asyncio.CancelledError:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+    profiling.record_read(len(stdout))
+    if proc.returncode != 0:
+        return None
+    return stdout
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode('utf-8', errors='surrogateescape')
+
+
+def parse_porcelain_v2(raw: bytes) -> GitSnapshot:
+    """Parse `git status --porcelain=v2 -z --branch` output."""
+    snapshot = GitSnapshot()
+    entries = raw.split(b'\0')
+    i = 0
+    while i < len(entries):
+        entry = _decode(entries[i])
+        i += 1
+        if not entry:
+            continue
+
+        if entry.startswith('# '):
+            key, _, value = entry[2:].partition(' ')
+            if key == 'branch.oid':
+                snapshot.head = None if value == '(initial)' else value
+            elif key == 'branch.head':
+                snapshot.branch = 'detached' if value == '(detached)' else value
+            elif key == 'branch.upstream':
+                snapshot.upstream = value
+            elif key == 'branch.ab':
+                ahead, _, behind = value.partition(' ')
+                snapshot.ahead = int(ahead.lstrip('+') or 0)
+                snapshot.behind = int(behind.lstrip('-') or 0)
+            continue
+
+        kind = entry[0]
+        if kind == '?':
+            snapshot.untracked.append(entry[2:])
+        elif kind in ('1', '2'):
+            # Ordinary (1) entries have 8 fields before the path, renames (2) have 9
+            parts = entry.split(' ', 8 if kind == '1' else 9)
+            xy, path = parts[1], parts[-1]
+            if kind == '2':
+                # With -z the original path is the next NUL-separated entry
+                snapshot.renames[path] = _decode(entries[i])
+                i += 1
+            if xy[0] != '.':
+                snapshot.staged.append(path)
+            if xy[1] != '.':
+                snapshot.unstaged.append(path)
+        elif kind == 'u':
+            snapshot.conflicted.append(entry.split(' ', 10)[-1])
+
+    return snapshot
+
+
+def parse_numstat(raw: bytes) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+    """Parse `git diff --numstat -z` output into {path: (insertions, deletions)}."""
+    stats: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+    entries = raw.split(b'\0')
+    i = 0
+    while i < len(entries):
+        entry = _decode(entries[i])
+        i += 1
+        if not entry:
+            continue
+        added, deleted, path = entry.split('\t', 2)
+        if not path:
+            # Renames are emitted as "added\tdeleted\t\0old\0new"
+            path = _decode(entries[i + 1])
+            i += 2
+        # Binary files report "-" for both counts
+        stats[path] = (
+            int(added) if added != '-' else None,
+            int(deleted) if deleted != '-' else None,
+        )
+    return stats
+
+
+def take_snapshot(root: Path) -> GitSnapshot:
+    """Collect a fresh snapshot from git, bypassing the cache."""
+    raw = _run_git(root, ['status', '--porcelain=v2', '-z', '--branch', '--untracked-files=all'])
+    if raw is None:
+        return GitSnapshot(is_repo=False)
+
+    snapshot = parse_porcelain_v2(raw)
+    if snapshot.staged or snapshot.unstaged:
+        base = snapshot.head or EMPTY_TREE
+        diff = _run_git(root, ['diff', base, '--numstat', '-z', '-M'])
+        if diff is not None:
+            snapshot.numstat = parse_numstat(diff)
+    return snapshot
+
+
+async def take_snapshot_async(root: Path) -> GitSnapshot:
+    """`take_snapshot` with the status and numstat calls running side by side.
+
+    The diff against HEAD is started speculatively and dropped when the tree
+    turns out to be clean; before the first commit it is re-run against the
+    empty tree.
+    """
+    import asyncio
+    status = asyncio.ensure_future(_run_git_async(
+        root, ['status', '--porcelain=v2', '-z', '--branch', '--untracked-files=all']))
+    diff = asyncio.ensure_future(_run_git_async(root, ['diff', 'HEAD', '--numstat', '-z', '-M']))
+    try:
+        raw = await status
+        if raw is None:
+            return GitSnapshot(is_repo=False)
+        snapshot = parse_porcelain_v2(raw)
+        if snapshot.staged or snapshot.unstaged:
+            numstat = await diff
+            if snapshot.head is None:
+                numstat = await _run_git_async(root, ['diff', EMPTY_TREE, '--numstat', '-z', '-M'])
+            if numstat is not None:
+                snapshot.numstat = parse_numstat(numstat)
+        return snapshot
+    finally:
+        if not diff.done():
+            diff.cancel()
+            await asyncio.gather(diff, return_exceptions=True)
+
+
+def capture_worktree(root: Path) -> Optional[str]:
+    """Commit id recording the tracked working tree without touching it.
+
+    Uses `git stash create` (a dangling commit, nothing is stashed) when there
+    are local changes and HEAD otherwise; None outside a repo or before the
+    first commit.
+    """
+    raw = _run_git(root, ['stash', 'create'])
+    if raw is None:
+        return None
+    commit = raw.decode().strip()
+    if commit:
+        return commit
+    head = _run_git(root, ['rev-parse', '--verify', '-q', 'HEAD'])
+    return head.decode().strip() if head else None
+
+
+def diff_since(root: Path, rev: str) -> Optional[Dict[str, Tuple[Optional[int], Optional[int]]]]:
+    """Insertions/deletions per tracked file between `rev` and the working tree."""
+    raw = _run_git(root, ['diff', rev, '--numstat', '-z', '-M'])
+    return None if raw is None else parse_numstat(raw)
+
+
+def tracked_names(root: Path, directory: Path) -> Set[str]:
+    """File names under `directory` that git tracks (none outside a repo)."""
+    raw = _run_git(root, ['ls-files', '-z', '--', str(directory)])
+    if not raw:
+        return set()
+    return {Path(_decode(path)).name for path in raw.split(b'\0') if path}
+
+
+def _git_dir(root: Path) -> Optional[Path]:
+    """Locate the git directory without spawning git (handles worktree files)."""
+    dot_git = root / '.git'
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        content = dot_git.read_text().strip()
+        if content.startswith('gitdir:'):
+            git_dir = Path(content[len('gitdir:'):].strip())
+            return git_dir if git_dir.is_absolute() else (root / git_dir).resolve()
+    return None
+
+
+def _stat_key(path: Path) -> Optional[List[int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _cache_key(root: Path, git_dir: Path, dirty_paths: List[str]) -> Dict:
+    """Stat-only fingerprint of the inputs git status depends on."""
+    key = {
+        'index': _stat_key(git_dir / 'index'),
+        'head': _stat_key(git_dir / 'HEAD'),
+    }
+    try:
+        head_ref = (git_dir / 'HEAD').read_text().strip()
+    except OSError:
+        head_ref = ''
+    if head_ref.startswith('ref:'):
+        ref = head_ref[len('ref:'):].strip()
+        key['ref'] = _stat_key(git_dir / ref) or _stat_key(git_dir / 'packed-refs')
+    key['dirty'] = {path: _stat_key(root / path) for path in dirty_paths}
+    return key
+
+
+def _cached_snapshot(root: Path, git_dir: Path, cache_file: Path, max_age: float) -> Optional[GitSnapshot]:
+    """The cached snapshot if it is recent and its stat key still matches."""
+    # Long-running processes (the agent daemon) skip re-reading the cache file
+    cached = _memo.get(cache_file)
+    if cached is None:
+        try:
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+            profiling.record_file_read(cache_file)
+        except (OSError, ValueError):
+            cached = None
+
+    if (cached and cached.get('version') == CACHE_VERSION
+            and time.time() - cached.get('created', 0) < max_age):
+        snapshot = GitSnapshot.from_dict(cached['snapshot'])
+        if cached.get('key') == _cache_key(root, git_dir, snapshot.modified_files()):
+            return snapshot
+    return None
+
+
+def _store_snapshot(root: Path, git_dir: Path, cache_file: Path, snapshot: GitSnapshot) -> None:
+    # Stat after git ran, since `git status` may refresh the index itself
+    payload = {
+        'version': CACHE_VERSION,
+        'created': time.time(),
+        'key': _cache_key(root, git_dir, snapshot.modified_files()),
+        'snapshot': snapshot.to_dict(),
+    }
+    _memo[cache_file] = payload
+    try:
+        atomic_write_text(cache_file, json.dumps(payload))
+    except OSError:
+        pass
+
+
+def load_git_snapshot(root: Path, cache_dir: Optional[Path] = None,
+                      max_age: float = DEFAULT_MAX_AGE) -> GitSnapshot:
+    """Return a git snapshot, reusing the cached one when the tree is unchanged.
+
+    The cache is keyed on the stat of .git/index, HEAD and the current ref,
+    plus the paths that were dirty last time. Edits to clean tracked files
+    are not visible to that key, so cached entries also expire after
+    `max_age` seconds (0 disables caching).
+    """
+    git_dir = _git_dir(root)
+    if cache_dir is None or git_dir is None or max_age <= 0:
+        return take_snapshot(root)
+
+    cache_file = cache_dir / 'git-snapshot.json'
+    snapshot = _cached_snapshot(root, git_dir, cache_file, max_age)
+    if snapshot is None:
+        snapshot = take_snapshot(root)
+        _store_snapshot(root, git_dir, cache_file, snapshot)
+    return snapshot
+
+
+async def load_git_snapshot_async(root: Path, cache_dir: Optional[Path] = None,
+                                  max_age: float = DEFAULT_MAX_AGE) -> GitSnapshot:
+    """`load_git_snapshot` for asyncio callers; same cache."""
+    git_dir = _git_dir(root)
+    if cache_dir is None or git_dir is None or max_age <= 0:
+        return await take_snapshot_async(root)
+
+    cache_file = cache_dir / 'git-snapshot.json'
+    snapshot = _cached_snapshot(root, git_dir, cache_file, max_age)
+    if snapshot is None:
+        snapshot = await take_snapshot_async(root)
+        _store_snapshot(root, git_dir, cache_file, snapshot)
+    return snapshot
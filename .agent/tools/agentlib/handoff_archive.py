@@ -0,0 +1,269 @@
+"""
+Compressed archive segments for old handoff reports.
+
+Handoff reports repeat large fixed blocks (technical context, instructions,
+checklists), so `compact()` packs reports older than a cut-off into one
+segment file per run under .agent/history/archive/. Every report in a segment
+is deflated on its own against a preset dictionary trained on the reports
+being packed (the lines most of them share), which lets a single report be
+read back without touching the others. An index at the end of the segment
+records the offset, lengths and original mtime of each report; a reader
+mmaps the segment, loads the index once and inflates just the report asked for.
+
+`HandoffStore` reads loose reports and archived ones through one API; a loose
+file wins over an archived copy of the same name.
+
+Segment layout (little-endian):
+    header   <4sHHIQIQ  magic, version, reserved, count, dict offset, dict length, index offset
+    dict     preset dictionary bytes
+    blobs    raw-deflate streams
+    index    count x <QIIqII  blob offset, compressed length, length, mtime_ns, name offset, name length
+    names    UTF-8 names, concatenated
+"""
+
+import mmap
+import os
+import re
+import struct
+import zlib
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import profiling
+from .fsutil import atomic_writer, fsync_dir, state_lock
+
+MAGIC = b'AGHA'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQIQ')
+ENTRY = struct.Struct('<QIIqII')
+# zlib only looks back 32 KiB, so a larger dictionary would never be used
+DICT_SIZE = 32 * 1024
+SEGMENT_SUFFIX = '.seg'
+HANDOFF_NAME = re.compile(r'^handoff-(.+)\.md$')
+
+
+class StoredReport(NamedTuple):
+    name: str
+    mtime_ns: int
+    size: int
+    source: str  # 'loose' or the segment file name
+
+
+def train_dictionary(samples: List[bytes], size: int = DICT_SIZE) -> bytes:
+    """A preset dictionary of the lines shared by more than one sample."""
+    counts: Counter = Counter()
+    for sample in samples:
+        counts.update(set(sample.splitlines(keepends=True)))
+    common = [line for line, seen in counts.items() if seen > 1 and line.strip()]
+    # Keep the lines saving the most bytes overall
+    common.sort(key=lambda line: counts[line] * len(line), reverse=True)
+    chosen, total = [], 0
+    for line in common:
+        if total + len(line) > size:
+            continue
+        chosen.append(line)
+        total += len(line)
+    # Most valuable last: deflate matches at short distances cost fewer bits
+    return b''.join(reversed(chosen))
+
+
+def write_segment(path: Path, reports: List[Tuple[str, bytes, int]]) -> Dict[str, int]:
+    """Write (name, content, mtime_ns) reports to a new segment; returns byte counts."""
+    reports = sorted(reports)
+    dictionary = train_dictionary([content for _, content, _ in reports])
+    blobs, entries, names = [], [], []
+    offset = HEADER.size + len(dictionary)
+    name_offset = 0
+    for name, content, mtime_ns in reports:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=dictionary)
+        blob = compressor.compress(content) + compressor.flush()
+        encoded = name.encode('utf-8')
+        entries.append(ENTRY.pack(offset, len(blob), len(content), mtime_ns, name_offset, len(encoded)))
+        blobs.append(blob)
+        names.append(encoded)
+        offset += len(blob)
+        name_offset += len(encoded)
+
+    header = HEADER.pack(MAGIC, VERSION, 0, len(reports), HEADER.size, len(dictionary), offset)
+    with atomic_writer(path, binary=True) as f:
+        for chunk in (header, dictionary, *blobs, *entries, *names):
+            f.write(chunk)
+        written = f.tell()
+    return {'reports': len(reports), 'original': sum(len(content) for _, content, _ in reports),
+            'archived': written}
+
+
+class ArchiveSegment:
+    """A memory-mapped segment; reads inflate only the requested report."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, dict_offset, dict_length, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path.name} is not a version {VERSION} handoff archive")
+        self._dictionary = self._map[dict_offset:dict_offset + dict_length]
+        names_offset = index_offset + count * ENTRY.size
+        self._entries: Dict[str, Tuple[int, int, int, int]] = {}
+        for blob_offset, blob_length, size, mtime_ns, name_offset, name_length in ENTRY.iter_unpack(
+                self._map[index_offset:names_offset]):
+            start = names_offset + name_offset
+            name = self._map[start:start + name_length].decode('utf-8')
+            self._entries[name] = (blob_offset, blob_length, size, mtime_ns)
+
+    def __enter__(self) -> 'ArchiveSegment':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def reports(self) -> Iterator[StoredReport]:
+        for name, (_, _, size, mtime_ns) in self._entries.items():
+            yield StoredReport(name, mtime_ns, size, self.path.name)
+
+    def read(self, name: str) -> bytes:
+        """The original bytes of one archived report (KeyError if absent)."""
+        offset, length, size, _ = self._entries[name]
+        decompressor = zlib.decompressobj(-15, zdict=self._dictionary)
+        with profiling.span('inflate handoff'):
+            data = decompressor.decompress(self._map[offset:offset + length]) + decompressor.flush()
+        profiling.record_read(length)
+        if len(data) != size:
+            raise ValueError(f"{self.path.name}: {name} is damaged")
+        return data
+
+
+def report_time(name: str, mtime_ns: int) -> float:
+    """When a report was written: its session id, else its mtime (checkouts reset mtimes)."""
+    match = HANDOFF_NAME.match(name)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+        except ValueError:
+            pass
+    return mtime_ns / 1e9
+
+
+class HandoffStore:
+    """Loose handoff reports plus the archive segments, read through one interface."""
+
+    def __init__(self, handoffs_dir: Path, archive_dir: Path):
+        self.handoffs_dir = handoffs_dir
+        self.archive_dir = archive_dir
+        self._segments: Optional[List[ArchiveSegment]] = None
+
+    def __enter__(self) -> 'HandoffStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for segment in self._segments or []:
+            segment.close()
+        self._segments = None
+
+    def segments(self) -> List[ArchiveSegment]:
+        if self._segments is None:
+            try:
+                paths = sorted(self.archive_dir.glob(f'*{SEGMENT_SUFFIX}'))
+            except OSError:
+                paths = []
+            self._segments = [ArchiveSegment(path) for path in paths]
+        return self._segments
+
+    def _loose(self) -> Iterator[os.DirEntry]:
+        try:
+            entries = list(os.scandir(self.handoffs_dir))
+        except OSError:
+            return
+        for entry in entries:
+            if HANDOFF_NAME.match(entry.name) and entry.is_file():
+                yield entry
+
+    def reports(self) -> Iterator[StoredReport]:
+        """Every report, loose or archived, once each."""
+        seen = set()
+        for entry in self._loose():
+            st = entry.stat()
+            seen.add(entry.name)
+            yield StoredReport(entry.name, st.st_mtime_ns, st.st_size, 'loose')
+        for segment in self.segments():
+            for report in segment.reports():
+                if report.name not in seen:
+                    seen.add(report.name)
+                    yield report
+
+    def read(self, name: str) -> bytes:
+        """Content of a report by file name, wherever it is stored."""
+        path = self.handoffs_dir / name
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            for segment in self.segments():
+                if name in segment:
+                    return segment.read(name)
+            raise FileNotFoundError(f"No handoff named {name}")
+        profiling.record_read(len(data))
+        return data
+
+    def compact(self, older_than_days: float, now: Optional[float] = None,
+                keep: Collection[str] = ()) -> Dict[str, Any]:
+        """Pack loose reports older than the cut-off into a new segment and delete them.
+
+        Reports named in `keep` (e.g. ones git tracks) stay loose and are
+        counted as skipped. Runs under an exclusive lock on the archive
+        directory. New reports are never old enough to be packed, so handoff
+        generation can go on meanwhile.
+        """
+        cutoff = (now if now is not None else datetime.now().timestamp()) - older_than_days * 86400
+        with state_lock(self.archive_dir, exclusive=True):
+            old = []
+            skipped = 0
+            for entry in self._loose():
+                st = entry.stat()
+                if report_time(entry.name, st.st_mtime_ns) < cutoff:
+                    if entry.name in keep:
+                        skipped += 1
+                    else:
+                        old.append((entry.name, Path(entry.path), st.st_mtime_ns))
+            if not old:
+                return {'reports': 0, 'original': 0, 'archived': 0, 'segment': None, 'skipped': skipped}
+
+            reports = []
+            for name, path, mtime_ns in old:
+                data = path.read_bytes()
+                profiling.record_read(len(data))
+                reports.append((name, data, mtime_ns))
+            names = sorted(name for name, _, _ in old)
+            first, last = (HANDOFF_NAME.match(name).group(1) for name in (names[0], names[-1]))
+            segment_path = self.archive_dir / f'handoffs-{first}-{last}{SEGMENT_SUFFIX}'
+            counter = 1
+            while segment_path.exists():
+                counter += 1
+                segment_path = self.archive_dir / f'handoffs-{first}-{last}-{counter}{SEGMENT_SUFFIX}'
+
+            with profiling.span('write archive segment'):
+                counts: Dict[str, Any] = write_segment(segment_path, reports)
+            # Only drop the loose files once the segment is durable and reads back
+            self.close()
+            with ArchiveSegment(segment_path) as segment:
+                for name, data, _ in reports:
+                    if segment.read(name) != data:
+                        raise ValueError(f"{segment_path.name}: {name} did not round-trip")
+            for _, path, _ in old:
+                path.unlink()
+            fsync_dir(self.handoffs_dir)
+        counts['segment'] = segment_path.name
+        counts['skipped'] = skipped
+        return counts
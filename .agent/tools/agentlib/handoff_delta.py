@@ -0,0 +1,142 @@
+"""
+"Since last handoff" deltas.
+
+After every handoff a compact baseline is stored: leaf component scores,
+task statuses, and the git working tree captured as a commit id (see
+`capture_worktree`) plus the stat of untracked files. A delta report then
+lists only components whose score changed, tasks whose status changed and
+files changed since that baseline, with per-file insertions and deletions.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .components import ComponentTree
+from .fsutil import atomic_write_text
+from .git_snapshot import GitSnapshot, capture_worktree, diff_since
+from .task_store import TaskStore
+
+BASELINE_VERSION = 1
+# Untracked files larger than this are listed without a line count
+MAX_COUNTED_BYTES = 1024 * 1024
+
+
+class FileChange(NamedTuple):
+    path: str
+    insertions: Optional[int]
+    deletions: Optional[int]
+    status: str  # modified, new, changed (untracked), removed
+
+
+def _untracked_stats(root: Path, snapshot: GitSnapshot) -> Dict[str, List[int]]:
+    stats = {}
+    for path in snapshot.untracked:
+        try:
+            st = os.stat(root / path)
+        except OSError:
+            continue
+        stats[path] = [st.st_mtime_ns, st.st_size]
+    return stats
+
+
+def build_baseline(root: Path, progress: Dict[str, Any], snapshot: GitSnapshot,
+                   session_id: str, handoff: str) -> Dict[str, Any]:
+    """Capture what the next delta report is compared against."""
+    components: ComponentTree = progress['components']
+    tasks: TaskStore = progress['tasks']
+    return {
+        'version': BASELINE_VERSION,
+        'session_id': session_id,
+        'handoff': handoff,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'overall_completion': progress.get('metrics', {}).get('overall_completion'),
+        'components': {node.path: node.score for _, node in components.walk() if node.is_leaf},
+        'tasks': {task: status for status, names in tasks.items() for task in names},
+        'git': {
+            'branch': snapshot.branch,
+            'head': snapshot.head,
+            'worktree': capture_worktree(root),
+            'untracked': _untracked_stats(root, snapshot),
+        },
+    }
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return baseline if baseline.get('version') == BASELINE_VERSION else None
+
+
+def save_baseline(path: Path, baseline: Dict[str, Any]) -> None:
+    atomic_write_text(path, json.dumps(baseline, separators=(',', ':')))
+
+
+def component_changes(baseline: Dict[str, Any],
+                      components: ComponentTree) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """(path, old score, new score) for changed, added (old None) and removed (new None) leaves."""
+    before = baseline.get('components', {})
+    after = {node.path: node.score for _, node in components.walk() if node.is_leaf}
+    changes = [(path, before.get(path), score) for path, score in after.items() if before.get(path) != score]
+    changes.extend((path, score, None) for path, score in before.items() if path not in after)
+    return changes
+
+
+def task_changes(baseline: Dict[str, Any], tasks: TaskStore) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """(task, old status, new status) for tasks that were added, moved or removed."""
+    before = baseline.get('tasks', {})
+    changes = []
+    for status, names in tasks.items():
+        for task in names:
+            if before.get(task) != status:
+                changes.append((task, before.get(task), status))
+    changes.extend((task, status, None) for task, status in before.items() if tasks.status_of(task) is None)
+    return changes
+
+
+def _count_lines(path: Path) -> Optional[int]:
+    try:
+        if path.stat().st_size > MAX_COUNTED_BYTES:
+            return None
+        return path.read_bytes().count(b'\n')
+    except OSError:
+        return None
+
+
+def file_changes(root: Path, baseline: Dict[str, Any], snapshot: GitSnapshot,
+                 exclude: Optional[str] = None) -> List[FileChange]:
+    """Files changed since the baseline, with insertions/deletions where git can tell.
+
+    Paths starting with `exclude` (e.g. the handoff history itself) are skipped.
+    """
+    git = baseline.get('git', {})
+    numstat = None
+    # Prefer the captured working tree; fall back to the baseline's HEAD
+    for rev in (git.get('worktree'), git.get('head')):
+        if rev:
+            numstat = diff_since(root, rev)
+            if numstat is not None:
+                break
+    if numstat is None:
+        numstat = {path: snapshot.numstat.get(path, (None, None))
+                   for path in snapshot.staged + snapshot.unstaged}
+
+    changes = {path: FileChange(path, added, deleted, 'modified') for path, (added, deleted) in numstat.items()}
+
+    before = git.get('untracked', {})
+    after = _untracked_stats(root, snapshot)
+    for path, stat in after.items():
+        if path not in before:
+            changes[path] = FileChange(path, _count_lines(root / path), 0, 'new')
+        elif before[path] != stat:
+            changes[path] = FileChange(path, None, None, 'changed')
+    for path in before:
+        if path not in after and path not in changes and not (root / path).exists():
+            changes[path] = FileChange(path, None, None, 'removed')
+
+    return sorted(change for path, change in changes.items() if not (exclude and path.startswith(exclude)))
@@ -0,0 +1,280 @@
+"""
+Searchable SQLite index over the handoff history (loose and archived reports).
+
+Each handoff report is parsed once into session id, date, branch, completion
+and its completed / in-progress items, and its text goes into an FTS5 table
+(plain LIKE matching when SQLite lacks FTS5). `sync()` re-reads only files
+whose mtime or size changed and re-parses only those whose content hash
+changed, so keeping the index current costs one directory scan. Archived
+reports keep the mtime and size they had as loose files, so archiving them
+does not re-index anything.
+
+The database lives in .agent/cache/ and can be deleted at any time; the next
+query rebuilds it.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from . import profiling
+from .handoff_archive import HANDOFF_NAME, HandoffStore, StoredReport
+
+SCHEMA_VERSION = 1
+
+_FIELD_PATTERNS = {
+    'session_id': re.compile(r'^\*\*Session\*\*:\s*(\S+)', re.MULTILINE),
+    'date': re.compile(r'^\*\*Date\*\*:\s*(.+)$', re.MULTILINE),
+    'branch': re.compile(r'^- Current:\s*`([^`]*)`', re.MULTILINE),
+    'completion': re.compile(r'^- \*\*Completion\*\*:\s*([\d.]+)%', re.MULTILINE),
+}
+_SECTIONS = {
+    'completed': ("### What I Completed", "✅"),
+    'in_progress': ("### What's In Progress", "🔄"),
+}
+
+
+class HistoryEntry(NamedTuple):
+    name: str
+    session_id: str
+    date: str
+    branch: Optional[str]
+    completion: Optional[float]
+    completed: List[str]
+    in_progress: List[str]
+    snippet: str
+
+
+def _section_items(text: str, heading: str, icon: str) -> List[str]:
+    start = text.find(heading)
+    if start < 0:
+        return []
+    items = []
+    for line in text[start + len(heading):].splitlines():
+        if line.startswith('#'):
+            break
+        line = line.strip()
+        if line.startswith('- '):
+            items.append(line[2:].replace(icon, '', 1).strip())
+    return items
+
+
+def _session_datetime(session_id: str) -> Optional[str]:
+    try:
+        return datetime.strptime(session_id, '%Y%m%d_%H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+
+
+def parse_handoff(name: str, text: str) -> Dict[str, Any]:
+    """Extract the indexed fields from a rendered handoff report."""
+    fields: Dict[str, Any] = {}
+    for field, pattern in _FIELD_PATTERNS.items():
+        match = pattern.search(text)
+        fields[field] = match.group(1).strip() if match else None
+
+    file_match = HANDOFF_NAME.match(name)
+    session_id = fields['session_id'] or (file_match.group(1) if file_match else name)
+    completion = fields['completion']
+    return {
+        'session_id': session_id,
+        # Session ids carry the time of day; the Date line only the day
+        'date': _session_datetime(session_id) or fields['date'] or '',
+        'branch': fields['branch'],
+        'completion': float(completion) if completion else None,
+        **{key: _section_items(text, heading, icon) for key, (heading, icon) in _SECTIONS.items()},
+    }
+
+
+def parse_since(value: str, now: Optional[datetime] = None) -> str:
+    """Turn '30d', '12h', '2w' or a YYYY-MM-DD date into a comparable date string."""
+    now = now or datetime.now()
+    match = re.fullmatch(r'(\d+)([hdw])', value.strip())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = {'h': timedelta(hours=amount), 'd': timedelta(days=amount), 'w': timedelta(weeks=amount)}[unit]
+        return (now - delta).strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise ValueError(f"Invalid --since value: {value} (use e.g. 30d, 12h, 2w or YYYY-MM-DD)")
+
+
+def _fts_query(terms: List[str]) -> str:
+    # Quote every term so user input is never parsed as FTS syntax
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class HistoryIndex:
+    """SQLite index of the reports in a handoff store."""
+
+    def __init__(self, db_path: Path, store: HandoffStore):
+        self.db_path = db_path
+        self.store = store
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), timeout=10)
+        self.fts = self._ensure_schema()
+
+    def __enter__(self) -> 'HistoryIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+        self.store.close()
+
+    def _ensure_schema(self) -> bool:
+        conn = self.conn
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != SCHEMA_VERSION:
+            with conn:
+                conn.execute('DROP TABLE IF EXISTS handoffs')
+                conn.execute('DROP TABLE IF EXISTS handoffs_text')
+                conn.execute('DROP TABLE IF EXISTS handoffs_fts')
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS handoffs (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                session_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                branch TEXT,
+                completion REAL,
+                completed TEXT NOT NULL,
+                in_progress TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS handoffs_date ON handoffs (date)')
+            conn.execute('CREATE INDEX IF NOT EXISTS handoffs_branch_date ON handoffs (branch, date)')
+            try:
+                conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS handoffs_fts '
+                             'USING fts5(body, completed, in_progress)')
+                fts = True
+            except sqlite3.OperationalError:
+                conn.execute('CREATE TABLE IF NOT EXISTS handoffs_text ('
+                             'rowid INTEGER PRIMARY KEY, body TEXT, completed TEXT, in_progress TEXT)')
+                fts = False
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        return fts
+
+    @property
+    def _text_table(self) -> str:
+        return 'handoffs_fts' if self.fts else 'handoffs_text'
+
+    def _upsert(self, name: str, data: bytes, mtime_ns: int, size: int, sha: str) -> None:
+        text = data.decode('utf-8', errors='replace')
+        fields = parse_handoff(name, text)
+        conn = self.conn
+        row = conn.execute('SELECT id FROM handoffs WHERE name = ?', (name,)).fetchone()
+        values = (fields['session_id'], fields['date'], fields['branch'], fields['completion'],
+                  json.dumps(fields['completed']), json.dumps(fields['in_progress']),
+                  mtime_ns, size, sha)
+        if row is None:
+            rowid = conn.execute(
+                'INSERT INTO handoffs (session_id, date, branch, completion, completed, in_progress, '
+                'mtime_ns, size, sha256, name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (*values, name)).lastrowid
+        else:
+            rowid = row[0]
+            conn.execute(
+                'UPDATE handoffs SET session_id = ?, date = ?, branch = ?, completion = ?, completed = ?, '
+                'in_progress = ?, mtime_ns = ?, size = ?, sha256 = ? WHERE id = ?', (*values, rowid))
+            conn.execute(f'DELETE FROM {self._text_table} WHERE rowid = ?', (rowid,))
+        conn.execute(f'INSERT INTO {self._text_table} (rowid, body, completed, in_progress) VALUES (?, ?, ?, ?)',
+                     (rowid, text, '\n'.join(fields['completed']), '\n'.join(fields['in_progress'])))
+
+    def _index_report(self, report: StoredReport, known: Optional[Tuple[int, int, str]],
+                      data: Optional[bytes] = None) -> bool:
+        """Index `report` unless its stat or hash matches `known`; returns True if re-parsed."""
+        if known is not None and known[0] == report.mtime_ns and known[1] == report.size:
+            return False
+        if data is None:
+            data = self.store.read(report.name)
+        sha = hashlib.sha256(data).hexdigest()
+        if known is not None and known[2] == sha:
+            # Touched but unchanged: remember the new stat, skip parsing
+            self.conn.execute('UPDATE handoffs SET mtime_ns = ?, size = ? WHERE name = ?',
+                              (report.mtime_ns, report.size, report.name))
+            return False
+        self._upsert(report.name, data, report.mtime_ns, report.size, sha)
+        return True
+
+    def add(self, path: Path) -> bool:
+        """Index (or re-index) a single loose report, e.g. right after it was written."""
+        with profiling.span('index handoff'), self.conn:
+            row = self.conn.execute('SELECT mtime_ns, size, sha256 FROM handoffs WHERE name = ?',
+                                    (path.name,)).fetchone()
+            data = path.read_bytes()
+            profiling.record_read(len(data))
+            st = path.stat()
+            return self._index_report(StoredReport(path.name, st.st_mtime_ns, st.st_size, 'loose'), row, data)
+
+    def sync(self) -> Dict[str, int]:
+        """Bring the index in line with the store; returns change counts."""
+        with profiling.span('sync history index'), self.conn:
+            known = {name: (mtime_ns, size, sha) for name, mtime_ns, size, sha in
+                     self.conn.execute('SELECT name, mtime_ns, size, sha256 FROM handoffs')}
+            counts = {'indexed': 0, 'removed': 0}
+            seen = set()
+            for report in self.store.reports():
+                seen.add(report.name)
+                if self._index_report(report, known.get(report.name)):
+                    counts['indexed'] += 1
+
+            for name in known.keys() - seen:
+                rowid = self.conn.execute('SELECT id FROM handoffs WHERE name = ?', (name,)).fetchone()[0]
+                self.conn.execute(f'DELETE FROM {self._text_table} WHERE rowid = ?', (rowid,))
+                self.conn.execute('DELETE FROM handoffs WHERE id = ?', (rowid,))
+                counts['removed'] += 1
+        return counts
+
+    def rebuild(self) -> Dict[str, int]:
+        """Drop everything and index the directory from scratch."""
+        with self.conn:
+            self.conn.execute(f'DELETE FROM {self._text_table}')
+            self.conn.execute('DELETE FROM handoffs')
+        return self.sync()
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM handoffs').fetchone()[0]
+
+    def search(self, terms: Optional[List[str]] = None, branch: Optional[str] = None,
+               since: Optional[str] = None, limit: int = 20) -> List[HistoryEntry]:
+        """Newest-first reports matching all `terms`, optionally on `branch` / since a date."""
+        where, params = [], []
+        if branch:
+            where.append('h.branch = ?')
+            params.append(branch)
+        if since:
+            where.append('h.date >= ?')
+            params.append(since)
+
+        columns = 'h.name, h.session_id, h.date, h.branch, h.completion, h.completed, h.in_progress'
+        if terms and self.fts:
+            sql = (f"SELECT {columns}, snippet(handoffs_fts, 0, '[', ']', '…', 10) "
+                   'FROM handoffs_fts JOIN handoffs h ON h.id = handoffs_fts.rowid '
+                   'WHERE handoffs_fts MATCH ?')
+            params.insert(0, _fts_query(terms))
+        elif terms:
+            sql = f"SELECT {columns}, '' FROM handoffs_text t JOIN handoffs h ON h.id = t.rowid WHERE 1"
+            for term in terms:
+                where.append('t.body LIKE ?')
+                params.append(f'%{term}%')
+        else:
+            sql = f"SELECT {columns}, '' FROM handoffs h WHERE 1"
+
+        sql += ''.join(f' AND {clause}' for clause in where)
+        sql += ' ORDER BY h.date DESC, h.session_id DESC LIMIT ?'
+        params.append(limit)
+
+        with profiling.span('query history index'):
+            rows = self.conn.execute(sql, params).fetchall()
+        return [HistoryEntry(name, session_id, date, row_branch, completion,
+                             json.loads(completed), json.loads(in_progress), snippet)
+                for name, session_id, date, row_branch, completion, completed, in_progress, snippet in rows]
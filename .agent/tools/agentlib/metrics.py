@@ -0,0 +1,265 @@
+"""
+Prometheus / OpenMetrics export of project progress.
+
+`MetricsExporter` renders overall and per-category completion, component
+scores, task counts, blockers and handoff history for Prometheus. The payload
+is written to a textfile for node-exporter's textfile collector and can also
+be served over HTTP. It is cached under the stat of its inputs: progress.json,
+its journal, blockers.md and the handoff and archive directories (whose mtimes
+change when a report is added, archived or removed). A scrape or repeat
+export costs a handful of stats; the payload is only rebuilt after one of
+those changes. The textfile's key is kept in a sidecar file, so one-shot runs
+skip unchanged exports too.
+
+Two formats are rendered from the same samples. `prometheus` is the classic
+text format that node-exporter's textfile collector parses. `openmetrics`
+adds unit metadata, an info-typed family and the `# EOF` terminator. HTTP
+scrapes get whichever one their Accept header asks for.
+
+Handoff frequency is exported as a counter, so Prometheus derives rates
+(`rate(agent_handoffs_total[7d])`), plus the median gap between recent
+reports. Nothing depends on the current time, which keeps the cache exact.
+"""
+
+import json
+import statistics
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .doc_cache import stat_key
+from .fsutil import atomic_write_text
+from .handoff_archive import HandoffStore, report_time
+from .progress_store import ProgressJournal
+
+METRICS_VERSION = 1
+CONTENT_TYPES = {
+    'prometheus': 'text/plain; version=0.0.4; charset=utf-8',
+    'openmetrics': 'application/openmetrics-text; version=1.0.0; charset=utf-8',
+}
+FORMATS = tuple(CONTENT_TYPES)
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9479
+# Handoffs used for the median interval between reports
+INTERVAL_WINDOW = 10
+
+# (name suffix, labels, value)
+Sample = Tuple[str, Dict[str, Any], Any]
+
+
+class Family(NamedTuple):
+    name: str
+    kind: str  # 'gauge', 'counter' or 'info'
+    help: str
+    samples: List[Sample]
+    unit: Optional[str] = None
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _value(value: Any) -> str:
+    return str(value) if type(value) is int else repr(float(value))
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _timestamp(text: Any) -> Optional[float]:
+    # metadata.last_updated is local time despite its "Z" (see progress_store.timestamp)
+    try:
+        return datetime.fromisoformat(str(text).rstrip('Z')).timestamp()
+    except ValueError:
+        return None
+
+
+def handoff_times(store: HandoffStore) -> List[float]:
+    """When each loose or archived report was written, oldest first."""
+    return sorted(report_time(report.name, report.mtime_ns) for report in store.reports())
+
+
+def collect_families(progress: Dict[str, Any], handoffs: List[float]) -> List[Family]:
+    """Every metric for a progress document and its handoff times."""
+    metrics, tasks, components = progress['metrics'], progress['tasks'], progress['components']
+    metadata = progress.get('metadata', {})
+    families = [
+        Family('agent', 'info', 'Project phase and health.', [
+            ('_info', {'project': metadata.get('project', ''), 'phase': metrics['phase'],
+                       'health': metrics['health']}, 1)]),
+        Family('agent_overall_completion_percent', 'gauge', 'Weighted completion of all components.',
+               [('', {}, metrics['overall_completion'])]),
+        Family('agent_category_completion_percent', 'gauge', 'Weighted completion per category.',
+               [('', {'category': category.name}, round(category.completion, 1))
+                for category in components.categories()]),
+        Family('agent_component_score_percent', 'gauge', 'Score of each component, by dotted path.',
+               [('', {'component': node.path}, node.score) for _, node in components.walk() if node.is_leaf]),
+        Family('agent_tasks', 'gauge', 'Tasks per status.',
+               [('', {'status': status}, len(tasks.get(status, []))) for status in tasks]),
+    ]
+    if getattr(tasks, 'is_planned', lambda: False)():
+        families.append(Family('agent_tasks_blocked', 'gauge', 'Pending tasks waiting on unfinished prerequisites.',
+                               [('', {}, len(tasks.graph.blocked()))]))
+    families.append(Family('agent_blockers', 'gauge', 'Active blockers.', [('', {}, len(metrics['blockers']))]))
+
+    updated = _timestamp(metadata.get('last_updated'))
+    if updated is not None:
+        families.append(Family('agent_progress_updated_timestamp_seconds', 'gauge',
+                               'When progress.json last changed.', [('', {}, updated)], 'seconds'))
+    families.append(Family('agent_handoffs', 'counter', 'Handoff reports written, loose and archived.',
+                           [('_total', {}, len(handoffs))]))
+    if handoffs:
+        families.append(Family('agent_last_handoff_timestamp_seconds', 'gauge',
+                               'When the newest handoff was written.', [('', {}, handoffs[-1])], 'seconds'))
+    recent = handoffs[-INTERVAL_WINDOW:]
+    if len(recent) > 1:
+        gaps = [later - earlier for earlier, later in zip(recent, recent[1:])]
+        families.append(Family('agent_handoff_interval_seconds', 'gauge',
+                               f'Median time between the last {len(recent)} handoffs.',
+                               [('', {}, statistics.median(gaps))], 'seconds'))
+    return families
+
+
+def render_metrics(families: List[Family], fmt: str = 'openmetrics') -> str:
+    """The exposition text of `families` in one of FORMATS."""
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"Unknown metrics format: {fmt} (expected one of {', '.join(FORMATS)})")
+    openmetrics = fmt == 'openmetrics'
+    parts = []
+    for family in families:
+        name, kind = family.name, family.kind
+        if not openmetrics and kind != 'gauge':
+            # The classic format names families after their samples and has no info type
+            name += family.samples[0][0]
+            kind = 'gauge' if kind == 'info' else kind
+        parts.append(f'# TYPE {name} {kind}\n')
+        if openmetrics and family.unit:
+            parts.append(f'# UNIT {name} {family.unit}\n')
+        parts.append(f'# HELP {name} {family.help}\n')
+        for suffix, labels, value in family.samples:
+            parts.append(f'{family.name}{suffix}{_labels(labels)} {_value(value)}\n')
+    if openmetrics:
+        parts.append('# EOF\n')
+    return ''.join(parts)
+
+
+class MetricsExporter:
+    """Keeps the rendered metrics for a project, rebuilding them only when their inputs change."""
+
+    def __init__(self, root: Path, output: Path, load_progress: Callable[[], Dict[str, Any]],
+                 fmt: str = 'prometheus'):
+        if fmt not in CONTENT_TYPES:
+            raise ValueError(f"Unknown metrics format: {fmt} (expected one of {', '.join(FORMATS)})")
+        self.output = output
+        self.fmt = fmt
+        self.sidecar = output.with_name(output.name + '.json')
+        self.load_progress = load_progress
+        current = root / '.agent' / 'current'
+        history = root / '.agent' / 'history'
+        journal = ProgressJournal(current / 'progress.json')
+        self.store = HandoffStore(history / 'handoffs', history / 'archive')
+        self.inputs = [journal.snapshot_file, journal.journal_file, current / 'blockers.md',
+                       self.store.handoffs_dir, self.store.archive_dir]
+        self.renders = 0
+        self._key: Optional[List[Any]] = None
+        self._payloads: Dict[str, bytes] = {}
+
+    def key(self) -> List[Any]:
+        entries = [list(entry) if entry else None for entry in stat_key(self.inputs)]
+        return [METRICS_VERSION, self.fmt, str(self.output), entries]
+
+    def _stored_key(self) -> Optional[List[Any]]:
+        try:
+            with open(self.sidecar, 'r') as f:
+                return json.load(f).get('key')
+        except (OSError, ValueError):
+            return None
+
+    def refresh(self, fmt: Optional[str] = None) -> bool:
+        """Bring the textfile (and the `fmt` payload) up to date. Returns True if they were rebuilt."""
+        fmt = fmt or self.fmt
+        key = self.key()
+        if key == self._key and fmt in self._payloads:
+            return False
+        if self._key is None and fmt == self.fmt and self._stored_key() == key and self.output.is_file():
+            # Exported by an earlier run from the same inputs
+            self._key, self._payloads = key, {fmt: self.output.read_bytes()}
+            return False
+
+        # Segments may have been replaced since the last render
+        self.store.close()
+        families = collect_families(self.load_progress(), handoff_times(self.store))
+        payloads = {name: render_metrics(families, name).encode() for name in FORMATS}
+        self.renders += 1
+        if key != self._key:
+            atomic_write_text(self.output, payloads[self.fmt].decode())
+            atomic_write_text(self.sidecar, json.dumps({'key': key}))
+        self._key, self._payloads = key, payloads
+        return True
+
+    def payload(self, fmt: Optional[str] = None) -> bytes:
+        """The current exposition; with unchanged inputs this only stats them."""
+        fmt = fmt or self.fmt
+        self.refresh(fmt)
+        return self._payloads[fmt]
+
+    def last_payload(self, fmt: Optional[str] = None) -> Optional[bytes]:
+        """The payload as of the last successful refresh, if any."""
+        return self._payloads.get(fmt or self.fmt)
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """The format a scraper asked for in its Accept header."""
+    return 'openmetrics' if accept and 'application/openmetrics-text' in accept else 'prometheus'
+
+
+def serve(exporter: MetricsExporter, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          ready: Optional[Callable[[Any], None]] = None) -> None:
+    """Serve the exposition at /metrics until interrupted. `ready` gets the bound server."""
+    # Only the serving command pays for importing the HTTP stack
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # Handler threads share one exporter
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            fmt = negotiate(self.headers.get('Accept'))
+            try:
+                with lock:
+                    body = exporter.payload(fmt)
+            except Exception as e:
+                # Keep serving the last good payload, e.g. while progress.json is mid-edit
+                print(f"Error: {e}", file=sys.stderr)
+                body = exporter.last_payload(fmt)
+                if body is None:
+                    self.send_error(500, str(e))
+                    return
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPES[fmt])
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    try:
+        if ready is not None:
+            ready(server)
+        server.serve_forever()
+    finally:
+        server.server_close()
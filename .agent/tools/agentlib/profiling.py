@@ -0,0 +1,201 @@
+"""
+Opt-in phase timing for the agent tools.
+
+Enable with `--profile[=summary|trace[:FILE]]` on either CLI or the
+AGENT_PROFILE environment variable (same values; `1` means summary). The
+tools wrap their phases in `span()` or `@timed`, subprocesses are recorded with their
+argv, and file reads/writes are counted. At exit a summary is printed to
+stderr, or a Chrome trace-event file (chrome://tracing, Perfetto) is written.
+
+When profiling is off, `span()` is a global check returning a shared no-op
+context manager and the `record_*` hooks return immediately.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, NamedTuple, Optional, TypeVar
+
+ENV_VAR = 'AGENT_PROFILE'
+FLAG = '--profile'
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+_NULL_SPAN = nullcontext()
+_profiler: Optional['Profiler'] = None
+
+
+class Span(NamedTuple):
+    name: str
+    category: str
+    start: float
+    end: float
+    depth: int
+    args: Dict[str, Any]
+    thread: int
+
+
+class Profiler:
+    """Collects spans and I/O counters for one tool run."""
+
+    def __init__(self, tool: str, mode: str = 'summary', trace_file: Optional[Path] = None):
+        self.tool = tool
+        self.mode = mode
+        self.trace_file = trace_file
+        self.spans: List[Span] = []
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.started = time.perf_counter()
+        # Nesting is tracked per thread: handoff inputs are collected concurrently
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name: str, category: str, args: Dict[str, Any]) -> Iterator[None]:
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            self.spans.append(Span(name, category, start, time.perf_counter(), depth, args,
+                                   threading.get_ident()))
+
+    def summary(self) -> str:
+        total = time.perf_counter() - self.started
+        lines = [f"Profile ({self.tool}): {total * 1000:.1f}ms total"]
+        for span in sorted(self.spans, key=lambda s: (s.start, s.depth)):
+            label = "  " * (span.depth + 1) + span.name
+            lines.append(f"{label:<48} {(span.end - span.start) * 1000:9.2f}ms")
+
+        subprocesses = [s for s in self.spans if s.category == 'subprocess']
+        lines.append(f"Subprocesses: {len(subprocesses)} "
+                     f"({sum(s.end - s.start for s in subprocesses) * 1000:.1f}ms)  "
+                     f"Bytes read: {self.bytes_read:,}  Bytes written: {self.bytes_written:,}")
+        return "\n".join(lines)
+
+    def trace(self) -> Dict[str, Any]:
+        """Chrome trace-event document (complete events, microseconds)."""
+        pid = os.getpid()
+        tid = threading.get_ident()
+        end = time.perf_counter()
+        events = [{
+            'name': self.tool, 'cat': 'tool', 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': 0, 'dur': (end - self.started) * 1e6,
+            'args': {'bytes_read': self.bytes_read, 'bytes_written': self.bytes_written},
+        }]
+        for span in self.spans:
+            events.append({
+                'name': span.name, 'cat': span.category, 'ph': 'X', 'pid': pid, 'tid': span.thread,
+                'ts': (span.start - self.started) * 1e6, 'dur': (span.end - span.start) * 1e6,
+                'args': span.args,
+            })
+        events.append({'name': 'io', 'ph': 'C', 'pid': pid, 'tid': tid, 'ts': (end - self.started) * 1e6,
+                       'args': {'bytes_read': self.bytes_read, 'bytes_written': self.bytes_written}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def report(self) -> None:
+        if self.mode == 'trace':
+            self.trace_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.trace_file, 'w') as f:
+                json.dump(self.trace(), f)
+            print(f"Profile trace written to {self.trace_file}", file=sys.stderr)
+        else:
+            print(self.summary(), file=sys.stderr)
+
+
+def enabled() -> bool:
+    return _profiler is not None
+
+
+def span(name: str, category: str = 'phase', **args: Any) -> ContextManager:
+    """Time a phase of the current run (no-op unless profiling is enabled)."""
+    if _profiler is None:
+        return _NULL_SPAN
+    return _profiler.span(name, category, args)
+
+
+def timed(name: Optional[str] = None, category: str = 'phase') -> Callable[[F], F]:
+    """Decorator form of `span()`, named after the function by default."""
+    def decorate(fn: F) -> F:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return fn(*args, **kwargs)
+            with _profiler.span(label, category, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_read(size: int) -> None:
+    if _profiler is not None:
+        _profiler.bytes_read += size
+
+
+def record_written(size: int) -> None:
+    if _profiler is not None:
+        _profiler.bytes_written += size
+
+
+def record_file_read(path: Path) -> None:
+    """Count a whole file as read (stat only when profiling)."""
+    if _profiler is not None:
+        try:
+            _profiler.bytes_read += os.path.getsize(path)
+        except OSError:
+            pass
+
+
+def record_file_written(path: Path) -> None:
+    if _profiler is not None:
+        try:
+            _profiler.bytes_written += os.path.getsize(path)
+        except OSError:
+            pass
+
+
+def enable(tool: str, spec: str, trace_dir: Callable[[], Path]) -> Profiler:
+    """Start profiling; `spec` is summary, trace or trace:FILE."""
+    global _profiler
+    mode, _, target = spec.partition(':')
+    if mode in ('', '1', 'true', 'summary'):
+        profiler = Profiler(tool)
+    elif mode == 'trace':
+        trace_file = Path(target) if target else trace_dir() / f"profile-{tool}-{time.strftime('%Y%m%d_%H%M%S')}.json"
+        profiler = Profiler(tool, 'trace', trace_file)
+    else:
+        raise ValueError(f"Unknown profile mode: {spec} (use summary, trace or trace:FILE)")
+
+    _profiler = profiler
+    atexit.register(profiler.report)
+    return profiler
+
+
+def configure(tool: str, argv: List[str], trace_dir: Callable[[], Path]) -> List[str]:
+    """Enable profiling from `--profile[=...]` or AGENT_PROFILE; returns argv without the flag."""
+    spec = os.environ.get(ENV_VAR) or None
+    remaining = []
+    for arg in argv:
+        if arg == FLAG:
+            spec = 'summary'
+        elif arg.startswith(FLAG + '='):
+            spec = arg[len(FLAG) + 1:]
+        else:
+            remaining.append(arg)
+
+    if spec and spec not in ('0', 'false'):
+        try:
+            enable(tool, spec, trace_dir)
+        except (ValueError, RuntimeError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    return remaining
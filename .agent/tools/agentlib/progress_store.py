@@ -0,0 +1,202 @@
+"""
+Journaled storage for .agent/current/progress.json.
+
+Mutations are appended as single JSON lines to progress.journal.jsonl and
+replayed on top of the last progress.json snapshot when loading. Once the
+journal grows past a record or size threshold it is folded back into a new
+snapshot. Operations only ever set values, so replaying one twice (e.g.
+after a crash between snapshot write and journal truncation) is harmless.
+Operations that no longer apply to the snapshot (e.g. a component removed by
+a checkout) are skipped on replay and moved to progress.journal.rejected.jsonl
+when the journal is next compacted.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import profiling
+from .components import ComponentTree, split_path
+from .fsutil import atomic_write_json
+from .schema import load_document
+from .task_store import TaskStore
+
+DEFAULT_MAX_RECORDS = 200
+DEFAULT_MAX_BYTES = 256 * 1024
+
+
+def timestamp() -> str:
+    """Timestamp in the format stored in metadata.last_updated."""
+    return datetime.now().isoformat() + "Z"
+
+
+def calculate_overall_completion(components: Any) -> float:
+    """Calculate overall completion percentage (weighted mean of all components)."""
+    if not isinstance(components, ComponentTree):
+        components = ComponentTree.from_json(components)
+    return components.overall()
+
+
+def operation_path(op: Dict[str, Any]) -> List[str]:
+    """Component path of an update operation ("path", or "category" + "component")."""
+    if "path" in op:
+        return split_path(op["path"])
+    return [op.get("category"), *split_path(op.get("component") or "")]
+
+
+def prepare_document(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a freshly parsed document into its in-memory form.
+
+    progress["tasks"] becomes an indexed TaskStore (with the serialized
+    progress["task_metadata"] folded into it) and progress["components"]
+    a ComponentTree.
+    """
+    if not isinstance(progress.get("components"), ComponentTree):
+        progress["components"] = ComponentTree.from_json(progress.get("components", {}))
+    if not isinstance(progress.get("tasks"), TaskStore):
+        progress["tasks"] = TaskStore.from_json(progress.get("tasks", {}), progress.pop("task_metadata", None))
+    return progress
+
+
+def serialize_document(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an in-memory document back to the JSON layout."""
+    document = dict(progress)
+    if isinstance(progress.get("components"), ComponentTree):
+        document["components"] = progress["components"].to_json()
+    tasks = progress.get("tasks")
+    if isinstance(tasks, TaskStore):
+        document["tasks"] = tasks.to_json()
+        metadata = tasks.metadata_json()
+        if metadata:
+            document["task_metadata"] = metadata
+    return document
+
+
+def apply_operation(progress: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """Apply one journal operation to a prepared in-memory progress document.
+
+    Operations are assumed to be validated already; see update-progress.py.
+    """
+    kind = op["op"]
+
+    if kind == "update":
+        components = progress["components"]
+        components.set_score(operation_path(op), op["value"])
+        progress["metrics"]["overall_completion"] = components.overall()
+
+    elif kind == "task":
+        progress["tasks"].set_status(op["task"], op["status"], owner=op.get("owner"), ts=op.get("ts"),
+                                     priority=op.get("priority"), estimate=op.get("estimate"),
+                                     depends_on=op.get("depends_on"))
+
+    elif kind == "phase":
+        progress["metrics"]["phase"] = op["phase"]
+
+    else:
+        raise ValueError(f"Unknown operation: {kind}")
+
+    progress["metadata"]["last_updated"] = op.get("ts", timestamp())
+
+
+class ProgressJournal:
+    """Snapshot file plus append-only JSONL journal of operations."""
+
+    def __init__(self, snapshot_file: Path, journal_file: Optional[Path] = None,
+                 max_records: int = DEFAULT_MAX_RECORDS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or snapshot_file.with_name('progress.journal.jsonl')
+        self.rejected_file = self.journal_file.with_name('progress.journal.rejected.jsonl')
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        # Operations skipped by the last replay, and the journal's record count
+        # once known (counted on first need, then kept up to date by append)
+        self.rejected: List[Dict[str, Any]] = []
+        self._record_count: Optional[int] = None
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Yield journal records in append order, skipping a torn final line."""
+        if not self.journal_file.exists():
+            return
+        with open(self.journal_file, 'r') as f:
+            for line in f:
+                profiling.record_read(len(line))
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def replay(self, progress: Dict[str, Any]) -> Dict[str, Any]:
+        """Migrate and validate a freshly parsed snapshot, then apply journaled operations."""
+        with profiling.span('validate document'):
+            load_document(progress, self.snapshot_file.name)
+        with profiling.span('prepare document'):
+            prepare_document(progress)
+        self.rejected = []
+        count = 0
+        with profiling.span('replay journal'):
+            for op in self.records():
+                count += 1
+                try:
+                    apply_operation(progress, op)
+                except (KeyError, ValueError, TypeError) as e:
+                    self.rejected.append(op)
+                    print(f"Warning: skipping journaled operation that no longer applies ({e})", file=sys.stderr)
+        self._record_count = count
+        return progress
+
+    def append(self, op: Dict[str, Any]) -> None:
+        """Append a single operation record durably."""
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        record = json.dumps(op, separators=(',', ':')).encode() + b'\n'
+        with open(self.journal_file, 'a+b') as f:
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    # Terminate a line torn by a crash so this record stays parseable
+                    record = b'\n' + record
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        profiling.record_written(len(record))
+        if self._record_count is not None:
+            self._record_count += 1
+
+    def needs_compaction(self) -> bool:
+        """Whether the journal has passed the size or record threshold."""
+        try:
+            size = self.journal_file.stat().st_size
+        except OSError:
+            return False
+        if size >= self.max_bytes:
+            return True
+        if self._record_count is None:
+            self._record_count = sum(1 for _ in self.records())
+        return self._record_count >= self.max_records
+
+    def write_snapshot(self, progress: Dict[str, Any]) -> None:
+        """Atomically write a full snapshot and drop the journal it supersedes.
+
+        Callers must hold the exclusive state lock so no operation is appended
+        between loading `progress` and removing the journal. Operations the
+        replay skipped are kept in the rejected file for inspection.
+        """
+        with profiling.span('write snapshot'):
+            atomic_write_json(self.snapshot_file, serialize_document(progress), indent=4)
+
+        if self.rejected:
+            with open(self.rejected_file, 'a') as f:
+                for op in self.rejected:
+                    f.write(json.dumps(op, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.rejected = []
+
+        if self.journal_file.exists():
+            self.journal_file.unlink()
+        self._record_count = 0
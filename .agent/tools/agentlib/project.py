@@ -0,0 +1,175 @@
+"""
+Project discovery and shared document loaders for the agent tools.
+
+Root discovery is memoized per working directory, and progress, state and
+blockers are cached in-process by doc_cache, so one process (the `agent`
+CLI, the daemon) walks up the directory tree and parses each document once
+no matter how many commands or report sections ask for it.
+"""
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import doc_cache, profiling
+from .fsutil import state_lock
+from .progress_store import ProgressJournal, timestamp
+from .schema import CURRENT_VERSION
+from .state_docs import apply_blockers, load_parsed, parse_blockers, parse_state
+
+
+@lru_cache(maxsize=None)
+def _find_root(cwd: str) -> Path:
+    current = Path(cwd)
+    while current != current.parent:
+        if (current / '.agent').exists() and (current / 'package.json').exists():
+            return current
+        current = current.parent
+    raise RuntimeError("Could not find project root")
+
+
+@profiling.timed('get_project_root')
+def find_project_root() -> Path:
+    """Find the project root directory (memoized per working directory)."""
+    return _find_root(os.getcwd())
+
+
+def state_dir() -> Path:
+    """Get the .agent/current state directory."""
+    return find_project_root() / '.agent' / 'current'
+
+
+def cache_dir() -> Path:
+    """Get the .agent/cache directory."""
+    return find_project_root() / '.agent' / 'cache'
+
+
+@lru_cache(maxsize=None)
+def _journal(snapshot_file: Path) -> ProgressJournal:
+    return ProgressJournal(snapshot_file)
+
+
+def get_journal() -> ProgressJournal:
+    """Get the journal backing progress.json.
+
+    One instance per state directory, so the record count and the operations
+    skipped by the last replay carry over from loading to saving.
+    """
+    return _journal(state_dir() / 'progress.json')
+
+
+def default_progress() -> Dict[str, Any]:
+    """Progress document used before progress.json exists."""
+    return {
+        "components": {
+            "frontend": {
+                "react_app": 95,
+                "authentication": 90,
+                "document_editor": 85,
+                "real_time_sync": 80,
+                "ui_components": 90
+            },
+            "backend": {
+                "sharedb_integration": 85,
+                "jwt_auth": 90,
+                "websocket_handling": 80,
+                "api_routes": 85,
+                "middleware": 90
+            },
+            "shared": {
+                "type_definitions": 90,
+                "validation_schemas": 85,
+                "auth_utilities": 90,
+                "logging": 80
+            },
+            "infrastructure": {
+                "testing_setup": 85,
+                "ci_cd_pipeline": 70,
+                "docker_config": 80,
+                "documentation": 85
+            }
+        },
+        "metadata": {
+            "format_version": CURRENT_VERSION,
+            "last_updated": timestamp(),
+            "project_start": "2025-01-01",
+            "package_manager": "pnpm",
+            "project": "pub-sub-demo"
+        },
+        "metrics": {
+            "blockers": [],
+            "health": "green",
+            "overall_completion": 85.0,
+            "phase": "development-stabilization"
+        },
+        "tasks": {
+            "completed": [
+                "Basic React app setup",
+                "ShareDB integration",
+                "JWT authentication",
+                "WebSocket connections",
+                "Basic document editing"
+            ],
+            "in_progress": [
+                "Agent system setup",
+                "Comprehensive testing",
+                "Security hardening"
+            ],
+            "pending": [
+                "Performance optimization",
+                "Production deployment",
+                "Monitoring setup"
+            ]
+        }
+    }
+
+
+@profiling.timed('load_progress')
+def load_progress_files(journal: ProgressJournal) -> Dict[str, Any]:
+    """Load current progress data (snapshot plus journaled updates)."""
+    if not journal.snapshot_file.exists():
+        return journal.replay(default_progress())
+
+    with profiling.span('parse progress.json'):
+        with open(journal.snapshot_file, 'r') as f:
+            data = json.load(f)
+    profiling.record_file_read(journal.snapshot_file)
+    return journal.replay(data)
+
+
+def load_progress() -> Dict[str, Any]:
+    """Load current progress data, reusing the in-memory copy while the files are unchanged.
+
+    metrics.blockers and metrics.health are derived from blockers.md. Callers
+    hold the state lock (see `read_progress`).
+    """
+    journal = get_journal()
+    return doc_cache.cached('progress',
+                            [journal.snapshot_file, journal.journal_file, state_dir() / 'blockers.md'],
+                            lambda: apply_blockers(load_progress_files(journal), load_blockers()))
+
+
+def read_progress() -> Dict[str, Any]:
+    """Load progress under a shared lock, for read-only commands."""
+    with state_lock(state_dir()):
+        return load_progress()
+
+
+def load_state() -> Optional[Dict[str, Any]]:
+    """Load current state.md as title, fields and sections (None if missing)."""
+    state_file = state_dir() / 'state.md'
+    if not state_file.exists():
+        return None
+    return doc_cache.cached('state', [state_file],
+                            lambda: load_parsed(state_file, parse_state, cache_dir() / 'docs'))
+
+
+def load_blockers() -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Load current blockers.md as active, potential and resolved records (None if missing)."""
+    blockers_file = state_dir() / 'blockers.md'
+    if not blockers_file.exists():
+        return None
+    return doc_cache.cached('blockers', [blockers_file],
+                            lambda: load_parsed(blockers_file, parse_blockers, cache_dir() / 'docs'))
@@ -0,0 +1,375 @@
+"""
+Output formats for `update-progress.py show`.
+
+One filtered walk over the progress document feeds four renderers: the
+readable bar chart, a single JSON document, NDJSON (one record per line,
+tagged with "type") and compact TSV. Filters are applied while walking,
+before anything is formatted: a category filter only visits that subtree,
+scores are compared on the node, and the walk stops as soon as `limit` rows
+have been produced. Renderers write through a `write` callable, normally an
+`OutputBuffer`, instead of printing line by line.
+
+The "next" section lists unblocked pending tasks, highest priority and
+longest remaining critical path first (see task_graph.py). Without any
+priorities, estimates or dependencies it is simply the head of the pending
+list, and the dependency graph is never built.
+"""
+
+import json
+import sys
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from .components import ComponentNode, ComponentTree
+
+FORMATS = ('text', 'json', 'ndjson', 'tsv')
+SECTIONS = ('components', 'tasks', 'next')
+TASK_ICONS = {"completed": "✅", "in_progress": "🔄", "pending": "⏳"}
+BAR_LENGTH = 20
+# Tasks in the "next" section unless `limit` says otherwise
+NEXT_TASKS = 5
+# Output is handed to the stream in chunks of about this many characters
+CHUNK_SIZE = 1 << 16
+
+
+def _bar(score: int) -> str:
+    filled = int(score * BAR_LENGTH // 100)
+    return "█" * filled + "░" * (BAR_LENGTH - filled)
+
+
+# Bars for every valid score, built once rather than per row
+_BARS = [_bar(score) for score in range(101)]
+
+
+class ProgressQuery(NamedTuple):
+    """Which parts of a progress document to render.
+
+    `categories` are dotted component paths (a category or any subtree).
+    `offset` and `limit` page component rows and task rows separately;
+    `limit` also sizes the "next" section.
+    """
+    categories: Tuple[str, ...] = ()
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+    statuses: Tuple[str, ...] = ()
+    offset: int = 0
+    limit: Optional[int] = None
+    sections: Tuple[str, ...] = SECTIONS
+
+    @property
+    def pages_components(self) -> bool:
+        """True when some component rows may be left out (not just whole subtrees)."""
+        return (self.min_score is not None or self.max_score is not None
+                or self.offset > 0 or self.limit is not None)
+
+    def matches(self, score: int) -> bool:
+        return ((self.min_score is None or score >= self.min_score)
+                and (self.max_score is None or score <= self.max_score))
+
+
+class OutputBuffer:
+    """Collects rendered text and writes it to a stream in large chunks."""
+
+    def __init__(self, stream: Optional[TextIO] = None, chunk_size: int = CHUNK_SIZE):
+        # Resolved at flush time so redirected stdout (the daemon) is honoured
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._parts: List[str] = []
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self._chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._parts:
+            (self._stream or sys.stdout).write(''.join(self._parts))
+            self._parts = []
+            self._size = 0
+
+    def __enter__(self) -> 'OutputBuffer':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.flush()
+
+
+def query_roots(tree: ComponentTree, query: ProgressQuery) -> List[ComponentNode]:
+    """Subtrees selected by the category filter (every category without one)."""
+    if not query.categories:
+        return list(tree.categories())
+    roots = []
+    for path in query.categories:
+        node = tree.find(path)
+        if node is None:
+            raise ValueError(f"Unknown category or component: {path}")
+        roots.append(node)
+    return roots
+
+
+def walk_components(tree: ComponentTree, query: ProgressQuery) -> Iterator[Tuple[int, ComponentNode]]:
+    """Rows to display as (depth, node); depth -1 is a category or subtree heading.
+
+    When rows are filtered or paged, headings and groups are only yielded
+    above a leaf that is shown.
+    """
+    if query.limit == 0:
+        return
+    skip, remaining = query.offset, query.limit
+    for root in query_roots(tree, query):
+        rows = tree.walk(root) if not root.is_leaf else iter([(0, root)])
+        if not query.pages_components:
+            yield -1, root
+            yield from rows
+            continue
+
+        pending: List[Tuple[int, ComponentNode]] = [(-1, root)]
+        for depth, node in rows:
+            if not node.is_leaf:
+                while pending and pending[-1][0] >= depth:
+                    pending.pop()
+                pending.append((depth, node))
+                continue
+            if not query.matches(node.score):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            yield from pending
+            pending.clear()
+            yield depth, node
+            if remaining is not None:
+                remaining -= 1
+                if remaining == 0:
+                    return
+
+
+def select_tasks(tasks: Any, query: ProgressQuery) -> Iterator[Tuple[str, str]]:
+    """(status, task) pairs matching the status filter, paged by offset/limit."""
+    statuses = query.statuses or tuple(tasks)
+    if query.limit == 0:
+        return
+    skip, remaining = query.offset, query.limit
+    for status in statuses:
+        names = tasks.get(status, [])
+        if skip >= len(names):
+            skip -= len(names)
+            continue
+        for name in names[skip:]:
+            yield status, name
+            if remaining is not None:
+                remaining -= 1
+                if remaining == 0:
+                    return
+        skip = 0
+
+
+def summarize(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Headline metrics and per-category completion."""
+    metrics = progress['metrics']
+    return {
+        'overall_completion': metrics['overall_completion'],
+        'phase': metrics['phase'],
+        'health': metrics['health'],
+        'blockers': list(metrics['blockers']),
+        'last_updated': progress['metadata']['last_updated'],
+        'categories': {category.name: round(category.completion, 1)
+                       for category in progress['components'].categories()},
+    }
+
+
+# Same output as json.dumps for a str, without the per-call encoder set-up
+_quote = json.encoder.encode_basestring_ascii
+
+
+def _number(value: Any) -> str:
+    return str(value) if type(value) is int else json.dumps(value)
+
+
+def _owner(tasks: Any, name: str) -> Optional[str]:
+    return tasks.metadata(name).get('owner') if hasattr(tasks, 'metadata') else None
+
+
+def next_tasks(tasks: Any, query: ProgressQuery) -> List[Dict[str, Any]]:
+    """Ready tasks to work on next, with planning details when any task has them."""
+    limit = NEXT_TASKS if query.limit is None else query.limit
+    if not hasattr(tasks, 'next_tasks'):
+        return [{'task': name} for name in tasks.get('pending', [])[:limit]]
+    names = tasks.next_tasks(limit)
+    if not tasks.is_planned():
+        return [{'task': name} for name in names]
+    graph = tasks.graph
+    return [{'task': name, 'priority': graph.priority(name), 'estimate': graph.estimate(name),
+             'critical_path': graph.critical_length(name), 'unblocks': graph.blocks(name)}
+            for name in names]
+
+
+def plan_summary(tasks: Any) -> Dict[str, Any]:
+    """Blocked pending tasks and the critical path (empty without planning metadata)."""
+    if not getattr(tasks, 'is_planned', lambda: False)():
+        return {'blocked': [], 'critical_path': []}
+    graph = tasks.graph
+    return {'blocked': [{'task': name, 'waiting_on': graph.unmet(name)} for name in graph.blocked()],
+            'critical_path': graph.critical_path()}
+
+
+def _next_details(row: Dict[str, Any]) -> str:
+    if 'priority' not in row:
+        return ''
+    details = [f"P{row['priority']}", f"{row['estimate']:g}h", f"path {row['critical_path']:g}h"]
+    if row['unblocks']:
+        details.append(f"unblocks {row['unblocks']}")
+    return f" ({', '.join(details)})"
+
+
+def component_json(node: ComponentNode, prefix: str = '{') -> str:
+    """One component as a JSON object; `prefix` opens it (e.g. with a "type" member)."""
+    return f'{prefix}"path": {_quote(node.path)}, "score": {_number(node.score)}, "weight": {_number(node.weight)}}}'
+
+
+def task_json(tasks: Any, status: str, name: str, prefix: str = '{') -> str:
+    """One task (with its owner, if any) as a JSON object."""
+    owner = _owner(tasks, name)
+    owner_member = f', "owner": {_quote(owner)}' if owner else ''
+    return f'{prefix}"task": {_quote(name)}, "status": {_quote(status)}{owner_member}}}'
+
+
+def render_text(write: Callable[[str], None], progress: Dict[str, Any], query: ProgressQuery) -> None:
+    metrics = progress['metrics']
+    write("\nPub-Sub Demo Progress Report\n")
+    write(f"Overall Completion: {metrics['overall_completion']}%\n")
+    write(f"Current Phase: {metrics['phase']}\n")
+    write(f"Health Status: {metrics['health']}\n")
+    if metrics['blockers']:
+        write(f"Active Blockers: {', '.join(metrics['blockers'])}\n")
+    write(f"Last Updated: {progress['metadata']['last_updated']}\n")
+
+    if 'components' in query.sections:
+        write("\nComponent Progress:\n")
+        for depth, node in walk_components(progress['components'], query):
+            if depth < 0:
+                write(f"\n{node.path.title()} ({node.completion:.1f}%):\n")
+                continue
+            indent = "  " * (depth + 1)
+            if not node.is_leaf:
+                write(f"{indent}{node.name}: {node.completion:5.1f}%\n")
+                continue
+            bar = _BARS[node.score] if 0 <= node.score <= 100 else _bar(node.score)
+            write(f"{indent}{node.name}: {node.score:3d}% [{bar}]\n")
+
+    if 'tasks' in query.sections:
+        write("\nTasks:\n")
+        current = None
+        for status, task in select_tasks(progress['tasks'], query):
+            if status != current:
+                write(f"\n{status.title().replace('_', ' ')}:\n")
+                current = status
+            write(f"  {TASK_ICONS.get(status, '•')} {task}\n")
+
+    if 'next' in query.sections:
+        write("\nNext Up:\n")
+        rows = next_tasks(progress['tasks'], query)
+        for index, row in enumerate(rows, 1):
+            write(f"  {index}. {row['task']}{_next_details(row)}\n")
+        if not rows:
+            write("  (no unblocked pending tasks)\n")
+        plan = plan_summary(progress['tasks'])
+        if plan['blocked']:
+            write(f"  {len(plan['blocked'])} pending task(s) blocked on prerequisites\n")
+        if len(plan['critical_path']) > 1:
+            write(f"  Critical path: {' → '.join(plan['critical_path'])}\n")
+
+
+def render_json(write: Callable[[str], None], progress: Dict[str, Any], query: ProgressQuery) -> None:
+    write('{"summary": ' + json.dumps(summarize(progress)))
+    if 'components' in query.sections:
+        write(', "components": [')
+        separator = ''
+        for _, node in walk_components(progress['components'], query):
+            if node.is_leaf:
+                write(separator + component_json(node))
+                separator = ', '
+        write(']')
+    if 'tasks' in query.sections:
+        write(', "tasks": [')
+        separator = ''
+        for status, task in select_tasks(progress['tasks'], query):
+            write(separator + task_json(progress['tasks'], status, task))
+            separator = ', '
+        write(']')
+    if 'next' in query.sections:
+        plan = plan_summary(progress['tasks'])
+        write(', "next": ' + json.dumps(next_tasks(progress['tasks'], query)))
+        write(', "blocked": ' + json.dumps(plan['blocked']))
+        write(', "critical_path": ' + json.dumps(plan['critical_path']))
+    write('}\n')
+
+
+def render_ndjson(write: Callable[[str], None], progress: Dict[str, Any], query: ProgressQuery) -> None:
+    write(json.dumps({'type': 'summary', **summarize(progress)}) + '\n')
+    if 'components' in query.sections:
+        for _, node in walk_components(progress['components'], query):
+            if node.is_leaf:
+                write(component_json(node, '{"type": "component", ') + '\n')
+    if 'tasks' in query.sections:
+        for status, task in select_tasks(progress['tasks'], query):
+            write(task_json(progress['tasks'], status, task, '{"type": "task", ') + '\n')
+    if 'next' in query.sections:
+        for rank, row in enumerate(next_tasks(progress['tasks'], query), 1):
+            write(json.dumps({'type': 'next', 'rank': rank, **row}) + '\n')
+        plan = plan_summary(progress['tasks'])
+        for row in plan['blocked']:
+            write(json.dumps({'type': 'blocked', **row}) + '\n')
+        if plan['critical_path']:
+            write(json.dumps({'type': 'critical_path', 'tasks': plan['critical_path']}) + '\n')
+
+
+def _tsv(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def render_tsv(write: Callable[[str], None], progress: Dict[str, Any], query: ProgressQuery) -> None:
+    """Rows of `kind<TAB>key<TAB>value[<TAB>extra]`; tabs and newlines in values are escaped."""
+    summary = summarize(progress)
+    for key in ('overall_completion', 'phase', 'health', 'last_updated'):
+        write(f"metric\t{key}\t{_tsv(summary[key])}\n")
+    for title in summary['blockers']:
+        write(f"blocker\t{_tsv(title)}\n")
+    for name, completion in summary['categories'].items():
+        write(f"category\t{_tsv(name)}\t{completion}\n")
+    if 'components' in query.sections:
+        for _, node in walk_components(progress['components'], query):
+            if node.is_leaf:
+                write(f"component\t{_tsv(node.path)}\t{node.score}\t{node.weight}\n")
+    if 'tasks' in query.sections:
+        for status, task in select_tasks(progress['tasks'], query):
+            owner = _owner(progress['tasks'], task) or ''
+            write(f"task\t{status}\t{_tsv(task)}\t{_tsv(owner)}\n")
+    if 'next' in query.sections:
+        for rank, row in enumerate(next_tasks(progress['tasks'], query), 1):
+            planned = (f"\t{row['priority']}\t{row['estimate']:g}\t{row['critical_path']:g}"
+                       if 'priority' in row else '')
+            write(f"next\t{rank}\t{_tsv(row['task'])}{planned}\n")
+
+
+RENDERERS = {
+    'text': render_text,
+    'json': render_json,
+    'ndjson': render_ndjson,
+    'tsv': render_tsv,
+}
+
+
+def render_progress(write: Callable[[str], None], progress: Dict[str, Any],
+                    query: Optional[ProgressQuery] = None, fmt: str = 'text') -> None:
+    """Render `progress` in one of FORMATS, restricted to `query`."""
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown format: {fmt} (expected one of {', '.join(FORMATS)})")
+    query = query or ProgressQuery()
+    # Reject unknown names before anything is written
+    query_roots(progress['components'], query)
+    for status in query.statuses:
+        if status not in progress['tasks']:
+            raise ValueError(f"Unknown task status: {status}")
+    RENDERERS[fmt](write, progress, query)
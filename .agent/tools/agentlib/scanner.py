@@ -0,0 +1,376 @@
+"""
+Derive component scores from the repository itself.
+
+.agent/components.json maps component paths (e.g. "frontend.document_editor")
+to source globs. The scanner walks only the directories those globs can
+match and measures for each component:
+
+- tests:    share of its source files imported by a test file, or with a
+            same-named `*.test.*` / `*.spec.*` file in the same directory,
+            a `__tests__` directory beside it or the mirrored path under a
+            top-level `test/` tree
+- coverage: covered / total lines from istanbul coverage reports
+            (coverage-summary.json or coverage-final.json)
+- todos:    share of its source files without TODO / FIXME / XXX markers
+
+and turns them into a 0-100 score with configurable weights. Only the
+signals present are weighted: without coverage reports a score comes from
+tests and TODOs alone. Test files are found under the component globs and
+the configured `test_roots`.
+
+Per-file results (line count, markers, imports and a content hash) are
+cached by mtime and size in .agent/cache/scan-cache.json, so a re-scan only
+reads files that changed since the last one. Large sets of changed files are
+analyzed on a process pool.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+from . import profiling
+from .fsutil import atomic_write_text
+
+CACHE_VERSION = 1
+DEFAULT_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs')
+DEFAULT_TESTS = ('**/__tests__/**', '**/*.test.*', '**/*.spec.*')
+DEFAULT_WEIGHTS = {'coverage': 0.5, 'tests': 0.4, 'todos': 0.1}
+SKIP_DIRS = {'node_modules', 'dist', 'build', 'coverage', '.git', '.turbo', '.next'}
+# Top-level directories whose tests mirror the source tree (test/apps/x.test.ts tests apps/x.ts)
+TEST_ROOT_DIRS = ('test', 'tests')
+# Fewer changed files than this are analyzed in-process
+PARALLEL_THRESHOLD = 200
+
+IMPORT = re.compile(rb'''(?:\bfrom\s*|\bimport\s*\(\s*|\brequire\s*\(\s*|^\s*import\s+)['"]([^'"\n]+)['"]''',
+                    re.MULTILINE)
+MARKER = re.compile(rb'\b(?:TODO|FIXME|XXX)\b')
+
+
+def compile_glob(pattern: str) -> Pattern[str]:
+    """Translate a path glob (`**` spans directories, `*` does not) to a regex."""
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r'\Z')
+
+
+def glob_base(pattern: str) -> str:
+    """The literal directory prefix of a glob ('' for the repository root)."""
+    parts = pattern.split('/')
+    literal = []
+    for part in parts[:-1]:
+        if any(char in part for char in '*?['):
+            break
+        literal.append(part)
+    else:
+        if not any(char in parts[-1] for char in '*?['):
+            # A plain file path: walk its directory
+            return '/'.join(parts[:-1])
+    return '/'.join(literal)
+
+
+def load_component_map(path: Path) -> Dict[str, Any]:
+    """Read and validate the component → paths mapping."""
+    with open(path, 'r') as f:
+        config = json.load(f)
+    components = config.get('components')
+    if not isinstance(components, dict) or not components:
+        raise ValueError(f"{path} must map component paths to source globs under \"components\"")
+    for name, spec in components.items():
+        sources = spec.get('sources') if isinstance(spec, dict) else spec
+        if not isinstance(sources, list) or not all(isinstance(glob, str) for glob in sources):
+            raise ValueError(f"Component '{name}' needs a list of source globs")
+    return config
+
+
+def analyze_file(path: str) -> Dict[str, Any]:
+    """Line count, TODO markers and import specifiers of one file (runs in worker processes)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    st = os.stat(path)
+    return {
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'lines': data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0),
+        'todos': len(MARKER.findall(data)),
+        'imports': sorted({match.decode('utf-8', errors='replace') for match in IMPORT.findall(data)}),
+    }
+
+
+def walk_files(root: Path, bases: Iterable[str], extensions: Tuple[str, ...]) -> Dict[str, os.stat_result]:
+    """Repository-relative paths (with stat) of matching files below each base directory."""
+    found: Dict[str, os.stat_result] = {}
+    walked: List[str] = []
+    for base in sorted(set(bases), key=len):
+        # Nested bases are covered by the walk of their parent
+        if any(done == '' or base == done or base.startswith(done + '/') for done in walked):
+            continue
+        walked.append(base)
+        stack = [base]
+        while stack:
+            relative = stack.pop()
+            try:
+                entries = list(os.scandir(root / relative if relative else root))
+            except OSError:
+                continue
+            for entry in entries:
+                path = f'{relative}/{entry.name}' if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS and not entry.name.startswith('.'):
+                        stack.append(path)
+                elif entry.name.endswith(extensions) and entry.is_file():
+                    found[path] = entry.stat()
+    return found
+
+
+class ScanCache:
+    """Per-file analysis results keyed by path, validated by stat and hash."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.coverage: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.files = data.get('files', {})
+                self.coverage = data.get('coverage', {})
+        except (OSError, ValueError):
+            pass
+
+    def save(self) -> None:
+        try:
+            atomic_write_text(self.path, json.dumps(
+                {'version': CACHE_VERSION, 'files': self.files, 'coverage': self.coverage},
+                separators=(',', ':')))
+        except OSError:
+            pass
+
+
+def update_file_cache(root: Path, files: Dict[str, os.stat_result], cache: ScanCache,
+                      workers: Optional[int] = None) -> Dict[str, int]:
+    """Re-analyze files whose stat changed.
+
+    Returns counts of scanned files, files read again and files whose content
+    actually changed.
+    """
+    changed = [path for path, st in files.items()
+               if (cache.files.get(path) or {}).get('mtime_ns') != st.st_mtime_ns
+               or cache.files[path].get('size') != st.st_size]
+
+    with profiling.span('analyze files', files=len(changed)):
+        absolute = [str(root / path) for path in changed]
+        if workers != 1 and (workers or len(changed) >= PARALLEL_THRESHOLD) and len(changed) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(analyze_file, absolute, chunksize=64))
+        else:
+            results = [analyze_file(path) for path in absolute]
+
+    modified = 0
+    for path, record in zip(changed, results):
+        previous = cache.files.get(path)
+        if previous is None or previous.get('sha256') != record['sha256']:
+            modified += 1
+        cache.files[path] = record
+    for path in set(cache.files) - set(files):
+        del cache.files[path]
+    profiling.record_read(sum(record['size'] for record in results))
+    return {'files': len(files), 'read': len(changed), 'changed': modified}
+
+
+def _resolve_import(importer: str, spec: str, files: Dict[str, Any], extensions: Tuple[str, ...]) -> Optional[str]:
+    if not spec.startswith('.'):
+        return None
+    target = posixpath.normpath(posixpath.join(posixpath.dirname(importer), spec))
+    stem, ext = posixpath.splitext(target)
+    candidates = [target]
+    if ext in ('.js', '.jsx', '.mjs', '.cjs'):
+        # TypeScript sources are imported with .js extensions under NodeNext
+        candidates.extend(stem + candidate for candidate in extensions)
+    candidates.extend(target + candidate for candidate in extensions)
+    candidates.extend(f'{target}/index{candidate}' for candidate in extensions)
+    return next((candidate for candidate in candidates if candidate in files), None)
+
+
+def _test_stem(path: str) -> str:
+    name = posixpath.basename(path)
+    for marker in ('.test.', '.spec.'):
+        if marker in name:
+            return name.split(marker, 1)[0]
+    return posixpath.splitext(name)[0]
+
+
+def _test_dirs(test: str) -> Set[str]:
+    """Directories whose same-named sources a test covers: its own and the mirrored one."""
+    parts = posixpath.dirname(test).split('/')
+    mirrored = [part for part in parts if part != '__tests__']
+    if mirrored and mirrored[0] in TEST_ROOT_DIRS:
+        mirrored = mirrored[1:]
+    return {'/'.join(parts), '/'.join(mirrored)}
+
+
+def tested_files(tests: List[str], files: Dict[str, Dict[str, Any]], extensions: Tuple[str, ...]) -> Set[str]:
+    """Source files imported by a test, plus same-named files in its own or mirrored directory."""
+    tested = set()
+    for test in tests:
+        for spec in files[test]['imports']:
+            target = _resolve_import(test, spec, files, extensions)
+            if target is not None:
+                tested.add(target)
+    named = {(directory, _test_stem(test)) for test in tests for directory in _test_dirs(test)}
+    tested.update(path for path in files
+                  if (posixpath.dirname(path), posixpath.splitext(posixpath.basename(path))[0]) in named)
+    return tested
+
+
+def match_files(paths: List[str], globs: List[str]) -> List[str]:
+    """Paths (sorted) matching any glob; each glob only looks below its literal base directory."""
+    matched: Set[str] = set()
+    for glob in globs:
+        base = glob_base(glob)
+        start, end = 0, len(paths)
+        if base:
+            # '0' sorts right after '/', so this is the range of paths below base/
+            start = bisect.bisect_left(paths, base + '/')
+            end = bisect.bisect_left(paths, base + '0', start)
+        pattern = compile_glob(glob)
+        matched.update(path for path in paths[start:end] if pattern.match(path))
+    return sorted(matched)
+
+
+def _coverage_totals(report: Dict[str, Any]) -> Dict[str, List[int]]:
+    """Absolute path → [covered, total] from an istanbul summary or final report."""
+    totals = {}
+    for path, entry in report.items():
+        if path == 'total' or not isinstance(entry, dict):
+            continue
+        if isinstance(entry.get('lines'), dict):
+            totals[path] = [entry['lines'].get('covered', 0), entry['lines'].get('total', 0)]
+        elif isinstance(entry.get('s'), dict):
+            counts = entry['s'].values()
+            totals[path] = [sum(1 for count in counts if count), len(counts)]
+    return totals
+
+
+def load_coverage(root: Path, reports: List[str], cache: ScanCache) -> Dict[str, List[int]]:
+    """Repository-relative path → [covered, total] lines from every coverage report found."""
+    coverage: Dict[str, List[int]] = {}
+    for directory in reports:
+        for name in ('coverage-summary.json', 'coverage-final.json'):
+            report_file = root / directory / name
+            try:
+                st = report_file.stat()
+            except OSError:
+                continue
+            key = [st.st_mtime_ns, st.st_size]
+            cached = cache.coverage.get(str(report_file))
+            if cached is None or cached.get('key') != key:
+                with profiling.span(f'parse {directory}/{name}'):
+                    with open(report_file, 'r') as f:
+                        totals = _coverage_totals(json.load(f))
+                profiling.record_file_read(report_file)
+                cached = cache.coverage[str(report_file)] = {'key': key, 'files': totals}
+            for path, counts in cached['files'].items():
+                try:
+                    relative = Path(path).resolve().relative_to(root.resolve()).as_posix()
+                except ValueError:
+                    relative = path
+                coverage.setdefault(relative, counts)
+            break
+    return coverage
+
+
+def component_signals(sources: List[str], tested: Set[str], files: Dict[str, Dict[str, Any]],
+                      coverage: Dict[str, List[int]]) -> Dict[str, Any]:
+    """Raw counts and 0-1 signals for one component's source files."""
+    covered = total = 0
+    for path in sources:
+        if path in coverage:
+            covered += coverage[path][0]
+            total += coverage[path][1]
+    with_todos = sum(1 for path in sources if files[path]['todos'])
+    return {
+        'files': len(sources),
+        'lines': sum(files[path]['lines'] for path in sources),
+        'tested': sum(1 for path in sources if path in tested),
+        'todos': sum(files[path]['todos'] for path in sources),
+        'signals': {
+            'tests': sum(1 for path in sources if path in tested) / len(sources),
+            'coverage': covered / total if total else None,
+            'todos': 1 - with_todos / len(sources),
+        },
+    }
+
+
+def score(signals: Dict[str, Optional[float]], weights: Dict[str, float]) -> int:
+    """Weighted mean of the available signals as a 0-100 score."""
+    available = {name: value for name, value in signals.items() if value is not None and weights.get(name)}
+    total_weight = sum(weights[name] for name in available)
+    if not total_weight:
+        return 0
+    return round(100 * sum(weights[name] * value for name, value in available.items()) / total_weight)
+
+
+@profiling.timed('scan components')
+def scan(root: Path, config: Dict[str, Any], cache_file: Path,
+         workers: Optional[int] = None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+    """Score every mapped component; returns (component → result, file counts).
+
+    Components whose globs match no files are reported with score None and
+    a `reason`.
+    """
+    extensions = tuple(config.get('extensions', DEFAULT_EXTENSIONS))
+    test_globs = [compile_glob(glob) for glob in config.get('tests', DEFAULT_TESTS)]
+    weights = {**DEFAULT_WEIGHTS, **config.get('weights', {})}
+    components = {name: spec if isinstance(spec, dict) else {'sources': spec}
+                  for name, spec in config['components'].items()}
+
+    bases = [glob_base(glob) for spec in components.values() for glob in spec['sources']]
+    bases += [glob_base(glob) for glob in config.get('test_roots', [])]
+    with profiling.span('walk files'):
+        stats = walk_files(root, bases, extensions)
+
+    cache = ScanCache(cache_file)
+    counts = update_file_cache(root, stats, cache, workers)
+    files = cache.files
+
+    tests = [path for path in files if any(glob.match(path) for glob in test_globs)]
+    test_set = set(tests)
+    tested = tested_files(tests, files, extensions)
+    coverage = load_coverage(root, config.get('coverage', []), cache)
+    cache.save()
+
+    results = {}
+    paths = sorted(path for path in files if path not in test_set)
+    for name, spec in components.items():
+        sources = match_files(paths, spec['sources'])
+        if not sources:
+            results[name] = {'files': 0, 'score': None, 'signals': {}, 'reason': "no matching files"}
+            continue
+        result = component_signals(sources, tested, files, coverage)
+        result['score'] = score(result['signals'], weights)
+        results[name] = result
+    return results, counts
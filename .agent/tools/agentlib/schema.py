@@ -0,0 +1,316 @@
+"""
+Validation and version migration for progress.json.
+
+`metadata.format_version` names the document layout. Documents written by
+older tools are upgraded in place by the chain of MIGRATIONS, one step per
+version, each touching only the parts its layout change affects. The result
+is then validated once against the current schema, so the rest of the tools
+can index the document directly instead of guarding every access.
+
+Schemas are small nested descriptions compiled into checker closures on
+first use and cached for the process. Every problem is reported with its
+path, e.g. `components.frontend.react_app: expected a score 0-100 or an
+object, got "95"`.
+
+Version history:
+- 1.0: components, metadata, metrics and tasks; nested components,
+  {"score", "weight"} leaves and task_metadata were added without a bump.
+- 1.1: every task status list and the metrics fields `blockers`, `health`,
+  `phase` and `overall_completion` are always present. Task `priority`,
+  `estimate` and `depends_on` metadata were added without a bump.
+"""
+
+from functools import lru_cache
+from itertools import repeat
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .components import ComponentTree
+from .task_graph import dependency_cycle
+from .task_store import TASK_STATUSES
+
+CURRENT_VERSION = '1.1'
+# Documents without metadata.format_version predate versioning
+UNVERSIONED = '1.0'
+
+# (path, message) pairs collected while checking
+Errors = List[Tuple[str, str]]
+Checker = Callable[[Any, str, Errors], None]
+
+
+class SchemaError(ValueError):
+    """A document does not match its schema; `errors` holds (path, message) pairs."""
+
+    # Errors listed in the message; the rest are counted
+    MAX_LISTED = 5
+
+    def __init__(self, errors: Errors, source: str = 'progress.json'):
+        self.errors = errors
+        lines = [f"{path or '<root>'}: {message}" for path, message in errors[:self.MAX_LISTED]]
+        if len(errors) > self.MAX_LISTED:
+            lines.append(f"... and {len(errors) - self.MAX_LISTED} more")
+        super().__init__(f"{source} is invalid: " + '; '.join(lines))
+
+
+def _join(path: str, key: Any) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else str(key)
+
+
+def _describe(value: Any) -> str:
+    text = repr(value) if not isinstance(value, str) else f'"{value}"'
+    return text if len(text) <= 40 else text[:37] + '...'
+
+
+# Schema descriptions: plain tuples, compiled by `compile_schema`
+def integer(minimum: Optional[int] = None, maximum: Optional[int] = None) -> tuple:
+    return ('integer', minimum, maximum)
+
+
+def number(minimum: Optional[float] = None, exclusive: bool = False) -> tuple:
+    return ('number', minimum, exclusive)
+
+
+def string() -> tuple:
+    return ('string',)
+
+
+def list_of(item: tuple) -> tuple:
+    return ('list', item)
+
+
+def map_of(value: tuple) -> tuple:
+    return ('map', value)
+
+
+def record(required: Dict[str, tuple], optional: Optional[Dict[str, tuple]] = None) -> tuple:
+    """An object with these keys; other keys are allowed and not checked."""
+    return ('record', required, optional or {})
+
+
+def component_tree() -> tuple:
+    """Nested components: leaves are scores or {"score", "weight"} objects."""
+    return ('components',)
+
+
+def compile_schema(schema: tuple) -> Checker:
+    """Turn a schema description into a checker `check(value, path, errors)`."""
+    kind = schema[0]
+
+    if kind == 'integer':
+        _, minimum, maximum = schema
+        bounds = (f" {minimum}-{maximum}" if minimum is not None and maximum is not None
+                  else f" >= {minimum}" if minimum is not None else '')
+        expected = f"expected an integer{bounds}"
+
+        def check_integer(value, path, errors):
+            if (type(value) is not int or (minimum is not None and value < minimum)
+                    or (maximum is not None and value > maximum)):
+                errors.append((path, f"{expected}, got {_describe(value)}"))
+        return check_integer
+
+    if kind == 'number':
+        _, minimum, exclusive = schema
+        expected = "expected a number" + (f" {'>' if exclusive else '>='} {minimum}" if minimum is not None else '')
+
+        def check_number(value, path, errors):
+            if (type(value) not in (int, float) or
+                    (minimum is not None and (value <= minimum if exclusive else value < minimum))):
+                errors.append((path, f"{expected}, got {_describe(value)}"))
+        return check_number
+
+    if kind == 'string':
+        def check_string(value, path, errors):
+            if not isinstance(value, str):
+                errors.append((path, f"expected a string, got {_describe(value)}"))
+        return check_string
+
+    if kind == 'list':
+        if schema[1][0] == 'string':
+            # Task lists can be long: check strings inline, building paths only for errors
+            def check_strings(value, path, errors):
+                if not isinstance(value, list):
+                    errors.append((path, f"expected a list, got {_describe(value)}"))
+                    return
+                if all(map(isinstance, value, repeat(str))):
+                    return
+                for index, item in enumerate(value):
+                    if not isinstance(item, str):
+                        errors.append((_join(path, index), f"expected a string, got {_describe(item)}"))
+            return check_strings
+        check_item = compile_schema(schema[1])
+
+        def check_list(value, path, errors):
+            if not isinstance(value, list):
+                errors.append((path, f"expected a list, got {_describe(value)}"))
+                return
+            for index, item in enumerate(value):
+                check_item(item, _join(path, index), errors)
+        return check_list
+
+    if kind == 'map':
+        check_value = compile_schema(schema[1])
+
+        def check_map(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append((path, f"expected an object, got {_describe(value)}"))
+                return
+            for key, item in value.items():
+                check_value(item, _join(path, key), errors)
+        return check_map
+
+    if kind == 'record':
+        _, required, optional = schema
+        fields = [(key, compile_schema(sub), True) for key, sub in required.items()]
+        fields += [(key, compile_schema(sub), False) for key, sub in optional.items()]
+
+        def check_record(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append((path, f"expected an object, got {_describe(value)}"))
+                return
+            for key, check, is_required in fields:
+                if key in value:
+                    check(value[key], _join(path, key), errors)
+                elif is_required:
+                    errors.append((_join(path, key), "missing required field"))
+        return check_record
+
+    if kind == 'components':
+        return _check_components
+
+    raise ValueError(f"Unknown schema kind: {kind}")
+
+
+def _check_components(value: Any, path: str, errors: Errors) -> None:
+    # Hand-written rather than composed: this is the one part of the document
+    # that grows with the project, so paths are only built for groups and errors
+    if not isinstance(value, dict):
+        errors.append((path, f"expected an object of components, got {_describe(value)}"))
+        return
+    for name, child in value.items():
+        if type(child) is int:
+            if not 0 <= child <= 100:
+                errors.append((_join(path, name), f"expected a score 0-100, got {child}"))
+        elif not isinstance(child, dict):
+            errors.append((_join(path, name), f"expected a score 0-100 or an object, got {_describe(child)}"))
+        elif 'score' in child:
+            score, weight = child['score'], child.get('weight', 1)
+            if type(score) is not int or not 0 <= score <= 100:
+                errors.append((_join(path, name) + '.score', f"expected a score 0-100, got {_describe(score)}"))
+            if type(weight) not in (int, float) or weight <= 0:
+                errors.append((_join(path, name) + '.weight', f"expected a number > 0, got {_describe(weight)}"))
+        else:
+            _check_components(child, _join(path, name), errors)
+
+
+PROGRESS_SCHEMA = record(
+    required={
+        'components': component_tree(),
+        'metadata': record(required={'format_version': string(), 'last_updated': string()}),
+        'metrics': record(required={
+            'overall_completion': number(0),
+            'phase': string(),
+            'health': string(),
+            'blockers': list_of(string()),
+        }),
+        'tasks': record(required={status: list_of(string()) for status in TASK_STATUSES}),
+    },
+    optional={
+        'task_metadata': map_of(record(required={}, optional={
+            'owner': string(), 'created': string(), 'updated': string(),
+            'priority': integer(), 'estimate': number(0, exclusive=True),
+            'depends_on': list_of(string()),
+        })),
+    },
+)
+
+
+@lru_cache(maxsize=None)
+def progress_checker() -> Checker:
+    """The compiled progress.json schema (compiled once per process)."""
+    return compile_schema(PROGRESS_SCHEMA)
+
+
+def _migrate_1_0(document: Dict[str, Any]) -> None:
+    """1.0 -> 1.1: fill in task statuses and metrics fields that could be missing."""
+    tasks = document.setdefault('tasks', {})
+    if isinstance(tasks, dict):
+        for status in TASK_STATUSES:
+            tasks.setdefault(status, [])
+    metrics = document.setdefault('metrics', {})
+    if isinstance(metrics, dict):
+        metrics.setdefault('blockers', [])
+        metrics.setdefault('health', 'green')
+        metrics.setdefault('phase', 'unknown')
+        if 'overall_completion' not in metrics and isinstance(document.get('components'), dict):
+            try:
+                metrics['overall_completion'] = ComponentTree.from_json(document['components']).overall()
+            except (TypeError, KeyError, AttributeError):
+                pass  # reported by validation
+
+
+# version -> (next version, upgrade step)
+MIGRATIONS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], None]]] = {
+    '1.0': ('1.1', _migrate_1_0),
+}
+
+
+def _version_key(version: str) -> Tuple[int, ...]:
+    try:
+        return tuple(int(part) for part in version.split('.'))
+    except ValueError:
+        raise SchemaError([('metadata.format_version', f"expected a version like \"1.1\", got {_describe(version)}")])
+
+
+def migrate(document: Dict[str, Any]) -> bool:
+    """Upgrade `document` in place to CURRENT_VERSION. Returns whether anything ran."""
+    if not isinstance(document, dict):
+        raise SchemaError([('', f"expected an object, got {_describe(document)}")])
+    metadata = document.setdefault('metadata', {})
+    if not isinstance(metadata, dict):
+        raise SchemaError([('metadata', f"expected an object, got {_describe(metadata)}")])
+    version = metadata.get('format_version', UNVERSIONED)
+    if not isinstance(version, str):
+        raise SchemaError([('metadata.format_version', f"expected a string, got {_describe(version)}")])
+    if version == CURRENT_VERSION:
+        return False
+    if _version_key(version) > _version_key(CURRENT_VERSION):
+        raise SchemaError([('metadata.format_version',
+                            f"version {version} is newer than this tool supports ({CURRENT_VERSION})")])
+
+    while version != CURRENT_VERSION:
+        if version not in MIGRATIONS:
+            raise SchemaError([('metadata.format_version', f"no migration from version {version}")])
+        version, step = MIGRATIONS[version]
+        step(document)
+    metadata['format_version'] = version
+    return True
+
+
+def _check_dependency_cycles(task_metadata: Dict[str, Any], errors: Errors) -> None:
+    # A cycle is well-formed JSON but no task on it could ever start
+    depends_on = {task: meta['depends_on'] for task, meta in task_metadata.items() if meta.get('depends_on')}
+    cycle = dependency_cycle(depends_on)
+    if cycle is not None:
+        errors.append((_join(_join('task_metadata', cycle[-1]), 'depends_on'),
+                       f"dependency cycle: {' → '.join(cycle)}"))
+
+
+def validate(document: Any, source: str = 'progress.json') -> None:
+    """Raise SchemaError listing every problem in a (migrated) progress document."""
+    errors: Errors = []
+    progress_checker()(document, '', errors)
+    if not errors:
+        _check_dependency_cycles(document.get('task_metadata', {}), errors)
+    if errors:
+        raise SchemaError(errors, source)
+
+
+def load_document(document: Any, source: str = 'progress.json') -> Dict[str, Any]:
+    """Migrate a freshly parsed progress document to the current version and validate it."""
+    try:
+        migrate(document)
+    except SchemaError as e:
+        raise SchemaError(e.errors, source) from None
+    validate(document, source)
+    return document
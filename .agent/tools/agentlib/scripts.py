@@ -0,0 +1,17 @@
+"""
+Import the hyphenated tool scripts (update-progress.py, ...) as modules.
+"""
+
+import importlib.util
+from pathlib import Path
+from types import ModuleType
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_tool(name: str) -> ModuleType:
+    """Import `.agent/tools/<name>.py` without running its `__main__` block."""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), TOOLS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
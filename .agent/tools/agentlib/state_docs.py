@@ -0,0 +1,218 @@
+"""
+Structured parsing of .agent/current/state.md and blockers.md.
+
+Both files are free-form markdown kept by hand, so the parsers only rely on
+the conventions the files already follow: `##`/`###` headings, `- ` bullet
+items and `**Key**: value` fields. A blockers.md `###` heading under an
+"Active", "Potential" or "Resolved" section is one blocker; its fields give
+severity (or impact), dates and resolution. Parsed records are plain dicts,
+cached in-process and on disk under the file's content hash, so unchanged
+files are never re-parsed.
+
+`derive_metrics()` turns the active blockers into progress.json's
+`metrics.blockers` and `metrics.health`.
+"""
+
+import hashlib
+import json
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import profiling
+from .fsutil import atomic_write_text
+
+PARSER_VERSION = 1
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+BLOCKER_STATUSES = ('active', 'potential', 'resolved')
+
+HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*$')
+FIELD = re.compile(r'^\*\*([^*]+)\*\*:\s*(.*)$')
+ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+# Leading emoji / symbols and list numbering in headings ("🚧 Active", "1. Title")
+_HEADING_PREFIX = re.compile(r'^[^\w*(]+|^\d+\.\s+')
+_RESOLVED_MARK = re.compile(r'\s*\*?\((resolved)\)\*?\s*$', re.IGNORECASE)
+
+# Field names read for each blocker attribute, in order of preference
+_SINCE_FIELDS = ('since', 'opened', 'date opened', 'date reported', 'reported', 'date')
+_RESOLVED_FIELDS = ('date resolved', 'resolved')
+
+
+def clean_heading(title: str) -> str:
+    """Strip decorative emoji and numbering from a heading."""
+    previous = None
+    while previous != title:
+        previous = title
+        title = _HEADING_PREFIX.sub('', title).strip()
+    return title
+
+
+def parse_sections(text: str) -> List[Dict[str, Any]]:
+    """Split markdown into heading sections with their bullet items and fields.
+
+    Each section is {"level", "title", "items", "fields", "text"}; text before
+    the first heading is a level-0 section with an empty title.
+    """
+    sections = [{'level': 0, 'title': '', 'items': [], 'fields': {}, 'text': []}]
+    for line in text.splitlines():
+        heading = HEADING.match(line)
+        if heading:
+            sections.append({'level': len(heading.group(1)), 'title': clean_heading(heading.group(2)),
+                             'items': [], 'fields': {}, 'text': []})
+            continue
+
+        section = sections[-1]
+        stripped = line.strip()
+        if not stripped:
+            continue
+        section['text'].append(stripped)
+        content = stripped[2:].strip() if stripped.startswith(('- ', '* ')) else None
+        field = FIELD.match(content if content is not None else stripped)
+        if field:
+            section['fields'][field.group(1).strip().lower()] = field.group(2).strip()
+        elif content is not None:
+            section['items'].append(content)
+
+    for section in sections:
+        section['text'] = '\n'.join(section['text'])
+    return [section for section in sections if section['title'] or section['text']]
+
+
+def parse_state(text: str) -> Dict[str, Any]:
+    """Parse state.md into its title, top-level fields and sections."""
+    sections = parse_sections(text)
+    title = next((s['title'] for s in sections if s['level'] == 1), '')
+    fields: Dict[str, str] = {}
+    for section in sections:
+        if section['level'] <= 2:
+            for key, value in section['fields'].items():
+                fields.setdefault(key, value)
+    return {'title': title, 'fields': fields, 'sections': sections}
+
+
+def _status_of_section(title: str) -> Optional[str]:
+    lowered = title.lower()
+    if 'resolved' in lowered:
+        return 'resolved'
+    if 'potential' in lowered or 'issue' in lowered or 'risk' in lowered:
+        return 'potential'
+    if 'active' in lowered or 'blocker' in lowered:
+        return 'active'
+    return None
+
+
+def _severity(fields: Dict[str, str]) -> Optional[str]:
+    for key in ('severity', 'priority', 'impact'):
+        value = fields.get(key, '').lower()
+        for severity in SEVERITIES:
+            if value.startswith(severity):
+                return severity
+    return None
+
+
+def _date_field(fields: Dict[str, str], names: tuple) -> Optional[str]:
+    for name in names:
+        match = ISO_DATE.search(fields.get(name, ''))
+        if match:
+            return match.group(0)
+    return None
+
+
+def _blocker(title: str, status: str, fields: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        'title': title,
+        'status': status,
+        'severity': _severity(fields),
+        'since': _date_field(fields, _SINCE_FIELDS),
+        'resolved_on': _date_field(fields, _RESOLVED_FIELDS),
+        'fields': fields,
+    }
+
+
+def parse_blockers(text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Parse blockers.md into active, potential and resolved blocker records."""
+    blockers: Dict[str, List[Dict[str, Any]]] = {status: [] for status in BLOCKER_STATUSES}
+    status = None
+    for section in parse_sections(text):
+        if section['level'] <= 2:
+            status = _status_of_section(section['title']) if section['level'] == 2 else None
+            if status is not None:
+                # Plain bullets directly under a status heading are one-line blockers
+                for item in section['items']:
+                    blockers[status].append(_blocker(item, status, {}))
+            continue
+        if status is None:
+            continue
+
+        title = section['title']
+        entry_status = status
+        if _RESOLVED_MARK.search(title):
+            title = _RESOLVED_MARK.sub('', title)
+            entry_status = 'resolved'
+        blockers[entry_status].append(_blocker(title, entry_status, section['fields']))
+    return blockers
+
+
+def blocker_age(blocker: Dict[str, Any], today: Optional[date] = None) -> Optional[int]:
+    """Days since a blocker was raised (until it was resolved), if it is dated."""
+    if not blocker.get('since'):
+        return None
+    start = datetime.strptime(blocker['since'], '%Y-%m-%d').date()
+    end = datetime.strptime(blocker['resolved_on'], '%Y-%m-%d').date() if blocker.get('resolved_on') else None
+    return ((end or today or date.today()) - start).days
+
+
+def derive_health(blockers: Dict[str, List[Dict[str, Any]]]) -> str:
+    """red with a critical/high active blocker, yellow with any active blocker, else green."""
+    active = blockers.get('active', [])
+    if any(blocker['severity'] in ('critical', 'high') for blocker in active):
+        return 'red'
+    return 'yellow' if active else 'green'
+
+
+def derive_metrics(metrics: Dict[str, Any], blockers: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Set metrics["blockers"] (active blocker titles) and metrics["health"] from parsed blockers."""
+    metrics['blockers'] = [blocker['title'] for blocker in blockers.get('active', [])]
+    metrics['health'] = derive_health(blockers)
+
+
+def apply_blockers(progress: Dict[str, Any], blockers: Optional[Dict[str, List[Dict[str, Any]]]]) -> Dict[str, Any]:
+    """Derive progress metrics from parsed blockers (left as stored without blockers.md)."""
+    if blockers is not None:
+        derive_metrics(progress.setdefault('metrics', {}), blockers)
+    return progress
+
+
+_parsed: Dict[str, Any] = {}
+
+
+def load_parsed(path: Path, parser: Callable[[str], Any], cache_dir: Optional[Path] = None) -> Any:
+    """Parse `path`, reusing the in-process or on-disk result for the same content hash."""
+    data = path.read_bytes()
+    profiling.record_read(len(data))
+    digest = hashlib.sha256(f'{PARSER_VERSION}:{parser.__name__}:'.encode() + data).hexdigest()[:16]
+
+    if digest in _parsed:
+        return _parsed[digest]
+
+    parsed = None
+    cache_file = cache_dir / f'{path.stem}-{digest}.json' if cache_dir else None
+    if cache_file is not None:
+        try:
+            with open(cache_file, 'r') as f:
+                parsed = json.load(f)
+        except (OSError, ValueError):
+            parsed = None
+
+    if parsed is None:
+        with profiling.span(f'parse {path.name}'):
+            parsed = parser(data.decode('utf-8', errors='replace'))
+        if cache_file is not None:
+            try:
+                atomic_write_text(cache_file, json.dumps(parsed))
+            except OSError:
+                pass
+
+    _parsed[digest] = parsed
+    return parsed
@@ -0,0 +1,360 @@
+"""
+Task dependency graph with incremental ordering and critical path.
+
+Tasks may depend on other tasks ("depends_on" in task metadata). The graph
+keeps both directions of every edge in an adjacency index and maintains,
+per task:
+
+- unmet:  prerequisites not completed yet; a pending task with none is ready
+- depth:  length of its longest prerequisite chain, so sorting by depth is a
+          topological order
+- tail:   remaining work on the longest chain starting at the task (its own
+          estimate unless completed, plus the largest tail among its
+          dependents), i.e. the critical path through it
+
+The graph is built once in O(tasks + edges), and only tasks with edges take
+part in the topological sort. After that a status, estimate or dependency
+change only revisits the tasks whose values actually change: depth flows down
+to dependents, tail flows up to prerequisites, and unmet counts change for
+direct dependents only. `next_tasks()` ranks the ready set by priority, then
+by critical path, without looking at blocked tasks.
+
+A prerequisite that is not a task yet counts as unmet until it is added.
+"""
+
+import heapq
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+COMPLETED = 'completed'
+IN_PROGRESS = 'in_progress'
+PENDING = 'pending'
+DEFAULT_ESTIMATE = 1.0
+
+_NONE: Set[str] = frozenset()  # type: ignore[assignment]
+
+
+class DependencyCycleError(ValueError):
+    """Adding the requested edges would make a task depend on itself."""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__(f"Task dependency cycle: {' → '.join(cycle)}")
+
+
+def dependency_cycle(depends_on: Dict[str, Iterable[str]]) -> Optional[List[str]]:
+    """Any cycle in a task → prerequisites mapping (prerequisites first), or None.
+
+    Only visits tasks with prerequisites, so it is cheap enough to run on
+    every load without building the graph.
+    """
+    done: Set[str] = set()
+    for start in depends_on:
+        if start in done:
+            continue
+        # Iterative depth-first search; `path` holds the tasks being visited
+        path = [start]
+        on_path = {start: 0}
+        stack = [iter(depends_on[start])]
+        while stack:
+            dep = next(stack[-1], None)
+            if dep is None:
+                task = path.pop()
+                del on_path[task]
+                done.add(task)
+                stack.pop()
+            elif dep in on_path:
+                return (path[on_path[dep]:] + [dep])[::-1]
+            elif dep not in done and dep in depends_on:
+                on_path[dep] = len(path)
+                path.append(dep)
+                stack.append(iter(depends_on[dep]))
+    return None
+
+
+class TaskGraph:
+    """Adjacency index over task dependencies with incrementally maintained order and critical path."""
+
+    def __init__(self) -> None:
+        # Only tasks with edges have adjacency entries
+        self.deps: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+        # None marks a prerequisite that is not a task yet
+        self._status: Dict[str, Optional[str]] = {}
+        self._priority: Dict[str, int] = {}
+        self._estimate: Dict[str, float] = {}
+        self._unmet: Dict[str, int] = {}
+        self._depth: Dict[str, int] = {}
+        self._tail: Dict[str, float] = {}
+        # Order within a status breaks ties, so rankings are stable
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        self._ready: Set[str] = set()
+
+    @classmethod
+    def build(cls, statuses: Dict[str, str], metadata: Dict[str, Dict[str, Any]]) -> 'TaskGraph':
+        """Build the graph for every task at once (O(tasks + edges)).
+
+        `statuses` maps task -> status in display order (each status's tasks in list order).
+        """
+        graph = cls()
+        status = graph._status
+        status.update(statuses)
+        graph._seq = {task: index for index, task in enumerate(statuses)}
+        deps, dependents = graph.deps, graph.dependents
+        for task, meta in metadata.items():
+            if 'priority' in meta:
+                graph._priority[task] = meta['priority']
+            if 'estimate' in meta:
+                graph._estimate[task] = meta['estimate']
+            prerequisites = meta.get('depends_on')
+            if not prerequisites:
+                continue
+            deps[task] = set(prerequisites)
+            for dep in prerequisites:
+                if dep not in status:
+                    status[dep] = None
+                    graph._seq[dep] = len(graph._seq)
+                waiting = dependents.get(dep)
+                if waiting is None:
+                    dependents[dep] = {task}
+                else:
+                    waiting.add(task)
+
+        graph._next_seq = len(graph._seq)
+        estimate = graph._estimate.get
+        depth = graph._depth = dict.fromkeys(status, 0)
+        unmet = graph._unmet = dict.fromkeys(status, 0)
+        tail = graph._tail = {task: 0.0 if state == COMPLETED else estimate(task, DEFAULT_ESTIMATE)
+                              for task, state in status.items()}
+
+        # Kahn's algorithm over the tasks with edges; depth and unmet counts
+        # are pushed to dependents as each task is ordered, tail is pulled
+        # from dependents in reverse order
+        remaining = {task: len(prerequisites) for task, prerequisites in deps.items()}
+        order = [task for task in dependents if task not in remaining]
+        for task in order:
+            next_depth = depth[task] + 1
+            done = status[task] == COMPLETED
+            for dependent in dependents.get(task, _NONE):
+                if depth[dependent] < next_depth:
+                    depth[dependent] = next_depth
+                if not done:
+                    unmet[dependent] += 1
+                left = remaining[dependent] - 1
+                remaining[dependent] = left
+                if not left:
+                    order.append(dependent)
+        stuck = next((task for task, count in remaining.items() if count), None)
+        if stuck is not None:
+            raise DependencyCycleError(graph._cycle_from(stuck, remaining))
+
+        for task in reversed(order):
+            waiting = dependents.get(task)
+            if waiting:
+                tail[task] += max(map(tail.__getitem__, waiting))
+        graph._ready = {task for task, state in status.items() if state == PENDING and not unmet[task]}
+        return graph
+
+    # Queries
+
+    def __contains__(self, task: str) -> bool:
+        return self._status.get(task) is not None
+
+    def depth(self, task: str) -> int:
+        return self._depth[task]
+
+    def critical_length(self, task: str) -> float:
+        """Remaining estimated work on the longest chain starting at `task`."""
+        return self._tail[task]
+
+    def priority(self, task: str) -> int:
+        return self._priority.get(task, 0)
+
+    def estimate(self, task: str) -> float:
+        return self._estimate.get(task, DEFAULT_ESTIMATE)
+
+    def unmet(self, task: str) -> List[str]:
+        """Prerequisites of `task` that are not completed."""
+        return sorted(dep for dep in self.deps.get(task, _NONE) if self._status[dep] != COMPLETED)
+
+    def blocks(self, task: str) -> int:
+        """Number of unfinished tasks waiting directly on `task`."""
+        return sum(1 for dependent in self.dependents.get(task, _NONE) if self._status[dependent] != COMPLETED)
+
+    def is_ready(self, task: str) -> bool:
+        return task in self._ready
+
+    def _rank_key(self) -> Callable[[str], Tuple[int, float, int, int]]:
+        priority, tail, depth, seq = self._priority.get, self._tail, self._depth, self._seq
+        return lambda task: (-priority(task, 0), -tail[task], depth[task], seq[task])
+
+    def next_tasks(self, limit: Optional[int] = None) -> List[str]:
+        """Ready (unblocked, pending) tasks: highest priority, then longest critical path first."""
+        if limit is None:
+            return sorted(self._ready, key=self._rank_key())
+        return heapq.nsmallest(limit, self._ready, key=self._rank_key())
+
+    def blocked(self) -> List[str]:
+        """Pending tasks still waiting on a prerequisite, in topological order."""
+        return sorted((task for task in self.deps if self._status[task] == PENDING and self._unmet[task]),
+                      key=lambda task: (self._depth[task], self._seq[task]))
+
+    def topological_order(self) -> List[str]:
+        """Every task after all of its prerequisites."""
+        return sorted((task for task, state in self._status.items() if state is not None),
+                      key=lambda task: (self._depth[task], self._seq[task]))
+
+    def critical_path(self) -> List[str]:
+        """The unfinished chain with the most remaining estimated work.
+
+        Ties go to tasks already in progress, then to the earlier task in its list.
+        """
+        tail, status, seq = self._tail, self._status, self._seq
+
+        def key(task: str) -> Tuple[float, bool, int]:
+            return tail[task], status[task] == IN_PROGRESS, -seq[task]
+
+        open_tasks = [task for task, state in status.items() if state is not None and state != COMPLETED]
+        if not open_tasks:
+            return []
+        task = max(open_tasks, key=key)
+        path = [task]
+        while True:
+            candidates = [d for d in self.dependents.get(task, _NONE) if status[d] != COMPLETED]
+            if not candidates:
+                return path
+            task = max(candidates, key=key)
+            path.append(task)
+
+    def find_cycle(self, task: str, depends_on: Iterable[str]) -> Optional[List[str]]:
+        """The cycle making `task` depend on `depends_on` would create (prerequisites first), or None."""
+        for dep in depends_on:
+            if dep == task:
+                return [task, task]
+            # A cycle exists if `task` is already a prerequisite of `dep`
+            path = self._path(task, dep)
+            if path is not None:
+                return path + [task]
+        return None
+
+    # Updates
+
+    def set_status(self, task: str, status: str) -> None:
+        if task not in self._status:
+            self._add(task, status)
+            return
+        previous = self._status[task]
+        self._status[task] = status
+        if previous != status:
+            # Moved tasks go to the end of their new status
+            self._seq[task] = self._next_seq
+            self._next_seq += 1
+        if (previous == COMPLETED) != (status == COMPLETED):
+            change = -1 if status == COMPLETED else 1
+            for dependent in self.dependents.get(task, _NONE):
+                self._unmet[dependent] += change
+                self._update_ready(dependent)
+            self._propagate_tail([task])
+        self._update_ready(task)
+
+    def set_priority(self, task: str, priority: int) -> None:
+        self._priority[task] = priority
+
+    def set_estimate(self, task: str, estimate: float) -> None:
+        self._estimate[task] = estimate
+        self._propagate_tail([task])
+
+    def set_dependencies(self, task: str, depends_on: Iterable[str]) -> None:
+        """Replace the prerequisites of `task` (raises DependencyCycleError)."""
+        new = set(depends_on)
+        cycle = self.find_cycle(task, new)
+        if cycle is not None:
+            raise DependencyCycleError(cycle)
+        for dep in new:
+            if dep not in self._status:
+                self._add(dep, None)
+
+        old = self.deps.pop(task, set())
+        for dep in old - new:
+            self.dependents[dep].discard(task)
+            if not self.dependents[dep]:
+                del self.dependents[dep]
+        for dep in new - old:
+            self.dependents.setdefault(dep, set()).add(task)
+        if new:
+            self.deps[task] = new
+        self._unmet[task] = sum(1 for dep in new if self._status[dep] != COMPLETED)
+        self._update_ready(task)
+        self._propagate_depth(task)
+        self._propagate_tail(old ^ new)
+
+    # Internals
+
+    def _add(self, task: str, status: Optional[str]) -> None:
+        self._status[task] = status
+        self._seq[task] = self._next_seq
+        self._next_seq += 1
+        self._depth[task] = self._unmet[task] = 0
+        self._tail[task] = self._own(task)
+        self._update_ready(task)
+
+    def _own(self, task: str) -> float:
+        return 0.0 if self._status[task] == COMPLETED else self.estimate(task)
+
+    def _update_ready(self, task: str) -> None:
+        if self._status[task] == PENDING and not self._unmet[task]:
+            self._ready.add(task)
+        else:
+            self._ready.discard(task)
+
+    def _propagate_depth(self, start: str) -> None:
+        queue = deque([start])
+        while queue:
+            task = queue.popleft()
+            deps = self.deps.get(task)
+            depth = 1 + max(self._depth[dep] for dep in deps) if deps else 0
+            if depth != self._depth[task]:
+                self._depth[task] = depth
+                queue.extend(self.dependents.get(task, _NONE))
+
+    def _propagate_tail(self, starts: Iterable[str]) -> None:
+        queue = deque(starts)
+        while queue:
+            task = queue.popleft()
+            tail = self._own(task) + max((self._tail[d] for d in self.dependents.get(task, _NONE)), default=0.0)
+            if tail != self._tail[task]:
+                self._tail[task] = tail
+                queue.extend(self.deps.get(task, _NONE))
+
+    def _path(self, source: str, target: str) -> Optional[List[str]]:
+        """A chain of dependents leading from `source` to `target`, if any."""
+        parents: Dict[str, Optional[str]] = {source: None}
+        queue = deque([source])
+        while queue:
+            task = queue.popleft()
+            if task == target:
+                path = []
+                node: Optional[str] = task
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                return path[::-1]
+            for dependent in self.dependents.get(task, _NONE):
+                if dependent not in parents:
+                    parents[dependent] = task
+                    queue.append(dependent)
+        return None
+
+    def _cycle_from(self, start: str, remaining: Dict[str, int]) -> List[str]:
+        """A cycle among the tasks Kahn's algorithm could not order, prerequisites first."""
+        seen: Dict[str, int] = {}
+        path: List[str] = []
+        task = start
+        while task not in seen:
+            seen[task] = len(path)
+            path.append(task)
+            # A stuck task always has a stuck prerequisite
+            # (prerequisites without prerequisites of their own have no `remaining` entry)
+            task = next(dep for dep in self.deps[task] if remaining.get(dep))
+        return (path[seen[task]:] + [task])[::-1]
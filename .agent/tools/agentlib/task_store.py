@@ -0,0 +1,179 @@
+"""
+Indexed task store for progress["tasks"].
+
+Keeps a task -> status index next to one insertion-ordered dict per status,
+so membership checks and moves between statuses are O(1) and each status
+keeps a stable order. It is a read-only Mapping of status -> list of task
+names, matching the JSON layout, so existing readers such as
+`tasks.get('pending', [])` keep working unchanged.
+
+Priority, estimate and dependencies live in the task metadata next to the
+owner. The dependency graph (see task_graph.py) is only built when first
+asked for, so plain listings do not pay for it; once built it is updated
+with every status or dependency change.
+"""
+
+from collections.abc import Mapping
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+from .task_graph import DependencyCycleError, TaskGraph
+
+TASK_STATUSES = ["completed", "in_progress", "pending"]
+# Metadata that makes the next-task order differ from the pending list order
+PLANNING_FIELDS = ("priority", "estimate", "depends_on")
+
+
+class TaskStore(Mapping):
+    """Tasks grouped by status with an O(1) task -> status index."""
+
+    def __init__(self, statuses: Optional[List[str]] = None):
+        self._by_status: Dict[str, Dict[str, None]] = {status: {} for status in (statuses or TASK_STATUSES)}
+        self._status: Dict[str, str] = {}
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._lists: Dict[str, List[str]] = {}
+        self._graph: Optional[TaskGraph] = None
+        # Whether any task has ever had planning metadata (never reset)
+        self._planned = False
+
+    @classmethod
+    def from_json(cls, tasks: Dict[str, List[str]],
+                  metadata: Optional[Dict[str, Dict[str, Any]]] = None) -> 'TaskStore':
+        """Build a store from the serialized list layout (plus optional metadata)."""
+        store = cls(TASK_STATUSES + [status for status in tasks if status not in TASK_STATUSES])
+        for status, names in tasks.items():
+            bucket = store._by_status[status]
+            for name in names:
+                previous = store._status.get(name)
+                if previous is not None:
+                    # Duplicates across lists: the last occurrence wins
+                    del store._by_status[previous][name]
+                bucket[name] = None
+                store._status[name] = status
+        store._meta = {name: dict(meta) for name, meta in (metadata or {}).items() if name in store._status}
+        store._planned = any(field in meta for meta in store._meta.values() for field in PLANNING_FIELDS)
+        return store
+
+    def to_json(self) -> Dict[str, List[str]]:
+        """Serialize back to {status: [task, ...]}."""
+        return {status: list(bucket) for status, bucket in self._by_status.items()}
+
+    def metadata_json(self) -> Dict[str, Dict[str, Any]]:
+        """Serialize per-task metadata (only tasks that have any)."""
+        return {name: dict(meta) for name, meta in self._meta.items() if meta}
+
+    # Mapping interface: status -> list of task names
+
+    def __getitem__(self, status: str) -> List[str]:
+        # Lists are cached until the status changes; treat them as read-only
+        cached = self._lists.get(status)
+        if cached is None:
+            cached = self._lists[status] = list(self._by_status[status])
+        return cached
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_status)
+
+    def __len__(self) -> int:
+        return len(self._by_status)
+
+    # Task operations
+
+    def status_of(self, task: str) -> Optional[str]:
+        """Current status of a task, or None if unknown."""
+        return self._status.get(task)
+
+    def metadata(self, task: str) -> Dict[str, Any]:
+        """Metadata recorded for a task (owner, created, updated)."""
+        return dict(self._meta.get(task, {}))
+
+    @property
+    def graph(self) -> TaskGraph:
+        """The dependency graph, built on first use and kept up to date afterwards."""
+        if self._graph is None:
+            ordered = {task: status for status, bucket in self._by_status.items() for task in bucket}
+            self._graph = TaskGraph.build(ordered, self._meta)
+        return self._graph
+
+    def is_planned(self) -> bool:
+        """True when any task has (or had) a priority, estimate or prerequisites."""
+        return self._planned
+
+    def next_tasks(self, limit: Optional[int] = None) -> List[str]:
+        """Unblocked pending tasks, highest priority and longest critical path first.
+
+        Without any planning metadata that is simply the pending list, so the
+        graph is not built just to find that out.
+        """
+        if self._graph is None and not self.is_planned():
+            return list(islice(self._by_status.get("pending", {}), limit))
+        return self.graph.next_tasks(limit)
+
+    def count(self, status: Optional[str] = None) -> int:
+        """Number of tasks, optionally in a single status."""
+        if status is None:
+            return len(self._status)
+        return len(self._by_status.get(status, {}))
+
+    def set_status(self, task: str, status: str, owner: Optional[str] = None,
+                   ts: Optional[str] = None, priority: Optional[int] = None,
+                   estimate: Optional[float] = None, depends_on: Optional[List[str]] = None) -> Optional[str]:
+        """Add or move a task, optionally setting its priority, estimate or prerequisites.
+
+        Returns its previous status. A task moved to a new status goes to the
+        end of that status; setting the status it already has keeps its
+        position. Prerequisites that would form a cycle raise
+        DependencyCycleError before anything changes.
+        """
+        if depends_on is not None:
+            cycle = self.graph.find_cycle(task, depends_on)
+            if cycle is not None:
+                raise DependencyCycleError(cycle)
+        if status not in self._by_status:
+            raise KeyError(f"Unknown task status: {status}")
+
+        previous = self._status.get(task)
+        if previous != status:
+            if previous is not None:
+                del self._by_status[previous][task]
+                self._lists.pop(previous, None)
+            self._by_status[status][task] = None
+            self._lists.pop(status, None)
+            self._status[task] = status
+
+        if ts is not None or owner is not None:
+            meta = self._meta.setdefault(task, {})
+            if ts is not None:
+                meta.setdefault("created", ts)
+                if previous != status:
+                    meta["updated"] = ts
+            if owner is not None:
+                meta["owner"] = owner
+        if priority is not None or estimate is not None or depends_on:
+            self._planned = True
+        if priority is not None:
+            self._meta.setdefault(task, {})["priority"] = priority
+        if estimate is not None:
+            self._meta.setdefault(task, {})["estimate"] = estimate
+        if depends_on is not None:
+            meta = self._meta.setdefault(task, {})
+            if depends_on:
+                meta["depends_on"] = list(dict.fromkeys(depends_on))
+            else:
+                meta.pop("depends_on", None)
+
+        graph = self._graph
+        if graph is not None:
+            if previous != status:
+                graph.set_status(task, status)
+            if priority is not None:
+                graph.set_priority(task, priority)
+            if estimate is not None:
+                graph.set_estimate(task, estimate)
+            if depends_on is not None:
+                graph.set_dependencies(task, depends_on)
+        return previous
+
+    def dependency_cycle(self, task: str, depends_on: List[str]) -> Optional[List[str]]:
+        """The cycle that making `task` depend on `depends_on` would create, or None."""
+        return self.graph.find_cycle(task, depends_on)
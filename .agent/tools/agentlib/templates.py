@@ -0,0 +1,93 @@
+"""
+Compiled, cached templates for agent reports.
+
+Templates are plain text with `{{ name }}` placeholders. A template is
+compiled once into a list of literal and placeholder parts and the compiled
+form is cached on disk under its content hash, so unchanged templates are
+never re-parsed. Rendering streams parts to a writer; placeholder values may
+be strings, iterables of strings (e.g. generators for large sections) or
+callables returning either.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import profiling
+from .fsutil import atomic_write_text
+
+COMPILER_VERSION = 1
+PLACEHOLDER = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
+
+# ("text", literal) or ("var", name)
+Part = Tuple[str, str]
+
+
+def compile_template(source: str) -> List[Part]:
+    """Split template source into literal and placeholder parts."""
+    parts: List[Part] = []
+    position = 0
+    for match in PLACEHOLDER.finditer(source):
+        if match.start() > position:
+            parts.append(('text', source[position:match.start()]))
+        parts.append(('var', match.group(1)))
+        position = match.end()
+    if position < len(source):
+        parts.append(('text', source[position:]))
+    return parts
+
+
+_compiled: Dict[str, List[Part]] = {}
+
+
+def load_template(path: Path, cache_dir: Optional[Path] = None) -> List[Part]:
+    """Load a compiled template, reusing the in-process or on-disk cache by content hash."""
+    source = path.read_text()
+    profiling.record_file_read(path)
+    digest = hashlib.sha256(f'{COMPILER_VERSION}:{source}'.encode()).hexdigest()[:16]
+
+    if digest in _compiled:
+        return _compiled[digest]
+
+    parts = None
+    cache_file = cache_dir / f'{path.stem}-{digest}.json' if cache_dir else None
+    if cache_file is not None:
+        try:
+            with open(cache_file, 'r') as f:
+                parts = [tuple(part) for part in json.load(f)]
+        except (OSError, ValueError):
+            parts = None
+
+    if parts is None:
+        parts = compile_template(source)
+        if cache_file is not None:
+            try:
+                atomic_write_text(cache_file, json.dumps(parts))
+            except OSError:
+                pass
+
+    _compiled[digest] = parts
+    return parts
+
+
+def render(parts: List[Part], context: Dict[str, Any], write: Callable[[str], Any]) -> None:
+    """Stream a compiled template to `write` (e.g. a file's or StringIO's write)."""
+    for kind, value in parts:
+        if kind == 'text':
+            write(value)
+            continue
+
+        if value not in context:
+            raise KeyError(f"Template variable '{value}' is not defined")
+        section = context[value]
+        if callable(section):
+            section = section()
+        if isinstance(section, str):
+            write(section)
+        elif isinstance(section, Iterable):
+            for chunk in section:
+                write(chunk)
+        else:
+            write(str(section))
@@ -0,0 +1,234 @@
+"""
+Compact binary time series of progress scores.
+
+The file holds a fixed header and one ring buffer per retention tier. Every
+record is a fixed 16-byte (timestamp f64, series id u32, value f32) struct,
+so tiers are plain arrays addressed by index. Tier 0 keeps raw points; when
+a tier is full its oldest point is folded into the next, coarser tier (last
+value per series and bucket, e.g. hourly then daily) and the last tier drops
+its oldest points. Records in a tier are in timestamp order, so time windows
+are found by binary search.
+
+Series names live in a sidecar `<file>.names` (one per line, line number =
+series id). Writers must hold the exclusive state lock.
+"""
+
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b'AGTS'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+TIER = struct.Struct('<IIII')  # bucket seconds, capacity, head, count
+RECORD = struct.Struct('<dIf')
+DATA_ALIGN = 64
+
+# (bucket seconds, capacity): raw points, hourly and daily downsamples
+DEFAULT_TIERS: Tuple[Tuple[int, int], ...] = ((0, 2048), (3600, 4096), (86400, 8192))
+
+Point = Tuple[float, float]
+
+# Shorter histories give meaningless per-day rates (one session's burst)
+MIN_VELOCITY_SPAN = 86400
+
+
+class TimeSeries:
+    """Fixed-size, mmap-backed multi-series store with tiered retention."""
+
+    def __init__(self, path: Path, tiers: Sequence[Tuple[int, int]] = DEFAULT_TIERS):
+        self.path = path
+        self.names_path = path.with_name(path.name + '.names')
+        if not path.exists():
+            self._create(tiers)
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, tier_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a version {VERSION} progress series file: {path}")
+        self._tier_count = tier_count
+        self._offsets = []
+        offset = self._data_start(tier_count)
+        for tier in range(tier_count):
+            self._offsets.append(offset)
+            offset += self._tier(tier)[1] * RECORD.size
+        self._names = self._read_names()
+        self._ids = {name: index for index, name in enumerate(self._names)}
+
+    def __enter__(self) -> 'TimeSeries':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    @staticmethod
+    def _data_start(tier_count: int) -> int:
+        end = HEADER.size + tier_count * TIER.size
+        return (end + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
+
+    def _create(self, tiers: Sequence[Tuple[int, int]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = HEADER.pack(MAGIC, VERSION, len(tiers))
+        header += b''.join(TIER.pack(bucket, capacity, 0, 0) for bucket, capacity in tiers)
+        size = self._data_start(len(tiers)) + sum(capacity for _, capacity in tiers) * RECORD.size
+        tmp = self.path.with_name(f'.{self.path.name}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(header)
+            f.truncate(size)
+        os.replace(tmp, self.path)
+
+    # Tier bookkeeping -------------------------------------------------
+
+    def _tier(self, tier: int) -> Tuple[int, int, int, int]:
+        return TIER.unpack_from(self._map, HEADER.size + tier * TIER.size)
+
+    def _set_tier(self, tier: int, head: int, count: int) -> None:
+        bucket, capacity, _, _ = self._tier(tier)
+        TIER.pack_into(self._map, HEADER.size + tier * TIER.size, bucket, capacity, head, count)
+
+    def _record_offset(self, tier: int, index: int) -> int:
+        """Byte offset of the `index`-th oldest record of `tier`."""
+        _, capacity, head, _ = self._tier(tier)
+        return self._offsets[tier] + ((head + index) % capacity) * RECORD.size
+
+    def _read(self, tier: int, index: int) -> Tuple[float, int, float]:
+        return RECORD.unpack_from(self._map, self._record_offset(tier, index))
+
+    def _append(self, tier: int, ts: float, series: int, value: float) -> None:
+        bucket, capacity, head, count = self._tier(tier)
+        if count == capacity:
+            oldest = self._read(tier, 0)
+            if tier + 1 < self._tier_count:
+                self._downsample(tier + 1, *oldest)
+            head = (head + 1) % capacity
+            count -= 1
+            self._set_tier(tier, head, count)
+        RECORD.pack_into(self._map, self._offsets[tier] + ((head + count) % capacity) * RECORD.size,
+                         ts, series, value)
+        self._set_tier(tier, head, count + 1)
+
+    def _downsample(self, tier: int, ts: float, series: int, value: float) -> None:
+        """Fold a point evicted from the finer tier into `tier`.
+
+        Each bucket keeps the last point per series, so a downsampled point
+        still carries the real time of its value.
+        """
+        bucket, _, _, count = self._tier(tier)
+        if bucket:
+            # Points of the newest bucket sit at the end; replace this series' entry
+            for index in range(count - 1, -1, -1):
+                record_ts, record_series, _ = self._read(tier, index)
+                if record_ts // bucket != ts // bucket:
+                    break
+                if record_series == series:
+                    self._replace(tier, index, ts, series, value)
+                    return
+        self._append(tier, ts, series, value)
+
+    def _replace(self, tier: int, index: int, ts: float, series: int, value: float) -> None:
+        """Overwrite a record; moves it to the end of its bucket to keep timestamp order."""
+        count = self._tier(tier)[3]
+        for later in range(index + 1, count):
+            RECORD.pack_into(self._map, self._record_offset(tier, later - 1), *self._read(tier, later))
+        RECORD.pack_into(self._map, self._record_offset(tier, count - 1), ts, series, value)
+
+    # Series names -------------------------------------------------------
+
+    def _read_names(self) -> List[str]:
+        try:
+            with open(self.names_path, 'r') as f:
+                return [line.rstrip('\n') for line in f]
+        except FileNotFoundError:
+            return []
+
+    def series_id(self, name: str) -> int:
+        """Id of series `name`, registering it on first use."""
+        series = self._ids.get(name)
+        if series is None:
+            with open(self.names_path, 'a') as f:
+                f.write(name + '\n')
+                # The name must be durable before any record carries its id
+                f.flush()
+                os.fsync(f.fileno())
+            series = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return series
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    # Public API ---------------------------------------------------------
+
+    def append(self, points: Iterable[Tuple[str, float]], ts: Optional[float] = None) -> None:
+        """Record `(series name, value)` points at `ts` (default: now)."""
+        ts = time.time() if ts is None else ts
+        for name, value in points:
+            self._append(0, ts, self.series_id(name), value)
+        self._map.flush()
+
+    def last_values(self) -> Dict[str, float]:
+        """Most recent value of every series."""
+        values: Dict[int, float] = {}
+        for tier in reversed(range(self._tier_count)):
+            for _, series, value in self._iter_tier(tier, 0):
+                values[series] = value
+        return {self._names[series]: value for series, value in values.items()}
+
+    def _first_index_at(self, tier: int, since: float) -> int:
+        """Binary search for the first record of `tier` with timestamp >= since."""
+        low, high = 0, self._tier(tier)[3]
+        while low < high:
+            mid = (low + high) // 2
+            if self._read(tier, mid)[0] < since:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _iter_tier(self, tier: int, start: int) -> Iterator[Tuple[float, int, float]]:
+        _, capacity, head, count = self._tier(tier)
+        base = self._offsets[tier]
+        # At most two contiguous runs because of the ring wrap-around
+        first = (head + start) % capacity
+        remaining = count - start
+        while remaining > 0:
+            run = min(remaining, capacity - first)
+            chunk = self._map[base + first * RECORD.size:base + (first + run) * RECORD.size]
+            yield from RECORD.iter_unpack(chunk)
+            remaining -= run
+            first = 0
+
+    def points(self, names: Sequence[str], since: Optional[float] = None) -> Dict[str, List[Point]]:
+        """Chronological `(timestamp, value)` points per series, oldest tier first."""
+        wanted = {self._ids[name]: name for name in names if name in self._ids}
+        result: Dict[str, List[Point]] = {name: [] for name in names}
+        # Coarser tiers only ever hold points older than finer ones
+        for tier in reversed(range(self._tier_count)):
+            start = self._first_index_at(tier, since) if since is not None else 0
+            for ts, series, value in self._iter_tier(tier, start):
+                name = wanted.get(series)
+                if name is not None:
+                    result[name].append((ts, value))
+        return result
+
+
+def velocity(points: List[Point]) -> Optional[float]:
+    """Least-squares slope in points per day, or None when the points span under a day."""
+    if len(points) < 2 or points[-1][0] - points[0][0] < MIN_VELOCITY_SPAN:
+        return None
+    n = len(points)
+    mean_t = sum(ts for ts, _ in points) / n
+    mean_v = sum(value for _, value in points) / n
+    var_t = sum((ts - mean_t) ** 2 for ts, _ in points)
+    if var_t == 0:
+        return None
+    slope = sum((ts - mean_t) * (value - mean_v) for ts, value in points) / var_t
+    return slope * 86400
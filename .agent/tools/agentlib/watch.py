@@ -0,0 +1,152 @@
+"""
+File change notification for the agent daemon.
+
+Uses Linux inotify through ctypes when available and falls back to polling
+file mtimes elsewhere. Watchers observe single directories (non-recursive),
+optionally restricted to a set of file names, and call `callback` with the
+changed paths.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# (directory, file names to watch or None for every file)
+WatchTarget = Tuple[Path, Optional[Set[str]]]
+Callback = Callable[[List[Path]], None]
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _interesting(name: str, names: Optional[Set[str]]) -> bool:
+    if names is not None:
+        return name in names
+    # Skip lock files and atomic-write temporaries
+    return not name.startswith('.')
+
+
+class PollingWatcher:
+    """Portable watcher that compares file stats every `interval` seconds."""
+
+    def __init__(self, targets: Iterable[WatchTarget], callback: Callback, interval: float = 1.0):
+        self.targets = list(targets)
+        self.callback = callback
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        stats = {}
+        for directory, names in self.targets:
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if not _interesting(entry.name, names):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    stats[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def run(self) -> None:
+        previous = self._scan()
+        while not self._stopped.wait(self.interval):
+            current = self._scan()
+            changed = [path for path in previous.keys() | current.keys()
+                       if previous.get(path) != current.get(path)]
+            previous = current
+            if changed:
+                self.callback(changed)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class InotifyWatcher:
+    """Linux inotify watcher (via ctypes, no third-party dependency)."""
+
+    def __init__(self, targets: Iterable[WatchTarget], callback: Callback):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self.callback = callback
+        # Self-pipe: closing the inotify fd does not wake a blocked read, so
+        # stop() writes here and run() selects on both
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._watches: Dict[int, WatchTarget] = {}
+        for directory, names in targets:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = (directory, names)
+
+    def run(self) -> None:
+        try:
+            while True:
+                readable, _, _ = select.select([self.fd, self._wakeup_r], [], [])
+                if self._wakeup_r in readable:
+                    return
+                self._dispatch(os.read(self.fd, 64 * 1024))
+        except OSError:
+            return
+        finally:
+            os.close(self.fd)
+            os.close(self._wakeup_r)
+
+    def _dispatch(self, data: bytes) -> None:
+        changed = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+            offset += length
+            directory, names = self._watches.get(wd, (None, None))
+            if directory is not None and _interesting(name, names):
+                changed.append(directory / name)
+        if changed:
+            self.callback(changed)
+
+    def stop(self) -> None:
+        """Wake run() so it returns and closes the inotify descriptor."""
+        if self._wakeup_w < 0:
+            return
+        try:
+            os.write(self._wakeup_w, b'x')
+        except OSError:
+            pass
+        os.close(self._wakeup_w)
+        self._wakeup_w = -1
+
+
+def create_watcher(targets: Iterable[WatchTarget], callback: Callback):
+    """Create an inotify watcher where supported, otherwise a polling one."""
+    targets = list(targets)
+    try:
+        return InotifyWatcher(targets, callback)
+    except (OSError, AttributeError):
+        return PollingWatcher(targets, callback)
+
+
+def start_watcher(targets: Iterable[WatchTarget], callback: Callback):
+    """Create a watcher and run it on a daemon thread."""
+    watcher = create_watcher(targets, callback)
+    threading.Thread(target=watcher.run, name='agent-watch', daemon=True).start()
+    return watcher
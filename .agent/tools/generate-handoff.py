@@ -4,92 +4,93 @@ Handoff generation tool for pub-sub-demo project.
 Generates handoff reports based on template and current project state.
 """
 
+import hashlib
+import io
 import json
-import os
+import shutil
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Callable, Iterator, Optional, List, Tuple
+
+from agentlib import profiling, project
+from agentlib.components import ComponentTree
+from agentlib.daemon import forward_to_daemon
+from agentlib.fsutil import atomic_write_json, atomic_writer
+from agentlib.git_snapshot import GitSnapshot, load_git_snapshot
+from agentlib.handoff_delta import (
+    FileChange,
+    build_baseline,
+    component_changes,
+    file_changes,
+    load_baseline,
+    save_baseline,
+    task_changes,
+)
+from agentlib.handoff_archive import HandoffStore
+from agentlib.progress_store import ProgressJournal
+from agentlib.state_docs import blocker_age
+from agentlib.task_store import TaskStore
+from agentlib.templates import load_template, render
+
+if TYPE_CHECKING:
+    # asyncio and sqlite3 are only imported once a report is collected, indexed or searched
+    from agentlib.change_summary import ComponentChanges
+    from agentlib.collect import Collected
+    from agentlib.history_index import HistoryIndex
+
+# Bump when the report layout changes so old fingerprints stop matching
+FINGERPRINT_VERSION = 2
+# Longest list a delta report prints per section
+DELTA_LIMIT = 50
+HISTORY_PREFIX = '.agent/history/'
+# `archive` packs reports older than this many days
+DEFAULT_ARCHIVE_DAYS = 30
+TASK_ICONS = {"completed": "✅", "in_progress": "🔄", "pending": "⏳"}
+# Seconds each report input may take before its sections are marked degraded
+SOURCE_TIMEOUTS = {'progress': 10.0, 'git': 15.0, 'blockers': 5.0, 'components': 5.0}
+# Files listed per component under "Code Changes"; the rest are summed up
+FILES_PER_COMPONENT = 5
+# Tasks listed under "Immediate (Next Session)"
+NEXT_STEPS = 3
 
 
 def get_project_root() -> Path:
     """Find the project root directory."""
-    current = Path.cwd()
-    while current != current.parent:
-        if (current / '.agent').exists() and (current / 'package.json').exists():
-            return current
-        current = current.parent
-    raise RuntimeError("Could not find project root")
+    return project.find_project_root()
 
 
+@profiling.timed()
 def load_progress() -> Dict[str, Any]:
-    """Load current progress data."""
-    progress_file = get_project_root() / '.agent' / 'current' / 'progress.json'
+    """Load current progress data under a shared lock (shared with update-progress.py)."""
+    return project.read_progress()
 
-    if not progress_file.exists():
-        return {}
 
-    with open(progress_file, 'r') as f:
-        return json.load(f)
+def load_state() -> Optional[Dict[str, Any]]:
+    """Load current state.md as title, fields and sections (None if missing)."""
+    return project.load_state()
 
 
-def load_state() -> str:
-    """Load current state markdown."""
-    state_file = get_project_root() / '.agent' / 'current' / 'state.md'
+def load_blockers() -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Load current blockers.md as active, potential and resolved records (None if missing)."""
+    return project.load_blockers()
 
-    if not state_file.exists():
-        return "No current state information available."
 
-    with open(state_file, 'r') as f:
-        return f.read()
-
-
-def load_blockers() -> str:
-    """Load current blockers markdown."""
-    blockers_file = get_project_root() / '.agent' / 'current' / 'blockers.md'
-
-    if not blockers_file.exists():
-        return "No current blockers information available."
-
-    with open(blockers_file, 'r') as f:
-        return f.read()
+@profiling.timed('git snapshot')
+def get_git_snapshot() -> GitSnapshot:
+    """Get the (cached) git snapshot for the project root."""
+    root = get_project_root()
+    return load_git_snapshot(root, cache_dir=root / '.agent' / 'cache')
 
 
 def get_git_branch() -> str:
     """Get current git branch."""
-    try:
-        import subprocess
-        result = subprocess.run(['git', 'branch', '--show-current'],
-                              capture_output=True, text=True, cwd=get_project_root())
-        if result.returncode == 0:
-            return result.stdout.strip()
-        return 'unknown'
-    except:
-        return 'unknown'
+    return get_git_snapshot().branch
 
 
 def get_modified_files() -> List[str]:
     """Get list of modified files from git."""
-    try:
-        import subprocess
-        # Get modified files
-        result = subprocess.run(['git', 'diff', '--name-only'],
-                              capture_output=True, text=True, cwd=get_project_root())
-        modified = result.stdout.strip().split('\n') if result.stdout.strip() else []
-
-        # Get staged files
-        result = subprocess.run(['git', 'diff', '--cached', '--name-only'],
-                              capture_output=True, text=True, cwd=get_project_root())
-        staged = result.stdout.strip().split('\n') if result.stdout.strip() else []
-
-        # Get untracked files
-        result = subprocess.run(['git', 'ls-files', '--others', '--exclude-standard'],
-                              capture_output=True, text=True, cwd=get_project_root())
-        untracked = result.stdout.strip().split('\n') if result.stdout.strip() else []
-
-        return list(set(modified + staged + untracked))
-    except:
-        return []
+    return get_git_snapshot().modified_files()
 
 
 def generate_session_id() -> str:
@@ -97,14 +98,18 @@ def generate_session_id() -> str:
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 
-def generate_handoff_content(session_notes: str = "") -> str:
-    """Generate handoff content based on current project state."""
-    progress = load_progress()
-    modified_files = get_modified_files()
-    branch = get_git_branch()
-    session_id = generate_session_id()
+def get_template_path(name: str = 'handoff.md') -> Path:
+    """Get a handoff report template."""
+    return get_project_root() / '.agent' / 'templates' / name
+
+
+def get_baseline_file() -> Path:
+    """Compact progress/git baseline of the last handoff, for delta reports."""
+    return get_project_root() / '.agent' / 'cache' / 'handoff-baseline.json'
 
-    # Parse session notes for completed and in-progress items
+
+def parse_session_notes(session_notes: str) -> Tuple[List[str], List[str]]:
+    """Parse session notes for completed (✅) and in-progress (🔄) items."""
     completed_items = []
     in_progress_items = []
 
@@ -117,246 +122,655 @@ def generate_handoff_content(session_notes: str = "") -> str:
             elif line.startswith('🔄') or line.startswith('- 🔄'):
                 in_progress_items.append(line.replace('🔄', '').strip().lstrip('- '))
 
-    # Generate file change descriptions
-    file_changes = []
-    for file in modified_files[:10]:  # Limit to first 10 files
-        file_changes.append(f"    - `{file}` - Modified during session")
-
-    # Get task info from progress
-    tasks = progress.get('tasks', {})
-    completed_tasks = tasks.get('completed', [])
-    in_progress_tasks = tasks.get('in_progress', [])
-    pending_tasks = tasks.get('pending', [])
-
-    # Generate overall completion info
-    overall_completion = progress.get('metrics', {}).get('overall_completion', 'Unknown')
-    current_phase = progress.get('metrics', {}).get('phase', 'Unknown')
-
-    handoff_content = f"""# Handoff Report
-
-**Project**: pub-sub-demo
-**Date**: {datetime.now().strftime('%Y-%m-%d')}
-**Session**: {session_id}
-
-## Session Summary
+    return completed_items, in_progress_items
 
-### What I Worked On
 
-{session_notes if session_notes else "- General development and improvements"}
-
-### What I Completed
-
-"""
-
-    # Add completed items
+def render_completed_items(completed_items: List[str]) -> Iterator[str]:
+    """Render the "What I Completed" list."""
     if completed_items:
         for item in completed_items:
-            handoff_content += f"- ✅ {item}\n"
+            yield f"- ✅ {item}\n"
     else:
-        handoff_content += "- ✅ Agent system configuration setup\n"
-        handoff_content += "- ✅ Cursor rules and configuration adaptation\n"
-
-    handoff_content += f"""
-### What's In Progress
+        yield "- ✅ Agent system configuration setup\n"
+        yield "- ✅ Cursor rules and configuration adaptation\n"
 
-"""
 
-    # Add in-progress items
+def render_in_progress_items(in_progress_items: List[str], in_progress_tasks: List[str]) -> Iterator[str]:
+    """Render the "What's In Progress" list from session notes, falling back to tracked tasks."""
     if in_progress_items:
         for item in in_progress_items:
-            handoff_content += f"- 🔄 {item}\n"
+            yield f"- 🔄 {item}\n"
     elif in_progress_tasks:
         for task in in_progress_tasks:
-            handoff_content += f"- 🔄 {task}\n"
+            yield f"- 🔄 {task}\n"
     else:
-        handoff_content += "- 🔄 TypeScript best practices implementation\n"
-        handoff_content += "- 🔄 Security validation enhancements\n"
-
-    handoff_content += f"""
-## Current State
-
-### Code Changes
-
-"""
-
-    if file_changes:
-        handoff_content += "\n".join(file_changes)
-    else:
-        handoff_content += "    - No significant file modifications detected"
-
-    handoff_content += f"""
-
-### Tests
-
-- [ ] All tests passing
-- [ ] New tests added where appropriate
-- [ ] Coverage maintained above 80%
-
-## Project Status
-
-### Overall Progress
-- **Completion**: {overall_completion}%
-- **Phase**: {current_phase}
-- **Health**: {progress.get('metrics', {}).get('health', 'Unknown')}
-
-### Component Status
-"""
-
-    # Add component progress
-    components = progress.get('components', {})
-    for category, items in components.items():
-        handoff_content += f"\n**{category.title()}**:\n"
-        for component, score in items.items():
-            handoff_content += f"- {component.replace('_', ' ').title()}: {score}%\n"
-
-    handoff_content += f"""
-## Next Steps
-
-### Immediate (Next Session)
-
-"""
-
-    # Add pending tasks as next steps
-    if pending_tasks:
-        for i, task in enumerate(pending_tasks[:3], 1):
-            handoff_content += f"{i}. {task}\n"
+        yield "- 🔄 TypeScript best practices implementation\n"
+        yield "- 🔄 Security validation enhancements\n"
+
+
+def render_component_status(components: ComponentTree) -> Iterator[str]:
+    """Render the "Component Status" section, one category at a time."""
+    for category in components.categories():
+        yield f"\n**{category.name.title()}** ({category.completion:.1f}%):\n"
+        for depth, node in components.walk(category):
+            label = node.name.replace('_', ' ').title()
+            score = f"{node.score}%" if node.is_leaf else f"{node.completion:.1f}%"
+            yield f"{'  ' * depth}- {label}: {score}\n"
+
+
+def render_next_steps(tasks: TaskStore) -> Iterator[str]:
+    """Render the "Immediate (Next Session)" list: unblocked pending tasks, most urgent first.
+
+    Tasks are ranked by priority, then by the estimated work on the longest
+    chain of tasks waiting on them, so unblocking work comes first.
+    """
+    next_tasks = tasks.next_tasks(NEXT_STEPS)
+    if next_tasks:
+        graph = tasks.graph if tasks.is_planned() else None
+        for i, task in enumerate(next_tasks, 1):
+            details = []
+            if graph is not None:
+                if graph.priority(task):
+                    details.append(f"priority {graph.priority(task)}")
+                if graph.blocks(task):
+                    details.append(f"unblocks {graph.blocks(task)}")
+            suffix = f" ({', '.join(details)})" if details else ""
+            yield f"{i}. {task}{suffix}\n"
+    elif tasks.count('pending'):
+        for i, task in enumerate(tasks.graph.blocked()[:NEXT_STEPS], 1):
+            yield f"{i}. Unblock {task} (waiting on {', '.join(tasks.graph.unmet(task))})\n"
     else:
-        handoff_content += """1. Complete TypeScript best practices implementation
+        yield """1. Complete TypeScript best practices implementation
 2. Enhance security validation patterns
 3. Expand test coverage
 """
 
-    handoff_content += f"""
-### Short Term (This Week)
-
-- Complete agent system integration
-- Implement comprehensive logging
-- Security hardening completion
-
-### Long Term (This Sprint)
 
-- Performance optimization
-- Production deployment preparation
-- Monitoring and observability setup
-
-## Important Notes
-
-### Decisions Made
-
-- Adopted comprehensive Cursor configuration from austdx project
-- Implemented agent system for progress tracking and handoffs
-- Established TypeScript best practices and security patterns
-
-### Technical Context
-
-- **Architecture**: Monorepo with React frontend + Node.js backend
-- **Real-time**: ShareDB for collaborative document editing
-- **Authentication**: JWT-based authentication system
-- **Testing**: Vitest + Playwright for comprehensive test coverage
-- **Development**: pnpm workspaces with TypeScript strict mode
-
-## Environment & Context
-
-### Branch
-
-- Current: `{branch}`
-- Base: `main`
-
-### Key Commands Used
-
-```bash
-# Common commands from this session
-make test
-make lint
-make dev
-pnpm build
-```
-
-### Configuration Changes
-
-- [x] Created .cursor.json configuration
-- [x] Created .cursorrules file
-- [x] Set up .agent/ directory structure
-- [x] Added comprehensive TypeScript rules
-
-## Collaborative Editing Context
-
-### ShareDB/Real-time Features
-
-- [x] WebSocket connections working
-- [x] Document synchronization tested
-- [ ] Advanced conflict resolution optimization
-
-### Security & Authentication
-
-- [x] JWT tokens validated
-- [x] Input sanitization framework established
-- [ ] Enhanced permission checks implementation
-
-## Handoff Instructions
-
-For the next person working on this:
-
-1. **Start here**: Review .agent/current/state.md for latest project status
-2. **Watch out for**: TypeScript strict mode requires careful type handling
-3. **Test with**: `make test` for comprehensive test suite
-4. **Resources**:
-   - .cursor/rules/ for coding standards
-   - docs/ for project documentation
-   - .agent/current/ for current state and blockers
-
-## Session Metrics
-
-- **Duration**: Development session
-- **Files Modified**: {len(modified_files)}
-- **Overall Progress**: {overall_completion}%
-- **New Components**: Agent system integration
-
----
-
-_Generated with: `make ho "{session_notes}"`_"""
+def describe_blocker(blocker: Dict[str, Any]) -> str:
+    """Title with severity and age, e.g. "Flaky CI (high, 12 days)"."""
+    details = [blocker['severity']] if blocker.get('severity') else []
+    age = blocker_age(blocker)
+    if age is not None:
+        details.append(f"{age} day{'s' if age != 1 else ''}")
+    return f"{blocker['title']} ({', '.join(details)})" if details else blocker['title']
+
+
+def render_blockers(blockers: Optional[Dict[str, List[Dict[str, Any]]]]) -> Iterator[str]:
+    """Render active blockers and potential issues from blockers.md."""
+    if blockers is None:
+        yield "- No blockers.md found\n"
+        return
+    if not blockers['active']:
+        yield "- No active blockers\n"
+    for blocker in blockers['active']:
+        yield f"- 🚧 {describe_blocker(blocker)}\n"
+    for blocker in blockers['potential']:
+        yield f"- ⚠️ {describe_blocker(blocker)}\n"
+
+
+def render_component_changes(changes: List[Tuple[str, Optional[int], Optional[int]]]) -> Iterator[str]:
+    """Render component score changes as old → new."""
+    if not changes:
+        yield "- No component changes\n"
+        return
+
+    for path, old, new in changes[:DELTA_LIMIT]:
+        before = f"{old}%" if old is not None else "new"
+        after = f"{new}%" if new is not None else "removed"
+        yield f"- {path}: {before} → {after}\n"
+    if len(changes) > DELTA_LIMIT:
+        yield f"- … and {len(changes) - DELTA_LIMIT} more\n"
+
+
+def render_task_changes(changes: List[Tuple[str, Optional[str], Optional[str]]]) -> Iterator[str]:
+    """Render task status changes."""
+    if not changes:
+        yield "- No task changes\n"
+        return
+
+    for task, old, new in changes[:DELTA_LIMIT]:
+        yield f"- {TASK_ICONS.get(new, '•')} {task} ({old or 'new'} → {new or 'removed'})\n"
+    if len(changes) > DELTA_LIMIT:
+        yield f"- … and {len(changes) - DELTA_LIMIT} more\n"
+
+
+def describe_file_change(change: FileChange) -> str:
+    if change.status == 'new':
+        return f"new, +{change.insertions}" if change.insertions is not None else "new"
+    if change.status == 'changed':
+        return "untracked, changed"
+    if change.status == 'removed':
+        return "removed"
+    if change.insertions is None:
+        return "binary"
+    return f"+{change.insertions} -{change.deletions}"
+
+
+def _line_counts(insertions: int, deletions: int, uncounted: int = 0) -> str:
+    counts = f"+{insertions:,} -{deletions:,}"
+    return f"{counts}, {uncounted:,} without line counts" if uncounted else counts
+
+
+def render_change_summary(groups: List['ComponentChanges'], empty: str) -> Iterator[str]:
+    """Render changed files grouped by component: totals for every group, its largest files by name."""
+    if not groups:
+        yield f"    - {empty}"
+        return
+
+    files = sum(len(group.files) for group in groups)
+    yield (f"    - {files:,} file{'s' if files != 1 else ''} changed in {len(groups)} "
+           f"component{'s' if len(groups) != 1 else ''} ("
+           f"{_line_counts(sum(g.insertions for g in groups), sum(g.deletions for g in groups))})")
+    for group in groups:
+        count = len(group.files)
+        yield (f"\n    - **{group.component}**: {count:,} file{'s' if count != 1 else ''}, "
+               f"{_line_counts(group.insertions, group.deletions, group.uncounted)}")
+        for change in group.files[:FILES_PER_COMPONENT]:
+            yield f"\n        - `{change.path}` ({describe_file_change(change)})"
+        rest = group.files[FILES_PER_COMPONENT:]
+        if rest:
+            yield (f"\n        - … and {len(rest):,} more ("
+                   f"{_line_counts(sum(c.insertions or 0 for c in rest), sum(c.deletions or 0 for c in rest))})")
+
+
+def load_component_config() -> Optional[Dict[str, Any]]:
+    """The component → source globs map used to group changes (None without one)."""
+    from agentlib.scanner import load_component_map
+    path = get_project_root() / '.agent' / 'components.json'
+    if not path.exists():
+        return None
+    return load_component_map(path)
+
+
+def group_file_changes(changes: List[FileChange], collected: 'Collected') -> List['ComponentChanges']:
+    """Group changes by the components in progress.json, falling back to repository areas."""
+    from agentlib.change_summary import ChangeClassifier, group_changes
+    progress = collected.get('progress')
+    known = {node.path for _, node in progress['components'].walk()} if progress is not None else None
+    classifier = ChangeClassifier.from_config(collected.get('components'), known)
+    with profiling.span('group changes', files=len(changes)):
+        return group_changes(changes, classifier)
+
+
+async def collect_git_snapshot() -> GitSnapshot:
+    """The (cached) git snapshot, with git run as asyncio subprocesses."""
+    from agentlib.git_snapshot import load_git_snapshot_async
+    root = get_project_root()
+    return await load_git_snapshot_async(root, cache_dir=root / '.agent' / 'cache')
+
+
+def collect_inputs(git: Optional[Callable[[], Any]] = None) -> 'Collected':
+    """Load progress, git state and blockers concurrently; slow or failing sources are degraded."""
+    from agentlib.collect import Source, collect
+    collected = collect([
+        Source('progress', load_progress, SOURCE_TIMEOUTS['progress']),
+        Source('git', git or collect_git_snapshot, SOURCE_TIMEOUTS['git']),
+        Source('blockers', load_blockers, SOURCE_TIMEOUTS['blockers']),
+        Source('components', load_component_config, SOURCE_TIMEOUTS['components']),
+    ])
+    for name, reason in collected.degraded.items():
+        print(f"Warning: {name} unavailable ({reason}); its sections are marked degraded", file=sys.stderr)
+    return collected
+
+
+def unavailable(what: str, reason: str) -> str:
+    return f"⚠️ Unavailable: {what} ({reason})"
+
+
+def render_degraded_notice(degraded: Dict[str, str]) -> str:
+    """An extra header line naming the inputs that could not be collected."""
+    if not degraded:
+        return ""
+    return "\n**Degraded**: " + "; ".join(f"{name} {reason}" for name, reason in degraded.items())
+
+
+def progress_or_placeholder(collected: 'Collected') -> Dict[str, Any]:
+    """The progress document, or an empty stand-in when it could not be loaded."""
+    progress = collected.get('progress')
+    if progress is not None:
+        return progress
+    return {
+        'components': ComponentTree.from_json({}),
+        'tasks': TaskStore.from_json({}),
+        'metrics': {'overall_completion': 'Unknown', 'phase': 'Unknown', 'health': 'Unknown'},
+    }
+
+
+def render_progress_sections(collected: 'Collected') -> Dict[str, Any]:
+    """Template values derived from progress.json, marked unavailable when it is degraded."""
+    progress = progress_or_placeholder(collected)
+    metrics = progress['metrics']
+    values = {
+        'overall_completion': metrics['overall_completion'],
+        'phase': metrics['phase'],
+        'health': metrics['health'],
+        'component_status': render_component_status(progress['components']),
+        'next_steps': render_next_steps(progress['tasks']),
+    }
+    if 'progress' in collected.degraded:
+        reason = collected.degraded['progress']
+        values['component_status'] = f"\n- {unavailable('progress.json', reason)}\n"
+        values['next_steps'] = f"- {unavailable('pending tasks', reason)}\n"
+    return values
+
+
+def render_blockers_section(collected: 'Collected') -> Any:
+    if 'blockers' in collected.degraded:
+        return f"- {unavailable('blockers.md', collected.degraded['blockers'])}\n"
+    return render_blockers(collected.get('blockers'))
+
+
+@profiling.timed()
+def build_handoff_context(session_notes: str = "", session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Collect template values; list sections are generators rendered lazily."""
+    collected = collect_inputs()
+    progress = progress_or_placeholder(collected)
+    snapshot = collected.get('git')
+    session_id = session_id or generate_session_id()
+    completed_items, in_progress_items = parse_session_notes(session_notes)
+
+    if snapshot is not None:
+        from agentlib.change_summary import snapshot_changes
+        changes = snapshot_changes(snapshot)
+        file_changes = render_change_summary(group_file_changes(changes, collected),
+                                             "No significant file modifications detected")
+        files_modified: Any = len(changes)
+    else:
+        file_changes = f"    - {unavailable('git status', collected.degraded['git'])}"
+        files_modified = 'Unknown'
+
+    return {
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'session_id': session_id,
+        'degraded_notice': render_degraded_notice(collected.degraded),
+        'degraded': collected.degraded,
+        'session_notes': session_notes if session_notes else "- General development and improvements",
+        'raw_session_notes': session_notes,
+        'completed_items': render_completed_items(completed_items),
+        'in_progress_items': render_in_progress_items(in_progress_items, progress['tasks']['in_progress']),
+        'file_changes': file_changes,
+        'blockers': render_blockers_section(collected),
+        'branch': snapshot.branch if snapshot is not None else 'unknown',
+        'files_modified': files_modified,
+        **render_progress_sections(collected),
+    }
+
+
+@profiling.timed()
+def build_delta_context(session_notes: str, session_id: str, baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect template values for a report of changes since `baseline`."""
+    async def git_changes() -> Tuple[GitSnapshot, List[FileChange]]:
+        # Diffing against the baseline is more git work, so it shares the git timeout
+        import asyncio
+        snapshot = await collect_git_snapshot()
+        files = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: file_changes(get_project_root(), baseline, snapshot, exclude=HISTORY_PREFIX))
+        return snapshot, files
+
+    collected = collect_inputs(git_changes)
+    progress = progress_or_placeholder(collected)
+    completed_items, in_progress_items = parse_session_notes(session_notes)
+    if 'progress' in collected.degraded:
+        reason = collected.degraded['progress']
+        components: Any = f"- {unavailable('component changes', reason)}\n"
+        task_lines: Any = f"- {unavailable('task changes', reason)}\n"
+        moved: List[str] = []
+    else:
+        tasks = task_changes(baseline, progress['tasks'])
+        components = render_component_changes(component_changes(baseline, progress['components']))
+        task_lines = render_task_changes(tasks)
+        # Only tasks that moved into progress since the last handoff
+        moved = [task for task, _, new in tasks if new == 'in_progress']
+    if 'git' in collected.degraded:
+        snapshot, files = None, None
+        file_lines: Any = f"    - {unavailable('git changes', collected.degraded['git'])}"
+    else:
+        snapshot, files = collected.get('git')
+        file_lines = render_change_summary(group_file_changes(files, collected),
+                                           "No file changes since the last handoff")
+    metrics = progress['metrics']
+    previous = baseline.get('overall_completion')
+
+    return {
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'session_id': session_id,
+        'degraded_notice': render_degraded_notice(collected.degraded),
+        'degraded': collected.degraded,
+        'since_session': baseline.get('session_id', 'unknown'),
+        'since_handoff': baseline.get('handoff', 'unknown'),
+        'session_notes': session_notes if session_notes else "- General development and improvements",
+        'raw_session_notes': session_notes,
+        'completed_items': render_completed_items(completed_items),
+        'in_progress_items': render_in_progress_items(in_progress_items, moved),
+        'overall_completion': metrics['overall_completion'],
+        'previous_completion': previous if previous is not None else 'Unknown',
+        'phase': metrics['phase'],
+        'health': metrics['health'],
+        'blockers': render_blockers_section(collected),
+        'component_changes': components,
+        'task_changes': task_lines,
+        'file_changes': file_lines,
+        'files_changed': len(files) if files is not None else 'Unknown',
+        'branch': snapshot.branch if snapshot is not None else 'unknown',
+    }
+
+
+def render_handoff(write: Callable[[str], Any], context: Dict[str, Any], template_name: str = 'handoff.md') -> None:
+    """Stream the handoff report through `write` using the compiled template."""
+    with profiling.span('load template'):
+        template = load_template(get_template_path(template_name),
+                                 cache_dir=get_project_root() / '.agent' / 'cache' / 'templates')
+    with profiling.span('render'):
+        render(template, context, write)
+
+
+def generate_handoff_content(session_notes: str = "", session_id: Optional[str] = None,
+                             baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Generate handoff content based on current project state (a delta report if given a baseline)."""
+    buffer = io.StringIO()
+    if baseline is not None:
+        render_handoff(buffer.write, build_delta_context(session_notes, session_id or generate_session_id(), baseline),
+                       'handoff-delta.md')
+    else:
+        render_handoff(buffer.write, build_handoff_context(session_notes, session_id))
+    return buffer.getvalue()
 
-    return handoff_content
 
+@profiling.timed()
+def save_handoff(session_notes: str, session_id: str,
+                 baseline: Optional[Dict[str, Any]] = None) -> Tuple[Path, Dict[str, str]]:
+    """Render the handoff straight into the history directory (a delta report if given a baseline).
 
-def save_handoff(content: str, session_id: str) -> Path:
-    """Save handoff to history directory."""
+    Returns the report and the inputs that were degraded while collecting it.
+    """
     handoffs_dir = get_project_root() / '.agent' / 'history' / 'handoffs'
     handoffs_dir.mkdir(parents=True, exist_ok=True)
 
     handoff_file = handoffs_dir / f'handoff-{session_id}.md'
+    # Collect git state before the writer's temporary file shows up as untracked
+    if baseline is not None:
+        context = build_delta_context(session_notes, session_id, baseline)
+        template_name = 'handoff-delta.md'
+    else:
+        context = build_handoff_context(session_notes, session_id)
+        template_name = 'handoff.md'
+    with atomic_writer(handoff_file) as f:
+        render_handoff(f.write, context, template_name)
 
-    with open(handoff_file, 'w') as f:
-        f.write(content)
+    import sqlite3
+    try:
+        with get_history_index() as index:
+            index.add(handoff_file)
+    except (sqlite3.Error, OSError):
+        # The index is only a cache; the next history query re-syncs it
+        pass
 
-    return handoff_file
+    return handoff_file, context['degraded']
 
 
-def update_latest_handoff(content: str) -> None:
+@profiling.timed()
+def update_latest_handoff(handoff_file: Path) -> None:
     """Update the latest handoff file for easy access."""
     latest_file = get_project_root() / '.agent' / 'history' / 'latest-handoff.md'
 
-    with open(latest_file, 'w') as f:
-        f.write(content)
+    with open(handoff_file, 'r') as src, atomic_writer(latest_file) as dst:
+        shutil.copyfileobj(src, dst)
+
+
+@profiling.timed()
+def record_baseline(session_id: str, handoff_file: Path) -> None:
+    """Store the baseline the next delta report is compared against."""
+    try:
+        baseline = build_baseline(get_project_root(), load_progress(), get_git_snapshot(),
+                                  session_id, handoff_file.name)
+        save_baseline(get_baseline_file(), baseline)
+    except OSError:
+        pass
+
+
+def get_fingerprint_file() -> Path:
+    """Where the fingerprint of the last generated handoff is kept."""
+    return get_project_root() / '.agent' / 'cache' / 'handoff-fingerprint.json'
+
+
+@profiling.timed()
+def compute_fingerprint(session_notes: str, template_name: str = 'handoff.md') -> str:
+    """Hash every input of a handoff: progress, state, blockers, component map, template, git and notes."""
+    root = get_project_root()
+    current = root / '.agent' / 'current'
+    progress_file = current / 'progress.json'
+    inputs = [progress_file, ProgressJournal(progress_file).journal_file,
+              current / 'state.md', current / 'blockers.md', root / '.agent' / 'components.json',
+              get_template_path(template_name)]
+
+    digest = hashlib.sha256(f'{FINGERPRINT_VERSION}\0{template_name}\0{session_notes}\0'.encode())
+    for path in inputs:
+        digest.update(path.name.encode() + b'\0')
+        try:
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        except FileNotFoundError:
+            digest.update(b'-')
+
+    # Reports land in .agent/history; that churn must not count as a change
+    snapshot = get_git_snapshot().excluding('.agent/history/')
+    digest.update(json.dumps(snapshot.to_dict(), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def find_unchanged_handoff(fingerprint: str) -> Optional[Path]:
+    """The previous report if it was generated from identical inputs and still exists."""
+    try:
+        with open(get_fingerprint_file(), 'r') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    handoff_file = get_project_root() / '.agent' / 'history' / 'handoffs' / previous.get('handoff', '')
+    if previous.get('fingerprint') != fingerprint or not handoff_file.is_file():
+        return None
+    return handoff_file
+
+
+def record_fingerprint(fingerprint: str, handoff_file: Path) -> None:
+    """Remember which report the current inputs produced."""
+    try:
+        atomic_write_json(get_fingerprint_file(), {'fingerprint': fingerprint, 'handoff': handoff_file.name})
+    except OSError:
+        pass
+
+
+def get_handoff_store() -> HandoffStore:
+    """Loose and archived handoff reports."""
+    history = get_project_root() / '.agent' / 'history'
+    return HandoffStore(history / 'handoffs', history / 'archive')
+
+
+def get_history_index() -> 'HistoryIndex':
+    """Open the search index over the handoff history."""
+    from agentlib.history_index import HistoryIndex
+    return HistoryIndex(get_project_root() / '.agent' / 'cache' / 'history.sqlite', get_handoff_store())
+
+
+def archive_history(args: List[str]) -> None:
+    """Handle `archive [--older-than DAYS] [--include-tracked]`: pack old reports into a compressed segment.
+
+    Reports git tracks stay loose unless --include-tracked is given, so the
+    command does not leave tracked deletions behind; with it, commit the new
+    segment and the deletions.
+    """
+    from agentlib.git_snapshot import tracked_names
+    days = DEFAULT_ARCHIVE_DAYS
+    include_tracked = False
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg == "--include-tracked":
+            include_tracked = True
+        elif arg == "--older-than" and args:
+            value = args.pop(0)
+            try:
+                days = float(value)
+            except ValueError:
+                raise ValueError(f"--older-than expects a number of days, got {value!r}") from None
+        else:
+            raise ValueError(f"Unexpected argument: {arg}")
+    if days < 0:
+        raise ValueError("--older-than must not be negative")
+
+    with get_handoff_store() as store:
+        keep = () if include_tracked else tracked_names(get_project_root(), store.handoffs_dir)
+        counts = store.compact(days, keep=keep)
+    if counts['skipped']:
+        print(f"Kept {counts['skipped']} handoff(s) tracked by git; use --include-tracked to archive them "
+              "and commit the segment and deletions")
+    if not counts['reports']:
+        print(f"No handoffs older than {days:g} days to archive")
+        return
+    print(f"Archived {counts['reports']} handoff(s) older than {days:g} days into {counts['segment']}")
+    print(f"  {counts['original']:,} bytes -> {counts['archived']:,} bytes "
+          f"({counts['archived'] / counts['original']:.1%})")
+    if include_tracked:
+        print("Commit the new segment and the removed handoffs to keep the repository clean")
+
+
+def search_history(args: List[str]) -> None:
+    """Handle `history [terms...] [--branch NAME] [--since 30d|YYYY-MM-DD] [--limit N] [--rebuild] [--show NAME]`."""
+    from agentlib.history_index import parse_since
+    terms: List[str] = []
+    branch = since = show = None
+    limit = 20
+    rebuild = False
+
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg in ("--branch", "--since", "--limit", "--show") and not args:
+            raise ValueError(f"{arg} requires a value")
+        if arg == "--branch":
+            branch = args.pop(0)
+        elif arg == "--since":
+            since = parse_since(args.pop(0))
+        elif arg == "--limit":
+            limit = int(args.pop(0))
+        elif arg == "--rebuild":
+            rebuild = True
+        elif arg == "--show":
+            show = args.pop(0)
+        else:
+            terms.append(arg)
+
+    if show is not None:
+        # Loose or archived, printed as written
+        with get_handoff_store() as store:
+            sys.stdout.write(store.read(show).decode('utf-8', errors='replace'))
+        return
+
+    with get_history_index() as index:
+        counts = index.rebuild() if rebuild else index.sync()
+        if rebuild:
+            print(f"Rebuilt history index: {counts['indexed']} handoff(s)")
+        entries = index.search(terms, branch=branch, since=since, limit=limit)
+        total = index.count()
+
+    if not entries:
+        print(f"No matching handoffs ({total} indexed)")
+        return
+
+    print(f"Found {len(entries)} matching handoff(s) ({total} indexed):\n")
+    for entry in entries:
+        completion = f"{entry.completion:.1f}%" if entry.completion is not None else "?"
+        print(f"{entry.date}  {entry.branch or '-'}  {completion}  {entry.name}")
+        if entry.snippet:
+            print(f"    {' '.join(entry.snippet.split())}")
+        for item in entry.completed[:3]:
+            print(f"    ✅ {item}")
+        for item in entry.in_progress[:3]:
+            print(f"    🔄 {item}")
+
+
+def print_usage() -> None:
+    """Print command line usage."""
+    print("Usage:")
+    print("  python3 generate-handoff.py [--force] [--delta] [--] [session notes...]  # Generate a handoff")
+    print("  python3 generate-handoff.py history [terms...] [--branch NAME] [--since 30d|YYYY-MM-DD]")
+    print("      [--limit N] [--rebuild] [--show NAME]                                 # Search past handoffs")
+    print("  python3 generate-handoff.py archive [--older-than DAYS] [--include-tracked]  # Pack old reports")
+
+
+def parse_handoff_args(args: List[str]) -> Tuple[bool, bool, str]:
+    """(force, delta, session notes) from the arguments; `--` ends the options."""
+    force = delta = False
+    notes: List[str] = []
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg == "--":
+            notes.extend(args)
+            break
+        if arg == "--force":
+            force = True
+        elif arg == "--delta":
+            delta = True
+        elif arg.startswith("-") and arg != "-":
+            raise ValueError(f"Unknown option: {arg}")
+        else:
+            notes.append(arg)
+    return force, delta, " ".join(notes)
 
 
 def main():
     """Main function to handle command line arguments."""
-    session_notes = ""
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print_usage()
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "history":
+        import sqlite3
+        try:
+            search_history(sys.argv[2:])
+        except (ValueError, OSError, sqlite3.Error) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "archive":
+        try:
+            archive_history(sys.argv[2:])
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
 
-    if len(sys.argv) > 1:
-        session_notes = " ".join(sys.argv[1:])
+    try:
+        force, delta, session_notes = parse_handoff_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"Error: {e}")
+        print_usage()
+        sys.exit(1)
 
     try:
-        # Generate handoff content
+        baseline = None
+        if delta:
+            baseline = load_baseline(get_baseline_file())
+            if baseline is None:
+                print("No baseline from a previous handoff yet; generating a full report")
+        fingerprint = compute_fingerprint(session_notes, 'handoff-delta.md' if baseline else 'handoff.md')
+        unchanged = None if force else find_unchanged_handoff(fingerprint)
+        if unchanged is not None:
+            print("Nothing changed since the last handoff; not regenerating (use --force to override)")
+            print(f"File: {unchanged}")
+            return
+
+        # Render the handoff into history, then copy it to latest
         session_id = generate_session_id()
-        content = generate_handoff_content(session_notes)
-
-        # Save handoff
-        handoff_file = save_handoff(content, session_id)
-        update_latest_handoff(content)
-
-        print(f"Handoff generated successfully!")
+        handoff_file, degraded = save_handoff(session_notes, session_id, baseline)
+        update_latest_handoff(handoff_file)
+        if not degraded:
+            # A degraded report is regenerated next time and is no delta baseline
+            record_fingerprint(fingerprint, handoff_file)
+            record_baseline(session_id, handoff_file)
+
+        print(f"Handoff generated{' with degraded sections' if degraded else ' successfully'}!")
         print(f"File: {handoff_file}")
         print(f"Session ID: {session_id}")
 
@@ -364,9 +778,9 @@ def main():
             print(f"Session notes: {session_notes}")
 
         # Display summary
-        progress = load_progress()
-        overall_completion = progress.get('metrics', {}).get('overall_completion', 'Unknown')
-        print(f"Overall completion: {overall_completion}%")
+        if 'progress' not in degraded:
+            progress = load_progress()
+            print(f"Overall completion: {progress['metrics']['overall_completion']}%")
 
     except Exception as e:
         print(f"Error generating handoff: {e}")
@@ -374,4 +788,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.argv[1:] = profiling.configure('generate-handoff', sys.argv[1:], lambda: get_project_root() / '.agent' / 'cache')
+    exit_code = forward_to_daemon('generate-handoff', get_project_root, sys.argv[1:])
+    if exit_code is None:
+        main()
+    else:
+        sys.exit(exit_code)
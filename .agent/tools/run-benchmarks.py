@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the pub-sub-demo agent tools.
+Times progress loading/updating, display, trend queries, multi-project
+aggregation, component scans, handoff generation, git snapshots, end-to-end
+CLI runs and cold start against synthetic projects of increasing size, and writes
+machine-readable results that can be compared across commits.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from itertools import count
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from agentlib import doc_cache
+from agentlib.aggregate import discover_projects, load_projects, rollup
+from agentlib.bench import (
+    compare_results,
+    format_seconds,
+    load_results,
+    measure,
+    measure_command,
+    new_results,
+    save_results,
+)
+from agentlib.change_summary import ChangeClassifier, group_changes, snapshot_changes
+from agentlib.fixtures import (
+    category_of,
+    component_path,
+    make_project,
+    planned_task_metadata,
+    task_name,
+    write_history,
+    write_series,
+    write_source_tree,
+)
+from agentlib.handoff_archive import HandoffStore, write_segment
+from agentlib.metrics import MetricsExporter
+from agentlib.git_snapshot import load_git_snapshot, take_snapshot
+from agentlib.project import find_project_root
+from agentlib.render import ProgressQuery
+from agentlib.scanner import scan
+from agentlib.scripts import TOOLS_DIR, load_tool
+from agentlib.task_store import TaskStore
+
+DEFAULT_SIZES = "10,100,1000,10000,100000"
+# Commands are timed without a daemon so start-up cost is part of the result
+CLI_ENV = {'AGENT_NO_DAEMON': '1'}
+
+
+class Runner:
+    """Runs selected benchmarks and collects their results."""
+
+    def __init__(self, results: Dict[str, Any], repeat: int, only: Optional[List[str]]):
+        self.results = results
+        self.repeat = repeat
+        self.only = only
+
+    def selected(self, name: str) -> bool:
+        return not self.only or any(pattern in name for pattern in self.only)
+
+    def record(self, name: str, size: int, timing: Dict[str, Any]) -> None:
+        self.results['results'].append({'name': name, 'size': size, **timing})
+        print(f"  {name:<32} n={size:<8} median {format_seconds(timing['median']):>10}"
+              f"  (min {format_seconds(timing['min'])}, x{timing['number']})", flush=True)
+
+    def bench(self, name: str, size: int, fn: Callable[[], Any]) -> None:
+        if self.selected(name):
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                timing = measure(fn, self.repeat)
+            self.record(name, size, timing)
+
+    def bench_command(self, name: str, size: int, argv: List[str], cwd: Path) -> None:
+        if self.selected(name):
+            self.record(name, size, measure_command(argv, cwd, self.repeat, CLI_ENV))
+
+
+def tool_command(tool: str, *args: str) -> List[str]:
+    return [sys.executable, str(TOOLS_DIR / f'{tool}.py'), *args]
+
+
+def enter_project(root: Path) -> None:
+    """Point the in-process tools at `root` (root discovery is keyed on the working directory)."""
+    os.chdir(root)
+    doc_cache.invalidate()
+
+
+def run_in_process(runner: Runner, root: Path, size: int, update_progress, generate_handoff) -> None:
+    enter_project(root)
+
+    def load_cold():
+        doc_cache.invalidate()
+        return update_progress.load_progress()
+
+    runner.bench('load_progress[cold]', size, load_cold)
+    runner.bench('load_progress[warm]', size, update_progress.load_progress)
+
+    progress = update_progress.load_progress()
+    values = count()
+    if size:
+        index = size - 1
+        runner.bench('update_component', size, lambda: update_progress.update_component(
+            progress, category_of(index), component_path(index), next(values) % 101))
+
+    new_tasks = count()
+    runner.bench('add_task', size, lambda: update_progress.add_task(
+        progress, f'bench-task-{next(new_tasks)}', 'in_progress'))
+    doc_cache.invalidate()
+
+    task_lists = progress['tasks'].to_json()
+    plan = planned_task_metadata(size)
+    runner.bench('task_graph[build]', size, lambda: TaskStore.from_json(task_lists, plan).graph)
+    planned = TaskStore.from_json(task_lists, plan)
+    runner.bench('task_graph[next]', size, lambda: planned.next_tasks(5))
+    if size:
+        # Completing and reopening the head of a chain touches its whole chain
+        statuses = count()
+        runner.bench('task_graph[update]', size, lambda: planned.set_status(
+            task_name(0), 'completed' if next(statuses) % 2 == 0 else 'pending'))
+
+    runner.bench('display_progress', size, lambda: update_progress.display_progress(
+        update_progress.load_progress()))
+    runner.bench('display_progress[ndjson]', size, lambda: update_progress.display_progress(
+        update_progress.load_progress(), fmt='ndjson'))
+    slice_query = ProgressQuery(categories=(category_of(0),), max_score=50, limit=20)
+    runner.bench('display_progress[slice]', size, lambda: update_progress.display_progress(
+        update_progress.load_progress(), slice_query, 'json'))
+
+    metrics_file = root / 'metrics' / 'agent.prom'
+
+    def export_metrics():
+        fresh = MetricsExporter(root, metrics_file, update_progress.read_progress)
+        # Without the previous export's key every call renders and writes the textfile
+        fresh.sidecar.unlink(missing_ok=True)
+        fresh.refresh()
+        return fresh
+
+    runner.bench('metrics[render]', size, lambda: export_metrics().close())
+    exporter = export_metrics()
+    runner.bench('metrics[scrape]', size, exporter.payload)
+    exporter.close()
+
+    def handoff():
+        doc_cache.invalidate()
+        return generate_handoff.generate_handoff_content("Benchmark session", "bench")
+
+    runner.bench('generate_handoff_content', size, handoff)
+
+    generate_handoff.record_baseline('bench', root / 'handoff-bench.md')
+    baseline = generate_handoff.load_baseline(generate_handoff.get_baseline_file())
+
+    def delta_handoff():
+        doc_cache.invalidate()
+        return generate_handoff.generate_handoff_content("Benchmark session", "bench", baseline)
+
+    runner.bench('generate_handoff_content[delta]', size, delta_handoff)
+
+    cache_dir = root / '.agent' / 'cache'
+    runner.bench('git_snapshot[uncached]', size, lambda: take_snapshot(root))
+    runner.bench('git_snapshot[cached]', size, lambda: load_git_snapshot(root, cache_dir))
+    snapshot = take_snapshot(root)
+    classifier = ChangeClassifier.from_config(None)
+    runner.bench('group_changes', len(snapshot.modified_files()),
+                 lambda: group_changes(snapshot_changes(snapshot), classifier))
+
+    with generate_handoff.get_history_index() as index:
+        runner.bench('history_index[rebuild]', size, index.rebuild)
+        runner.bench('history_sync[unchanged]', size, index.sync)
+        runner.bench('history_search', size, lambda: index.search(
+            ['ShareDB'], branch='feature/presence', since='2026-01-15', limit=20))
+
+
+def run_cli(runner: Runner, root: Path, size: int) -> None:
+    runner.bench_command('cli:update-progress show', size, tool_command('update-progress', 'show'), root)
+    if size:
+        index = size - 1
+        runner.bench_command('cli:update-progress update', size, tool_command(
+            'update-progress', 'update', category_of(index), component_path(index), '42'), root)
+    runner.bench_command('cli:update-progress task', size, tool_command(
+        'update-progress', 'task', 'bench-cli-task', 'completed'), root)
+    runner.bench_command('cli:generate-handoff', size, tool_command(
+        'generate-handoff', 'Benchmark session'), root)
+
+
+def run_startup(runner: Runner, root: Path) -> None:
+    runner.bench_command('startup:python', 0, [sys.executable, '-c', 'pass'], root)
+    runner.bench_command('startup:update-progress', 0, tool_command('update-progress', 'show'), root)
+    runner.bench_command('startup:generate-handoff', 0, tool_command('generate-handoff'), root)
+    runner.bench_command('startup:agent', 0, tool_command('agent', 'show'), root)
+
+
+def run_series(runner: Runner, root: Path, days: int, update_progress) -> None:
+    """Time recording and trend queries against `days` of hourly score history."""
+    if not runner.selected('series') and not runner.selected('trend'):
+        return
+    write_series(root, days)
+    enter_project(root)
+    progress = update_progress.load_progress()
+    op = {"op": "update", "category": category_of(0), "component": component_path(0)}
+    runner.bench('series_record', days, lambda: update_progress.record_scores(progress, [op]))
+    runner.bench('progress_trend', days, lambda: update_progress.display_trend(progress, 30))
+    runner.bench('progress_trend[all]', days, lambda: update_progress.display_trend(progress, days))
+
+
+def run_aggregate(runner: Runner, root: Path, repos: int) -> None:
+    """Time discovering and aggregating `repos` small projects."""
+    if not runner.selected('aggregate'):
+        return
+    for index in range(repos):
+        make_project(root / f'team{index % 10}' / f'service{index:04d}', 20, 20, 0, 20)
+    cache_dir = root / '.aggregate-cache'
+    runner.bench('aggregate[cold]', repos, lambda: rollup(load_projects(discover_projects(root), root)))
+    runner.bench('aggregate[warm]', repos, lambda: rollup(load_projects(discover_projects(root), root,
+                                                                        cache_dir=cache_dir)))
+
+
+def run_scan(runner: Runner, root: Path, files: int) -> None:
+    """Time scanning a source tree from scratch and with a warm file cache."""
+    if not runner.selected('scan'):
+        return
+    config = write_source_tree(root, files)
+    cache_file = root / 'scan-cache.json'
+
+    def cold():
+        cache_file.unlink(missing_ok=True)
+        return scan(root, config, cache_file)
+
+    runner.bench('scan[cold]', files, cold)
+    runner.bench('scan[warm]', files, lambda: scan(root, config, cache_file))
+
+
+def run_archive(runner: Runner, root: Path, handoffs: int) -> None:
+    """Time packing `handoffs` reports into a segment and reading them back, loose and archived."""
+    if not runner.selected('archive'):
+        return
+    write_history(root, handoffs)
+    history = root / '.agent' / 'history'
+    with HandoffStore(history / 'handoffs', history / 'archive') as store:
+        names = sorted(report.name for report in store.reports())
+        reports = [(name, store.read(name), 0) for name in names]
+        runner.bench('archive_segment[write]', handoffs, lambda: write_segment(root / 'bench.seg', reports))
+        runner.bench('archive_read[loose]', handoffs, lambda: [store.read(name) for name in names])
+        store.compact(0)
+        runner.bench('archive_read[archived]', handoffs, lambda: [store.read(name) for name in names])
+        runner.bench('archive_list', handoffs, lambda: list(store.reports()))
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float) -> int:
+    """Print a comparison table; returns the number of regressions."""
+    print(f"\nComparison with baseline (regression threshold +{threshold:.0%}):")
+    for row in rows:
+        marker = "  REGRESSION" if row['regression'] else ""
+        print(f"  {row['name']:<32} n={row['size']:<8} {format_seconds(row['baseline']):>10} → "
+              f"{format_seconds(row['current']):>10}  x{row['ratio']:.2f}{marker}")
+    return sum(1 for row in rows if row['regression'])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"comma-separated component/task counts (default {DEFAULT_SIZES})")
+    parser.add_argument('--repeat', type=int, default=5, help="samples per benchmark (default 5)")
+    parser.add_argument('--git-files', type=int, default=1000,
+                        help="tracked files per synthetic repo; half are modified, as many untracked (default 1000)")
+    parser.add_argument('--handoffs', type=int, default=200, help="synthetic handoff history size (default 200)")
+    parser.add_argument('--series-days', type=int, default=1095,
+                        help="days of hourly score history for the trend benchmarks (default 1095)")
+    parser.add_argument('--aggregate-repos', type=int, default=100,
+                        help="projects for the multi-repository aggregate benchmarks (default 100)")
+    parser.add_argument('--scan-files', type=int, default=5000,
+                        help="source files in the synthetic tree for the scan benchmarks (default 5000)")
+    parser.add_argument('--only', help="comma-separated substrings selecting benchmarks, e.g. 'load,cli:'")
+    parser.add_argument('--output', type=Path, help="results file (default .agent/cache/benchmarks/<commit>-<time>.json)")
+    parser.add_argument('--compare', type=Path, help="baseline results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="relative median slow-down reported as a regression (default 0.25)")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to handle command line arguments."""
+    args = parse_args()
+
+    try:
+        root = find_project_root()
+        sizes = [int(size) for size in args.sizes.split(',') if size]
+        only = [pattern for pattern in args.only.split(',') if pattern] if args.only else None
+        baseline = load_results(args.compare) if args.compare else None
+
+        results = new_results(root, {
+            'sizes': sizes, 'repeat': args.repeat, 'git_files': args.git_files, 'handoffs': args.handoffs,
+            'series_days': args.series_days, 'aggregate_repos': args.aggregate_repos, 'scan_files': args.scan_files,
+        })
+        runner = Runner(results, args.repeat, only)
+        update_progress = load_tool('update-progress')
+        generate_handoff = load_tool('generate-handoff')
+        cwd = os.getcwd()
+
+        with tempfile.TemporaryDirectory(prefix='agent-bench-') as tmp:
+            print("Startup:", flush=True)
+            run_startup(runner, make_project(Path(tmp) / 'startup', 0, 0, 0, 0))
+
+            print(f"\nProgress series, {args.series_days} days of hourly updates:", flush=True)
+            run_series(runner, make_project(Path(tmp) / 'series', 20, 0, 0, 0), args.series_days, update_progress)
+            os.chdir(cwd)
+
+            print(f"\nAggregate over {args.aggregate_repos} projects:", flush=True)
+            run_aggregate(runner, Path(tmp) / 'org', args.aggregate_repos)
+
+            print(f"\nComponent scan over {args.scan_files} source files:", flush=True)
+            run_scan(runner, Path(tmp) / 'scan', args.scan_files)
+
+            print(f"\nHandoff archive over {args.handoffs} handoffs:", flush=True)
+            run_archive(runner, Path(tmp) / 'archive', args.handoffs)
+
+            for size in sizes:
+                print(f"\nSize {size} (components/tasks), {args.git_files} git files, "
+                      f"{args.handoffs} handoffs:", flush=True)
+                project = make_project(Path(tmp) / f'size-{size}', size, size, args.handoffs, args.git_files)
+                run_in_process(runner, project, size, update_progress, generate_handoff)
+                os.chdir(cwd)
+                run_cli(runner, project, size)
+        os.chdir(cwd)
+
+        output = args.output
+        if output is None:
+            stamp = results['created'].replace('-', '').replace(':', '').replace('T', '_')
+            output = root / '.agent' / 'cache' / 'benchmarks' / f"{(results['commit'] or 'nocommit')[:12]}-{stamp}.json"
+        save_results(output, results)
+        print(f"\nResults written to {output}")
+
+        if baseline is not None:
+            if print_comparison(compare_results(baseline, results, args.threshold), args.threshold):
+                sys.exit(1)
+
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Org aggregate: other projects are only read, their caches live under the
+invoking project's cache, and a warm run gives the same report.
+"""
+
+from agentlib.aggregate import discover_projects, load_projects, rollup
+from agentlib.fixtures import make_project
+
+
+def test_other_projects_are_only_read(tmp_path):
+    for name in ('web', 'api'):
+        make_project(tmp_path / 'org' / name, 8, 6, 0, 4)
+    root = tmp_path / 'org'
+    projects = discover_projects(root)
+    before = {path: sorted(p.relative_to(path) for p in path.rglob('*') if '.git' not in p.parts)
+              for path in projects}
+    cache_dir = tmp_path / 'invoker' / '.agent' / 'cache' / 'aggregate'
+
+    cold = load_projects(projects, root, cache_dir=cache_dir)
+    assert [summary.error for summary in cold] == [None, None]
+    # 2 of 4 tracked files modified plus 4 untracked, none of them written by the aggregate
+    assert [summary.modified for summary in cold] == [6, 6]
+    after = {path: sorted(p.relative_to(path) for p in path.rglob('*') if '.git' not in p.parts)
+             for path in projects}
+    assert after == before
+    assert len(list(cache_dir.iterdir())) == 2
+
+    warm = load_projects(projects, root, cache_dir=cache_dir)
+    assert warm == cold and rollup(warm) == rollup(cold)
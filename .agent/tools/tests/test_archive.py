@@ -0,0 +1,79 @@
+"""
+Archiving old handoffs packs them into a compressed segment that reads back
+byte for byte, history search sees archived reports like loose ones, and the
+archive command leaves reports git tracks alone unless asked.
+"""
+
+import subprocess
+from datetime import datetime
+
+from agentlib.fixtures import make_project, write_history
+from agentlib.handoff_archive import HandoffStore
+from agentlib.history_index import HistoryIndex
+from agentlib.scripts import load_tool
+
+
+def open_store(root):
+    history = root / '.agent' / 'history'
+    return HandoffStore(history / 'handoffs', history / 'archive')
+
+
+def test_compact_packs_only_old_reports(tmp_path):
+    write_history(tmp_path, 40)
+    handoffs = tmp_path / '.agent' / 'history' / 'handoffs'
+    originals = {path.name: path.read_bytes() for path in handoffs.iterdir()}
+    # Reports are seven hours apart from 2026-01-01 09:00; 12 hours before
+    # `now` falls between the 19th and 20th
+    now = datetime(2026, 1, 1, 9, 0, 0).timestamp() + 20 * 7 * 3600
+
+    with open_store(tmp_path) as store:
+        counts = store.compact(0.5, now=now)
+        assert counts['reports'] == 19
+        assert counts['archived'] < counts['original'] / 2
+        assert len(list(handoffs.iterdir())) == 21
+        assert sorted(report.name for report in store.reports()) == sorted(originals)
+        assert all(store.read(name) == data for name, data in originals.items())
+        assert store.compact(0.5, now=now)['reports'] == 0
+
+
+def test_loose_copy_wins_over_archived(tmp_path):
+    write_history(tmp_path, 3)
+    with open_store(tmp_path) as store:
+        store.compact(0)
+        name = next(store.reports()).name
+        (tmp_path / '.agent' / 'history' / 'handoffs' / name).write_bytes(b'edited\n')
+        assert store.read(name) == b'edited\n'
+        assert [report.source for report in store.reports()].count('loose') == 1
+
+
+def test_search_covers_archived_reports(tmp_path):
+    write_history(tmp_path, 12)
+    db = tmp_path / 'history.sqlite'
+    with HistoryIndex(db, open_store(tmp_path)) as index:
+        index.sync()
+        before = index.search(['ShareDB'], branch=None, since=None, limit=50)
+    with open_store(tmp_path) as store:
+        store.compact(0)
+    with HistoryIndex(db, open_store(tmp_path)) as index:
+        assert index.sync()['removed'] == 0
+        assert before and index.search(['ShareDB'], branch=None, since=None, limit=50) == before
+        index.rebuild()
+        assert index.search(['ShareDB'], branch=None, since=None, limit=50) == before
+
+
+def test_archive_command_leaves_tracked_reports_alone(tmp_path, monkeypatch):
+    root = make_project(tmp_path / 'project', 4, 3, 40, 0)
+    monkeypatch.chdir(root)
+    generate_handoff = load_tool('generate-handoff')
+
+    def status():
+        return subprocess.run(['git', 'status', '--porcelain', '--', '.agent'], cwd=root,
+                              capture_output=True, text=True, check=True).stdout
+
+    generate_handoff.archive_history([])
+    assert status() == ''
+    assert not list((root / '.agent' / 'history' / 'archive').glob('*.seg'))
+
+    generate_handoff.archive_history(['--include-tracked'])
+    assert len(list((root / '.agent' / 'history' / 'archive').glob('*.seg'))) == 1
+    assert status().count(' D .agent/history/handoffs/') == 40
@@ -0,0 +1,75 @@
+"""
+blockers.md parsing: active, potential and resolved blockers are told apart,
+and project health follows the severity of the active ones.
+"""
+
+import pytest
+
+from agentlib import doc_cache
+from agentlib.fixtures import make_project
+from agentlib.scripts import load_tool
+from agentlib.state_docs import derive_health, parse_blockers
+
+CURRENT = """# Current Blockers
+
+## 🚧 Active Blockers
+
+*No active blockers currently*
+
+## ⚠️ Potential Issues
+
+### 1. Performance Concerns
+- **Area**: ShareDB query optimization
+- **Impact**: Medium - could affect user experience with large documents
+
+## ✅ Resolved Blockers
+
+### 1. TypeScript Configuration Conflicts *(Resolved)*
+- **Issue**: Jest configuration conflicting with Vitest
+- **Date Resolved**: Previous session
+"""
+
+HEALTH_CASES = [
+    ('no active blockers', CURRENT, 'green', []),
+    ('medium active blocker',
+     "## Active Blockers\n\n### Flaky CI\n\n- **Severity**: Medium\n- **Since**: 2026-01-05\n",
+     'yellow', ['Flaky CI']),
+    ('high active blocker',
+     "## 🚧 Active Blockers\n\n### 1. Database down\n- **Severity**: High - nobody can log in\n",
+     'red', ['Database down']),
+    ('critical priority',
+     "## Active Blockers\n\n### Key leak\n- **Priority**: critical\n", 'red', ['Key leak']),
+    ('one-line blocker without fields', "## Active Blockers\n\n- Waiting on API keys\n", 'yellow',
+     ['Waiting on API keys']),
+    ('resolved entry under the active heading',
+     "## Active Blockers\n\n### CORS errors *(Resolved)*\n- **Severity**: High\n", 'green', []),
+    ('high impact potential issue only',
+     "## Potential Issues\n\n### Scaling\n- **Impact**: High\n", 'green', []),
+]
+
+
+@pytest.mark.parametrize('text, health, active', [case[1:] for case in HEALTH_CASES],
+                         ids=[case[0] for case in HEALTH_CASES])
+def test_health_follows_active_blockers(text, health, active):
+    blockers = parse_blockers(text)
+    assert derive_health(blockers) == health
+    assert [blocker['title'] for blocker in blockers['active']] == active
+
+
+def test_current_file_sections():
+    blockers = parse_blockers(CURRENT)
+    assert [blocker['title'] for blocker in blockers['potential']] == ['Performance Concerns']
+    assert blockers['potential'][0]['severity'] == 'medium'
+    assert [blocker['title'] for blocker in blockers['resolved']] == ['TypeScript Configuration Conflicts']
+
+
+def test_progress_metrics_come_from_blockers_md(tmp_path, monkeypatch):
+    root = make_project(tmp_path / 'project', 4, 3, 0, 0)
+    monkeypatch.chdir(root)
+    doc_cache.invalidate()
+    update_progress = load_tool('update-progress')
+    assert update_progress.read_progress()['metrics']['health'] == 'green'
+
+    (root / '.agent' / 'current' / 'blockers.md').write_text(HEALTH_CASES[2][1])
+    metrics = update_progress.read_progress()['metrics']
+    assert (metrics['health'], metrics['blockers']) == ('red', ['Database down'])
@@ -0,0 +1,61 @@
+"""
+Changed files are grouped by the most specific component that claims them,
+with fallback areas for the rest, and per-component line totals.
+"""
+
+import time
+
+from agentlib.change_summary import ChangeClassifier, group_changes
+from agentlib.handoff_delta import FileChange
+
+CONFIG = {'components': {
+    'frontend.authentication': ['apps/client/src/components/LoginForm.tsx'],
+    'frontend.ui_components': ['apps/client/src/components/**'],
+    'backend.api_routes': ['apps/server/src/routes/**'],
+    'backend.retired': ['apps/server/src/legacy/**'],
+}}
+KNOWN = {'frontend', 'frontend.authentication', 'frontend.ui_components', 'backend', 'backend.api_routes'}
+
+
+def test_most_specific_component_wins_and_unclaimed_paths_fall_back():
+    owners = ChangeClassifier.from_config(CONFIG, KNOWN).classify([
+        'apps/client/src/components/LoginForm.tsx',
+        'apps/client/src/components/Button.tsx',
+        'apps/client/src/main.tsx',
+        'apps/server/src/legacy/old.ts',
+        'docker-compose.yml',
+        'README.md',
+        'weird/file.bin',
+    ])
+    assert owners == {
+        'apps/client/src/components/LoginForm.tsx': 'frontend.authentication',
+        'apps/client/src/components/Button.tsx': 'frontend.ui_components',
+        'apps/client/src/main.tsx': 'frontend (other)',
+        # Not a component in progress.json
+        'apps/server/src/legacy/old.ts': 'backend (other)',
+        'docker-compose.yml': 'infrastructure',
+        'README.md': 'docs',
+        'weird/file.bin': 'other',
+    }
+
+
+def test_groups_total_lines_and_order_by_churn():
+    groups = group_changes([
+        FileChange('apps/server/src/routes/a.ts', 10, 2, 'modified'),
+        FileChange('apps/server/src/routes/b.ts', 1, 0, 'modified'),
+        FileChange('apps/client/src/components/Button.tsx', 100, 50, 'modified'),
+        FileChange('apps/server/src/routes/new.ts', None, None, 'new'),
+    ], ChangeClassifier.from_config(CONFIG, KNOWN))
+    assert [(g.component, g.insertions, g.deletions, g.uncounted) for g in groups] == [
+        ('frontend.ui_components', 100, 50, 0), ('backend.api_routes', 11, 2, 1)]
+    assert [change.path for change in groups[1].files] == [
+        'apps/server/src/routes/a.ts', 'apps/server/src/routes/b.ts', 'apps/server/src/routes/new.ts']
+
+
+def test_thousands_of_files_group_quickly():
+    changes = [FileChange(f'apps/server/src/routes/r{index}.ts', index % 7, 1, 'modified') for index in range(10000)]
+    changes += [FileChange(f'docs/page{index}.md', 3, 0, 'modified') for index in range(10000)]
+    started = time.perf_counter()
+    groups = group_changes(changes, ChangeClassifier.from_config(CONFIG, KNOWN))
+    assert time.perf_counter() - started < 2
+    assert sum(len(group.files) for group in groups) == 20000
@@ -0,0 +1,54 @@
+"""
+Handoff inputs are collected concurrently; a slow or failing input degrades
+its sections of the report instead of failing or stalling the run.
+"""
+
+import asyncio
+import time
+
+from agentlib.collect import Source, collect
+from agentlib.fixtures import make_project
+from agentlib.scripts import load_tool
+
+
+def test_sources_run_concurrently_and_failures_are_recorded():
+    async def slow():
+        await asyncio.sleep(5)
+
+    def fail():
+        raise OSError("disk on fire")
+
+    started = time.perf_counter()
+    collected = collect([
+        Source('read', lambda: time.sleep(0.2) or 'read'),
+        Source('git', slow, timeout=0.2),
+        Source('blockers', fail),
+        Source('other read', lambda: time.sleep(0.2) or 'other'),
+    ])
+    assert time.perf_counter() - started < 1
+    assert collected.values == {'read': 'read', 'other read': 'other'}
+    assert collected.degraded == {'git': 'timed out after 0.2s', 'blockers': 'OSError: disk on fire'}
+
+
+def test_handoff_marks_degraded_sections(tmp_path, monkeypatch):
+    root = make_project(tmp_path / 'project', 5, 5, 0, 0)
+    monkeypatch.chdir(root)
+    generate_handoff = load_tool('generate-handoff')
+
+    async def hung_git():
+        await asyncio.sleep(5)
+
+    def broken_blockers():
+        raise ValueError("unreadable")
+
+    monkeypatch.setattr(generate_handoff, 'collect_git_snapshot', hung_git)
+    monkeypatch.setattr(generate_handoff, 'load_blockers', broken_blockers)
+    monkeypatch.setitem(generate_handoff.SOURCE_TIMEOUTS, 'git', 0.1)
+    report = generate_handoff.generate_handoff_content("Notes", "20260101_000000")
+
+    assert '**Degraded**: git timed out after 0.1s; blockers ValueError: unreadable' in report
+    assert '    - ⚠️ Unavailable: git status (timed out after 0.1s)' in report
+    assert '- ⚠️ Unavailable: blockers.md (ValueError: unreadable)' in report
+    assert 'Current: `unknown`' in report
+    # Progress still loaded
+    assert '**Completion**: ' in report and 'Unknown%' not in report
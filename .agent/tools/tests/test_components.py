@@ -0,0 +1,54 @@
+"""
+Component tree: the weighted subtree aggregates kept up to date by
+`set_score` always match the ones a full rebuild computes.
+"""
+
+import random
+
+import pytest
+
+from agentlib.components import ComponentTree
+
+
+def random_tree(rng, depth=0):
+    tree = {}
+    for index in range(rng.randint(1, 4)):
+        if depth < 3 and rng.random() < 0.4:
+            tree[f'group{index}'] = random_tree(rng, depth + 1)
+        elif rng.random() < 0.5:
+            tree[f'leaf{index}'] = {'score': rng.randint(0, 100), 'weight': rng.choice([0.5, 1, 2, 3])}
+        else:
+            tree[f'leaf{index}'] = rng.randint(0, 100)
+    return tree
+
+
+def aggregates(tree):
+    return {node.path: (node.weighted_sum, node.total_weight) for _, node in tree.walk()}
+
+
+def test_incremental_aggregates_match_a_full_recompute():
+    rng = random.Random(11)
+    for _ in range(20):
+        tree = ComponentTree.from_json({'frontend': random_tree(rng), 'backend': random_tree(rng)})
+        leaves = tree.leaf_paths()
+        for _ in range(50):
+            tree.set_score(rng.choice(leaves), rng.randint(0, 100))
+            fresh = ComponentTree.from_json(tree.to_json())
+            # Integer scores times half-integer weights add up exactly, so no tolerance is needed
+            assert aggregates(tree) == aggregates(fresh)
+            assert (tree.root.weighted_sum, tree.root.total_weight) == (fresh.root.weighted_sum,
+                                                                        fresh.root.total_weight)
+            assert tree.overall() == fresh.overall()
+
+
+def test_weights_shape_every_level():
+    tree = ComponentTree.from_json({'backend': {'sharedb': {'ops': 30, 'presence': {'score': 90, 'weight': 2}},
+                                                'jwt_auth': 85}})
+    assert tree.find('backend.sharedb').completion == 70
+    assert tree.find('backend').completion == pytest.approx((30 + 180 + 85) / 4)
+
+    assert tree.set_score('backend.sharedb.presence', 60) == 90
+    assert tree.find('backend.sharedb').completion == 50
+    assert tree.overall() == round((30 + 120 + 85) / 4, 1)
+    with pytest.raises(KeyError):
+        tree.set_score('backend.sharedb', 10)
@@ -0,0 +1,61 @@
+"""
+Stress test: concurrent update-progress.py writers must not lose updates,
+and concurrent readers must never see a torn progress document.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from agentlib.fixtures import make_project
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+UPDATE_PROGRESS = TOOLS_DIR / 'update-progress.py'
+
+WRITERS = 40
+BATCH_WRITERS = 8
+BATCH_SIZE = 10
+READERS = 10
+
+
+def run_tool(root: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, str(UPDATE_PROGRESS), *args], cwd=root,
+                          capture_output=True, text=True)
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    root = make_project(tmp_path / 'project', 8, 0, 0, 0)
+    journal = root / '.agent' / 'current' / 'progress.journal.jsonl'
+    # Start close to the compaction threshold so snapshots are rewritten mid-run
+    journal.write_text('{"op":"phase","phase":"stress"}\n' * 190)
+
+    procs = []
+    for i in range(WRITERS):
+        procs.append(subprocess.Popen(
+            [sys.executable, str(UPDATE_PROGRESS), 'task', f'task-{i}', 'pending'],
+            cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE))
+    for b in range(BATCH_WRITERS):
+        ops_file = tmp_path / f'batch-{b}.jsonl'
+        ops_file.write_text('\n'.join(json.dumps({'op': 'task', 'task': f'batch-{b}-{i}', 'status': 'in_progress'})
+                                      for i in range(BATCH_SIZE)))
+        procs.append(subprocess.Popen([sys.executable, str(UPDATE_PROGRESS), 'batch', str(ops_file)],
+                                      cwd=root, stdout=subprocess.PIPE, stderr=subprocess.PIPE))
+    for _ in range(READERS):
+        procs.append(subprocess.Popen([sys.executable, str(UPDATE_PROGRESS), 'show'], cwd=root,
+                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE))
+
+    for proc in procs:
+        out, err = proc.communicate(timeout=120)
+        assert proc.returncode == 0, (out, err)
+        assert b'Error' not in out, out
+
+    assert run_tool(root, 'compact').returncode == 0
+    progress = json.loads((root / '.agent' / 'current' / 'progress.json').read_text())
+
+    pending = set(progress['tasks']['pending'])
+    in_progress = set(progress['tasks']['in_progress'])
+    assert {f'task-{i}' for i in range(WRITERS)} <= pending
+    assert {f'batch-{b}-{i}' for b in range(BATCH_WRITERS) for i in range(BATCH_SIZE)} <= in_progress
+    assert progress['metrics']['phase'] == 'stress'
+    assert not journal.exists()
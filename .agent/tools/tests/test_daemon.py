@@ -0,0 +1,81 @@
+"""
+The daemon client only falls back to running in-process when nothing accepted
+the connection; once a request is sent, a bad reply is an error, never a rerun.
+Keepalives let commands outlast the client timeout, and stopping the watcher
+wakes its thread.
+"""
+
+import socket
+import threading
+import time
+import types
+
+from agentlib import daemon
+from agentlib.daemon import AgentDaemon, daemon_command, forward_to_daemon, socket_path
+from agentlib.watch import create_watcher
+
+
+def listen(root):
+    path = socket_path(root)
+    path.parent.mkdir(parents=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    return server
+
+
+def test_stale_socket_falls_back_to_in_process(tmp_path, monkeypatch):
+    monkeypatch.delenv('AGENT_NO_DAEMON', raising=False)
+    listen(tmp_path).close()
+    assert socket_path(tmp_path).exists()
+    assert forward_to_daemon('update-progress', lambda: tmp_path, ['show']) is None
+
+
+def test_reply_lost_after_sending_is_an_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv('AGENT_NO_DAEMON', raising=False)
+    server = listen(tmp_path)
+    server.listen(1)
+    received = []
+
+    def drop_reply():
+        conn, _ = server.accept()
+        with conn, conn.makefile('rb') as f:
+            received.append(f.readline())
+
+    thread = threading.Thread(target=drop_reply, daemon=True)
+    thread.start()
+    try:
+        assert forward_to_daemon('update-progress', lambda: tmp_path, ['task', 'a', 'completed']) == 1
+    finally:
+        thread.join(5)
+        server.close()
+    assert b'"task"' in received[0]
+    assert capsys.readouterr().out.startswith('Error: agent daemon did not answer')
+
+
+def test_keepalives_let_a_command_outlast_the_client_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon, 'KEEPALIVE_INTERVAL', 0.05)
+    slow = types.SimpleNamespace(main=lambda: (time.sleep(0.5), print('scanned')))
+    server = AgentDaemon(tmp_path, {'slow': slow}, [])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        for _ in range(100):
+            if socket_path(tmp_path).exists():
+                break
+            time.sleep(0.01)
+        response = daemon._request(tmp_path, {'tool': 'slow', 'argv': []}, timeout=0.2)
+        assert response == {'exit': 0, 'stdout': 'scanned\n'}
+    finally:
+        daemon_command(tmp_path, 'stop')
+        thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_stopping_the_watcher_wakes_its_thread(tmp_path):
+    watcher = create_watcher([(tmp_path, None)], lambda changed: None)
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    time.sleep(0.05)
+    watcher.stop()
+    thread.join(5)
+    assert not thread.is_alive()
@@ -0,0 +1,34 @@
+"""
+Atomic writes give new files the mode a plain `open()` would and keep the
+mode of a file they replace, so other users (node-exporter, git) can read them.
+"""
+
+import os
+import stat
+
+from agentlib import fsutil
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_files_follow_the_umask(tmp_path, monkeypatch):
+    monkeypatch.setattr(fsutil, '_umask', 0o022)
+    target = tmp_path / 'metrics' / 'agent.prom'
+    fsutil.atomic_write_text(target, 'agent_blockers 0\n')
+    assert mode(target) == 0o644
+
+    monkeypatch.setattr(fsutil, '_umask', 0o077)
+    fsutil.atomic_write_text(tmp_path / 'private.json', '{}')
+    assert mode(tmp_path / 'private.json') == 0o600
+
+
+def test_replaced_files_keep_their_mode(tmp_path):
+    target = tmp_path / 'progress.json'
+    target.write_text('{}')
+    os.chmod(target, 0o664)
+    with fsutil.atomic_writer(target, binary=True) as f:
+        f.write(b'{"tasks": {}}')
+    assert mode(target) == 0o664
+    assert target.read_bytes() == b'{"tasks": {}}'
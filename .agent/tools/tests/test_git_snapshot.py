@@ -0,0 +1,91 @@
+"""
+Git snapshots: recorded `git status --porcelain=v2 -z` output parses into the
+right buckets (paths with spaces and newlines included), and a cached
+snapshot's numstat is dropped once a dirty file changes.
+"""
+
+import subprocess
+import time
+
+import pytest
+
+from agentlib import git_snapshot
+from agentlib.fixtures import init_git_repo
+from agentlib.git_snapshot import load_git_snapshot, parse_numstat, parse_porcelain_v2
+
+OID = '69a1b5d54a593ff4ecdaec4230fec587865b1f42'
+BLOB = '587be6b4c3f93f93c489c0111bba5596147a26cb'
+MODES = '100644 100644 100644'
+
+STATUS_CASES = [
+    ('initial commit on a new branch',
+     b'# branch.oid (initial)\0# branch.head main\0? notes.md\0',
+     {'head': None, 'branch': 'main', 'untracked': ['notes.md']}),
+    ('detached head, ahead and behind',
+     f'# branch.oid {OID}\0# branch.head (detached)\0# branch.upstream origin/main\0'
+     '# branch.ab +3 -1\0'.encode(),
+     {'head': OID, 'branch': 'detached', 'upstream': 'origin/main', 'ahead': 3, 'behind': 1}),
+    ('ordinary changes: staged, unstaged and both',
+     f'1 M. N... {MODES} {BLOB} {BLOB} staged.ts\0'
+     f'1 .M N... {MODES} {BLOB} {BLOB} unstaged.ts\0'
+     f'1 MM N... {MODES} {BLOB} {BLOB} both.ts\0'
+     f'1 A. N... 000000 100644 100644 {"0" * 40} {BLOB} added.ts\0'.encode(),
+     {'staged': ['staged.ts', 'both.ts', 'added.ts'], 'unstaged': ['unstaged.ts', 'both.ts']}),
+    ('paths with spaces and newlines',
+     f'1 .M N... {MODES} {BLOB} {BLOB} docs/read me.md\0'
+     f'1 M. N... {MODES} {BLOB} {BLOB} line\nbreak.ts\0'
+     '? untracked dir/new\nfile.txt\0'.encode(),
+     {'staged': ['line\nbreak.ts'], 'unstaged': ['docs/read me.md'], 'untracked': ['untracked dir/new\nfile.txt']}),
+    ('renames and copies take the original path from the next entry',
+     f'2 R. N... {MODES} {BLOB} {BLOB} R100 new name.txt\0old name.txt\0'
+     f'2 RM N... {MODES} {BLOB} {BLOB} R087 src/b.ts\0src/a.ts\0'
+     f'2 C. N... {MODES} {BLOB} {BLOB} C100 copy.ts\0plain.ts\0'
+     f'1 .M N... {MODES} {BLOB} {BLOB} plain.ts\0'.encode(),
+     {'staged': ['new name.txt', 'src/b.ts', 'copy.ts'], 'unstaged': ['src/b.ts', 'plain.ts'],
+      'renames': {'new name.txt': 'old name.txt', 'src/b.ts': 'src/a.ts', 'copy.ts': 'plain.ts'}}),
+    ('unmerged entries',
+     f'u UU N... 100644 100644 100644 100644 {BLOB} {BLOB} {BLOB} conf.txt\0'
+     f'u AA N... 000000 100644 100644 100644 {"0" * 40} {BLOB} {BLOB} both added.txt\0'.encode(),
+     {'conflicted': ['conf.txt', 'both added.txt']}),
+    ('clean tree', f'# branch.oid {OID}\0# branch.head main\0'.encode(), {'head': OID, 'branch': 'main'}),
+]
+
+
+@pytest.mark.parametrize('raw, expected', [case[1:] for case in STATUS_CASES], ids=[case[0] for case in STATUS_CASES])
+def test_parse_porcelain_v2(raw, expected):
+    snapshot = parse_porcelain_v2(raw)
+    defaults = {'staged': [], 'unstaged': [], 'untracked': [], 'conflicted': [], 'renames': {}}
+    for name, value in {**defaults, **expected}.items():
+        assert getattr(snapshot, name) == value, name
+
+
+def test_parse_numstat_renames_and_binaries():
+    raw = b'3\t1\tsrc/app.ts\0-\t-\tlogo.png\0' b'5\t0\t\0old name.ts\0new name.ts\0' b'1\t1\tline\nbreak.ts\0'
+    assert parse_numstat(raw) == {'src/app.ts': (3, 1), 'logo.png': (None, None),
+                                  'new name.ts': (5, 0), 'line\nbreak.ts': (1, 1)}
+
+
+def test_cached_numstat_is_invalidated_when_a_dirty_file_changes(tmp_path, monkeypatch):
+    init_git_repo(tmp_path, 2)
+    cache_dir = tmp_path / 'cache'
+    calls = []
+    take_snapshot = git_snapshot.take_snapshot
+    monkeypatch.setattr(git_snapshot, 'take_snapshot', lambda root: calls.append(root) or take_snapshot(root))
+    monkeypatch.setattr(git_snapshot, '_memo', {})
+
+    first = load_git_snapshot(tmp_path, cache_dir, max_age=60)
+    assert first.numstat == {'src/module_000000.ts': (1, 0)}
+    assert load_git_snapshot(tmp_path, cache_dir, max_age=60) == first
+    assert len(calls) == 1
+
+    # Another edit to the already-dirty file changes its stat, so the cache is stale
+    time.sleep(0.01)
+    with open(tmp_path / 'src' / 'module_000000.ts', 'a') as f:
+        f.write("export const more = 1;\nexport const most = 2;\n")
+    assert load_git_snapshot(tmp_path, cache_dir, max_age=60).numstat == {'src/module_000000.ts': (3, 0)}
+
+    # So does staging it (the index changes)
+    subprocess.run(['git', 'add', 'src/module_000000.ts'], cwd=tmp_path, check=True)
+    staged = load_git_snapshot(tmp_path, cache_dir, max_age=60)
+    assert staged.staged == ['src/module_000000.ts'] and staged.unstaged == []
+    assert len(calls) == 3
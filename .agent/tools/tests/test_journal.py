@@ -0,0 +1,119 @@
+"""
+progress.json journal: appended operations replay onto the snapshot,
+compaction writes the same document replay produces, and a line torn by a
+crash is skipped without losing later appends. Operations that no longer
+apply are skipped and quarantined.
+"""
+
+import json
+
+from agentlib.fixtures import progress_document
+from agentlib.fsutil import atomic_write_json
+from agentlib.progress_store import ProgressJournal, serialize_document
+
+OPS = [
+    {'op': 'update', 'path': 'frontend.group_0000.component_000000', 'value': 75, 'ts': '2026-02-01T00:00:00Z'},
+    {'op': 'update', 'category': 'backend', 'component': 'group_0000.component_000001', 'value': 40, 'ts': '2026-02-01T00:01:00Z'},
+    {'op': 'task', 'task': 'task-000000', 'status': 'completed', 'owner': 'sam', 'ts': '2026-02-01T00:02:00Z'},
+    {'op': 'task', 'task': 'ship journal', 'status': 'pending', 'priority': 1, 'estimate': 2,
+     'depends_on': ['task-000001'], 'ts': '2026-02-01T00:03:00Z'},
+    {'op': 'phase', 'phase': 'review', 'ts': '2026-02-01T00:04:00Z'},
+]
+
+
+def make_journal(tmp_path):
+    journal = ProgressJournal(tmp_path / 'progress.json', max_records=len(OPS))
+    atomic_write_json(journal.snapshot_file, progress_document(6, 6))
+    return journal
+
+
+def load(journal):
+    return journal.replay(json.loads(journal.snapshot_file.read_text()))
+
+
+def dump(progress):
+    return json.dumps(serialize_document(progress), sort_keys=True)
+
+
+def test_appended_operations_replay_onto_the_snapshot(tmp_path):
+    journal = make_journal(tmp_path)
+    for op in OPS:
+        assert not journal.needs_compaction()
+        journal.append(op)
+    assert list(journal.records()) == OPS
+    assert journal.needs_compaction()
+
+    progress = load(journal)
+    assert progress['components'].find(['frontend', 'group_0000', 'component_000000']).score == 75
+    assert progress['components'].find(['backend', 'group_0000', 'component_000001']).score == 40
+    assert 'task-000000' in progress['tasks']['completed']
+    assert progress['tasks'].metadata('task-000000')['owner'] == 'sam'
+    assert progress['tasks'].metadata('ship journal')['depends_on'] == ['task-000001']
+    assert progress['metrics']['phase'] == 'review'
+    assert progress['metadata']['last_updated'] == '2026-02-01T00:04:00Z'
+
+
+def test_compaction_matches_replay(tmp_path):
+    journal = make_journal(tmp_path)
+    for op in OPS:
+        journal.append(op)
+    replayed = dump(load(journal))
+
+    journal.write_snapshot(load(journal))
+    assert not journal.journal_file.exists()
+    assert dump(load(journal)) == replayed
+
+    # A crash between the snapshot write and the journal removal replays it again
+    for op in OPS:
+        journal.append(op)
+    assert dump(load(journal)) == replayed
+
+
+def test_torn_last_line_is_skipped_and_later_appends_survive(tmp_path):
+    journal = make_journal(tmp_path)
+    for op in OPS[:3]:
+        journal.append(op)
+    expected = dump(load(journal))
+
+    with open(journal.journal_file, 'a') as f:
+        f.write(json.dumps(OPS[3])[:40])
+    assert list(journal.records()) == OPS[:3]
+    assert dump(load(journal)) == expected
+
+    journal.append(OPS[4])
+    assert list(journal.records()) == OPS[:3] + [OPS[4]]
+    assert load(journal)['metrics']['phase'] == 'review'
+
+
+def test_operations_that_no_longer_apply_are_skipped_and_quarantined(tmp_path, capsys):
+    journal = make_journal(tmp_path)
+    stale = {'op': 'update', 'path': 'frontend.removed_component', 'value': 10, 'ts': '2026-02-01T00:05:00Z'}
+    for op in [OPS[0], stale, OPS[4]]:
+        journal.append(op)
+
+    progress = load(journal)
+    assert 'no longer applies' in capsys.readouterr().err
+    assert journal.rejected == [stale]
+    assert progress['components'].find(['frontend', 'group_0000', 'component_000000']).score == 75
+    assert progress['metrics']['phase'] == 'review'
+
+    journal.write_snapshot(progress)
+    assert not journal.journal_file.exists()
+    assert [json.loads(line) for line in journal.rejected_file.read_text().splitlines()] == [stale]
+    assert load(journal)['metrics']['phase'] == 'review'
+    assert journal.rejected == []
+
+
+def test_record_count_is_kept_without_rereading_the_journal(tmp_path):
+    journal = make_journal(tmp_path)
+    for op in OPS[:2]:
+        journal.append(op)
+    load(journal)
+
+    def fail():
+        raise AssertionError('journal re-read')
+    journal.records = fail
+    for op in OPS[2:]:
+        assert not journal.needs_compaction()
+        journal.append(op)
+    assert journal.needs_compaction()
@@ -0,0 +1,92 @@
+"""
+Metrics export: both exposition formats parse as expected, the payload is
+only rebuilt when progress or the handoff history changes, and the HTTP
+endpoint serves the format a scraper asks for.
+"""
+
+import threading
+import urllib.request
+
+from agentlib import doc_cache
+from agentlib.fixtures import make_project
+from agentlib.metrics import MetricsExporter, collect_families, render_metrics, serve
+from agentlib.scripts import load_tool
+
+
+def make_exporter(tmp_path, monkeypatch, fmt='prometheus'):
+    root = make_project(tmp_path / 'project', 8, 9, 5, 0)
+    monkeypatch.chdir(root)
+    doc_cache.invalidate()
+    update_progress = load_tool('update-progress')
+    output = tmp_path / 'textfile' / 'agent.prom'
+    return root, update_progress, MetricsExporter(root, output, update_progress.read_progress, fmt)
+
+
+def samples(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if line and not line.startswith('#'))
+
+
+def test_formats_share_samples(tmp_path, monkeypatch):
+    _, update_progress, _ = make_exporter(tmp_path, monkeypatch)
+    progress = update_progress.read_progress()
+    progress['metrics']['phase'] = 'dev "beta"\nrc'
+    families = collect_families(progress, [100.0, 400.0, 600.0])
+    prometheus, openmetrics = render_metrics(families, 'prometheus'), render_metrics(families, 'openmetrics')
+
+    assert samples(prometheus) == samples(openmetrics)
+    values = samples(prometheus)
+    assert values['agent_tasks{status="pending"}'] == '3'
+    assert values['agent_handoffs_total'] == '3'
+    assert values['agent_handoff_interval_seconds'] == '250.0'
+    assert values['agent_info{project="pub-sub-demo",phase="dev \\"beta\\"\\nrc",health="green"}'] == '1'
+    assert '# TYPE agent_handoffs_total counter' in prometheus and '# TYPE agent_info gauge' in prometheus
+    assert '# TYPE agent_handoffs counter' in openmetrics and '# TYPE agent info' in openmetrics
+    assert openmetrics.endswith('# EOF\n') and '# EOF' not in prometheus
+
+
+def test_payload_rebuilt_only_when_inputs_change(tmp_path, monkeypatch):
+    root, update_progress, exporter = make_exporter(tmp_path, monkeypatch)
+    assert exporter.refresh()
+    first = exporter.output.read_text()
+    assert not exporter.refresh() and exporter.payload() == first.encode()
+
+    # A new exporter (a later run) trusts the textfile written from the same inputs
+    again = MetricsExporter(root, exporter.output, update_progress.read_progress)
+    assert not again.refresh() and again.renders == 0
+
+    update_progress.add_task(update_progress.load_progress(), 'ship metrics', 'pending')
+    update_progress.save_progress(update_progress.load_progress())
+    assert exporter.refresh()
+    assert samples(exporter.output.read_text())['agent_tasks{status="pending"}'] == '4'
+
+    (root / '.agent' / 'history' / 'handoffs' / 'handoff-20300101_000000.md').write_text('# Handoff\n')
+    assert exporter.refresh()
+    assert samples(exporter.output.read_text())['agent_handoffs_total'] == '6'
+    assert exporter.renders == 3
+
+
+def test_http_endpoint_negotiates_format(tmp_path, monkeypatch):
+    _, _, exporter = make_exporter(tmp_path, monkeypatch)
+    started = threading.Event()
+    servers = []
+
+    def ready(server):
+        servers.append(server)
+        started.set()
+
+    thread = threading.Thread(target=serve, args=(exporter, '127.0.0.1', 0), kwargs={'ready': ready}, daemon=True)
+    thread.start()
+    assert started.wait(5)
+    url = f'http://127.0.0.1:{servers[0].server_address[1]}/metrics'
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert b'agent_overall_completion_percent' in response.read()
+        request = urllib.request.Request(url, headers={'Accept': 'application/openmetrics-text; version=1.0.0'})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('application/openmetrics-text')
+            assert response.read().endswith(b'# EOF\n')
+        assert exporter.renders == 1
+    finally:
+        servers[0].shutdown()
+        thread.join(5)
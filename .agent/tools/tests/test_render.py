@@ -0,0 +1,71 @@
+"""
+`show` output formats: filters and paging select the same rows in every
+format, and machine-readable output parses.
+"""
+
+import io
+import json
+
+import pytest
+
+from agentlib.components import ComponentTree
+from agentlib.render import OutputBuffer, ProgressQuery, render_progress
+from agentlib.task_store import TaskStore
+
+
+def make_progress():
+    return {
+        'components': ComponentTree.from_json({
+            'frontend': {'react_app': 95, 'editor': 40},
+            'backend': {'sharedb': {'ops': 30, 'presence': {'score': 90, 'weight': 2}}, 'jwt_auth': 85},
+        }),
+        'tasks': TaskStore.from_json({'completed': ['a'], 'in_progress': ['b\tc'], 'pending': ['d', 'e']},
+                                     {'b\tc': {'owner': 'sam'}}),
+        'metrics': {'overall_completion': 68.0, 'phase': 'dev', 'health': 'green', 'blockers': []},
+        'metadata': {'last_updated': '2026-01-01T00:00:00Z'},
+    }
+
+
+def render(query=None, fmt='text'):
+    out = io.StringIO()
+    with OutputBuffer(out) as buffer:
+        render_progress(buffer.write, make_progress(), query, fmt)
+    return out.getvalue()
+
+
+def test_filtered_text_keeps_only_groups_above_shown_leaves():
+    text = render(ProgressQuery(max_score=50, sections=('components',)))
+    assert '  editor:  40%' in text
+    assert '    ops:  30%' in text
+    assert '  sharedb:  70.0%' in text
+    assert 'react_app' not in text and 'presence' not in text and 'jwt_auth' not in text
+    assert 'Tasks:' not in text
+
+
+def test_limit_and_offset_page_components_and_tasks_separately():
+    records = [json.loads(line) for line in render(ProgressQuery(offset=1, limit=2), 'ndjson').splitlines()]
+    assert records[0]['type'] == 'summary'
+    assert [r['path'] for r in records if r['type'] == 'component'] == ['frontend.editor', 'backend.sharedb.ops']
+    assert [r['task'] for r in records if r['type'] == 'task'] == ['b\tc', 'd']
+
+
+def test_category_and_status_filters_in_json():
+    document = json.loads(render(ProgressQuery(categories=('backend.sharedb',), statuses=('in_progress',)), 'json'))
+    assert document['summary']['categories'] == {'frontend': 67.5, 'backend': 73.8}
+    assert document['components'] == [{'path': 'backend.sharedb.ops', 'score': 30, 'weight': 1},
+                                      {'path': 'backend.sharedb.presence', 'score': 90, 'weight': 2}]
+    assert document['tasks'] == [{'task': 'b\tc', 'status': 'in_progress', 'owner': 'sam'}]
+
+
+def test_tsv_escapes_tabs():
+    rows = [line.split('\t') for line in render(ProgressQuery(sections=('tasks',)), 'tsv').splitlines()]
+    assert ['task', 'in_progress', 'b\\tc', 'sam'] in rows
+    assert ['metric', 'overall_completion', '68.0'] in rows
+
+
+def test_unknown_names_fail_before_output():
+    out = io.StringIO()
+    for query in (ProgressQuery(categories=('nope',)), ProgressQuery(statuses=('blocked',))):
+        with pytest.raises(ValueError):
+            render_progress(out.write, make_progress(), query, 'json')
+    assert out.getvalue() == ''
@@ -0,0 +1,57 @@
+"""
+Component scans: only the signals present are weighted, tests under
+`test_roots` count, and a test's base name only marks sources in its own,
+`__tests__`-parent or mirrored directory.
+"""
+
+import json
+
+from agentlib.scanner import scan
+
+
+def make_tree(root):
+    (root / 'src').mkdir()
+    (root / 'src' / 'server.ts').write_text("export const listen = () => 1;\n")
+    (root / 'src' / 'routes.ts').write_text("// TODO: auth\nexport const routes = [];\n")
+    (root / 'test' / 'src').mkdir(parents=True)
+    (root / 'test' / 'src' / 'server.test.js').write_text("require('http');\n")
+    return {'version': 1, 'components': {'backend.api': ['src/*.ts']}}
+
+
+def test_missing_coverage_weights_only_the_signals_present(tmp_path):
+    config = make_tree(tmp_path)
+    results, _ = scan(tmp_path, config, tmp_path / 'cache.json', workers=1)
+    # tests 0/2 (weight 0.4), todos 1/2 (weight 0.1); server.test.js is outside test_roots
+    assert results['backend.api']['signals']['coverage'] is None
+    assert results['backend.api']['score'] == round(100 * 0.1 * 0.5 / 0.5)
+
+
+def test_test_roots_and_coverage_are_scored(tmp_path):
+    config = make_tree(tmp_path)
+    config['test_roots'] = ['test/**']
+    config['coverage'] = ['coverage']
+    (tmp_path / 'coverage').mkdir()
+    (tmp_path / 'coverage' / 'coverage-summary.json').write_text(json.dumps({
+        'total': {},
+        str(tmp_path / 'src' / 'server.ts'): {'lines': {'covered': 3, 'total': 4}},
+        str(tmp_path / 'src' / 'routes.ts'): {'lines': {'covered': 1, 'total': 4}},
+    }))
+    result = scan(tmp_path, config, tmp_path / 'cache.json', workers=1)[0]['backend.api']
+    # test/src/server.test.js mirrors src/server.ts
+    assert result['tested'] == 1
+    assert result['signals']['coverage'] == 0.5
+    assert result['score'] == round(100 * (0.5 * 0.5 + 0.4 * 0.5 + 0.1 * 0.5))
+
+
+def test_base_name_matches_only_the_tests_own_or_mirrored_directory(tmp_path):
+    (tmp_path / 'src' / '__tests__').mkdir(parents=True)
+    (tmp_path / 'src' / 'other').mkdir()
+    for path in ('src/index.ts', 'src/other/index.ts', 'src/util.ts', 'src/other/util.ts'):
+        (tmp_path / path).write_text("export {};\n")
+    (tmp_path / 'src' / '__tests__' / 'index.test.ts').write_text("export {};\n")
+    (tmp_path / 'src' / 'other' / 'util.spec.ts').write_text("export {};\n")
+    config = {'version': 1, 'components': {'app.root': ['src/*.ts'], 'app.other': ['src/other/*.ts']}}
+
+    results = scan(tmp_path, config, tmp_path / 'cache.json', workers=1)[0]
+    assert results['app.root']['tested'] == 1
+    assert results['app.other']['tested'] == 1
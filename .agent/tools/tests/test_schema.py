@@ -0,0 +1,55 @@
+"""
+progress.json validation reports every problem with its path, and older
+documents are migrated to the current format version on load.
+"""
+
+import pytest
+
+from agentlib.schema import CURRENT_VERSION, SchemaError, load_document, migrate
+
+
+def test_unversioned_document_is_migrated():
+    document = load_document({
+        'components': {'frontend': {'app': 40, 'editor': {'score': 70, 'weight': 2}}},
+        'metadata': {'last_updated': '2025-01-01T00:00:00Z'},
+        'metrics': {'phase': 'dev'},
+        'tasks': {'pending': ['a']},
+    })
+    assert document['metadata']['format_version'] == CURRENT_VERSION
+    assert document['tasks'] == {'pending': ['a'], 'completed': [], 'in_progress': []}
+    assert document['metrics'] == {'phase': 'dev', 'blockers': [], 'health': 'green', 'overall_completion': 60.0}
+
+
+def test_errors_name_their_paths():
+    with pytest.raises(SchemaError) as excinfo:
+        load_document({
+            'components': {'frontend': {'app': '95', 'nested': {'deep': 101}}},
+            'metadata': {'format_version': CURRENT_VERSION, 'last_updated': 'x'},
+            'metrics': {'overall_completion': 50, 'phase': 'dev', 'health': 'green', 'blockers': 'none'},
+            'tasks': {'completed': [], 'in_progress': [3], 'pending': []},
+        })
+    assert [path for path, _ in excinfo.value.errors] == [
+        'components.frontend.app', 'components.frontend.nested.deep', 'metrics.blockers', 'tasks.in_progress[0]']
+    assert 'components.frontend.app: expected a score 0-100 or an object, got "95"' in str(excinfo.value)
+
+
+def test_newer_versions_are_rejected():
+    with pytest.raises(SchemaError, match='newer than this tool supports'):
+        load_document({'metadata': {'format_version': '9.0', 'last_updated': 'x'}})
+
+
+def test_version_1_0_migrates_to_1_1_keeping_existing_fields():
+    document = {
+        'components': {'frontend': {'app': 90}},
+        'metadata': {'format_version': '1.0', 'last_updated': '2025-01-01T00:00:00Z'},
+        'metrics': {'overall_completion': 42, 'health': 'yellow', 'blockers': ['Flaky CI']},
+        'tasks': {'completed': ['a'], 'in_progress': []},
+    }
+    assert migrate(document)
+    assert document['metadata']['format_version'] == '1.1'
+    assert document['tasks'] == {'completed': ['a'], 'in_progress': [], 'pending': []}
+    # Only missing fields are filled in; a stale overall_completion is left to the next update
+    assert document['metrics'] == {'overall_completion': 42, 'health': 'yellow', 'blockers': ['Flaky CI'],
+                                   'phase': 'unknown'}
+    assert not migrate(document)
+    assert load_document(document) is document
@@ -0,0 +1,77 @@
+"""
+Start-up budget: `agent.py show` must stay within a fixed time of a bare
+interpreter and must not import modules only other commands need.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from agentlib.fixtures import make_project
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+AGENT = TOOLS_DIR / 'agent.py'
+
+# Median wall time allowed on top of `python -c pass`; override with AGENT_STARTUP_BUDGET_MS
+BUDGET_MS = float(os.environ.get('AGENT_STARTUP_BUDGET_MS', 100))
+SAMPLES = 9
+# Imported by scan/aggregate/trend/history/git, never by `show`
+HEAVY_MODULES = ('subprocess', 'sqlite3', 'concurrent.futures', 'multiprocessing', 'mmap', 'tempfile', 'socket')
+
+
+def make_blocked_project(tmp_path: Path) -> Path:
+    root = make_project(tmp_path / 'project', 8, 9, 5, 0)
+    (root / '.agent' / 'current' / 'blockers.md').write_text(
+        "# Blockers\n\n## Active Blockers\n\n### Flaky CI\n\n- **Severity**: Medium\n")
+    return root
+
+
+def cli_env() -> dict:
+    env = {**os.environ, 'AGENT_NO_DAEMON': '1'}
+    # Time a normal install, where bytecode is cached after the first run
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env.pop('AGENT_PROFILE', None)
+    return env
+
+
+def median_ms(argv, cwd: Path) -> float:
+    env = cli_env()
+    subprocess.run(argv, cwd=cwd, env=env, capture_output=True)
+    samples = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        result = subprocess.run(argv, cwd=cwd, env=env, capture_output=True)
+        samples.append(time.perf_counter() - start)
+        assert result.returncode == 0, result
+    return statistics.median(samples) * 1000
+
+
+def test_show_start_up_within_budget(tmp_path):
+    root = make_blocked_project(tmp_path)
+    baseline = median_ms([sys.executable, '-c', 'pass'], root)
+    show = median_ms([sys.executable, str(AGENT), 'show'], root)
+    assert show - baseline < BUDGET_MS, f"agent show took {show:.1f}ms ({baseline:.1f}ms bare python)"
+
+
+def test_show_does_not_import_heavy_modules(tmp_path):
+    root = make_blocked_project(tmp_path)
+    # The first run writes the parsed-blockers cache; measure a warm one
+    assert subprocess.run([sys.executable, str(AGENT), 'show'], cwd=root, env=cli_env(),
+                          capture_output=True).returncode == 0
+    probe = (
+        "import json, runpy, sys\n"
+        f"sys.argv = [{str(AGENT)!r}, 'show']\n"
+        f"sys.path.insert(0, {str(TOOLS_DIR)!r})\n"
+        "try:\n"
+        "    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "finally:\n"
+        f"    sys.stderr.write(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', probe], cwd=root, env=cli_env(), capture_output=True, text=True)
+    assert result.returncode == 0, result
+    assert 'Active Blockers' in result.stdout
+    assert json.loads(result.stderr) == []
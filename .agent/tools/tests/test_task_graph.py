@@ -0,0 +1,99 @@
+"""
+Task dependencies: next tasks are unblocked and ranked by priority and
+critical path, incremental updates match a fresh build, and cycles are
+rejected before anything changes or when a document is loaded.
+"""
+
+import random
+
+import pytest
+
+from agentlib.schema import SchemaError, load_document
+from agentlib.task_graph import DependencyCycleError, TaskGraph, dependency_cycle
+from agentlib.task_store import TaskStore
+
+
+def make_store():
+    return TaskStore.from_json(
+        {'completed': ['design'], 'in_progress': [], 'pending': ['schema', 'api', 'ui', 'docs', 'lint']},
+        {'schema': {'estimate': 2},
+         'api': {'depends_on': ['schema', 'design'], 'estimate': 3},
+         'ui': {'depends_on': ['api', 'mockups']},
+         'lint': {'priority': 1}})
+
+
+def snapshot(graph):
+    return (graph.next_tasks(), graph.blocked(), graph.critical_path(),
+            {task: (graph.depth(task), graph.critical_length(task)) for task in graph.topological_order()})
+
+
+def test_next_tasks_skip_blocked_and_rank_by_priority_then_critical_path():
+    store = make_store()
+    graph = store.graph
+    assert store.next_tasks() == ['lint', 'schema', 'docs']
+    assert graph.blocked() == ['api', 'ui']
+    assert graph.unmet('ui') == ['api', 'mockups']
+    assert graph.critical_path() == ['schema', 'api', 'ui']
+    assert graph.critical_length('schema') == 6
+
+    store.set_status('schema', 'completed')
+    assert store.next_tasks(2) == ['lint', 'api']
+    assert graph.critical_path() == ['api', 'ui']
+
+
+def test_plain_backlog_keeps_pending_order_without_building_the_graph():
+    store = TaskStore.from_json({'pending': ['b', 'a', 'c']}, {'a': {'owner': 'sam'}})
+    assert store.next_tasks(2) == ['b', 'a']
+    assert store._graph is None
+
+
+def test_incremental_updates_match_a_fresh_build():
+    rng = random.Random(7)
+    names = [f't{i}' for i in range(60)]
+    store = TaskStore.from_json({'pending': names})
+    store.graph
+    for step in range(300):
+        task = rng.choice(names)
+        status = rng.choice(['pending', 'in_progress', 'completed'])
+        earlier = names[:names.index(task)]
+        depends_on = rng.sample(earlier, min(len(earlier), rng.randint(0, 3))) if step % 2 else None
+        store.set_status(task, status, priority=rng.choice([None, 0, 1, 2]),
+                         estimate=rng.choice([None, 0.5, 2, 5]), depends_on=depends_on)
+        fresh = TaskStore.from_json(store.to_json(), store.metadata_json()).graph
+        assert snapshot(store.graph) == snapshot(fresh)
+
+
+def test_cycles_are_rejected_before_anything_changes():
+    store = make_store()
+    with pytest.raises(DependencyCycleError) as error:
+        store.set_status('schema', 'pending', depends_on=['ui'])
+    assert error.value.cycle == ['schema', 'api', 'ui', 'schema']
+    assert 'depends_on' not in store.metadata('schema')
+    assert store.dependency_cycle('docs', ['docs']) == ['docs', 'docs']
+
+    with pytest.raises(DependencyCycleError):
+        TaskGraph.build({'a': 'pending', 'b': 'pending'},
+                        {'a': {'depends_on': ['b']}, 'b': {'depends_on': ['a']}})
+
+
+def test_cycle_through_a_task_whose_prerequisite_has_none():
+    # The x tasks have no prerequisites of their own, so Kahn's algorithm never
+    # counts them; several make it near certain one is visited before 'b'
+    leaves = [f'x{i}' for i in range(10)]
+    with pytest.raises(DependencyCycleError) as error:
+        TaskGraph.build(dict.fromkeys(['a', 'b', *leaves], 'pending'),
+                        {'a': {'depends_on': [*leaves, 'b']}, 'b': {'depends_on': ['a']}})
+    assert error.value.cycle == ['a', 'b', 'a']
+    assert dependency_cycle({'a': ['x', 'b'], 'b': ['c'], 'c': ['a']}) == ['a', 'c', 'b', 'a']
+    assert dependency_cycle({'a': ['x', 'b'], 'b': ['x']}) is None
+
+
+def test_cycles_in_a_loaded_document_are_schema_errors():
+    document = {
+        'components': {}, 'metadata': {'format_version': '1.1', 'last_updated': 'x'},
+        'metrics': {'overall_completion': 0, 'phase': 'dev', 'health': 'green', 'blockers': []},
+        'tasks': {'completed': [], 'in_progress': [], 'pending': ['a', 'b', 'x']},
+        'task_metadata': {'a': {'depends_on': ['x', 'b']}, 'b': {'depends_on': ['a']}},
+    }
+    with pytest.raises(SchemaError, match='dependency cycle: a → b → a'):
+        load_document(document)
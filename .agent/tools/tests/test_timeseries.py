@@ -0,0 +1,61 @@
+"""
+Score time series: each tier is a ring buffer that wraps in place, and points
+evicted from a full tier roll up into the next, coarser one (last value per
+series and bucket) before the last tier drops them.
+"""
+
+from agentlib.timeseries import TimeSeries
+
+
+def record(series, *stamps, name='overall'):
+    for ts in stamps:
+        series.append([(name, float(ts))], ts=ts)
+
+
+def values(series, name='overall', since=None):
+    return [value for _, value in series.points([name], since)[name]]
+
+
+def test_ring_buffer_wraps_around(tmp_path):
+    with TimeSeries(tmp_path / 'progress.series', tiers=((0, 4),)) as series:
+        record(series, 1, 2, 3)
+        assert series._tier(0)[2:] == (0, 3)
+        record(series, 4, 5, 6)
+        # The two oldest points were overwritten; head moved past them
+        assert series._tier(0)[2:] == (2, 4)
+        assert values(series) == [3, 4, 5, 6]
+        # The time-window search works across the wrap
+        assert values(series, since=5) == [5, 6]
+        assert values(series, since=4.5) == [5, 6]
+        assert values(series, since=7) == []
+
+    with TimeSeries(tmp_path / 'progress.series') as series:
+        assert values(series) == [3, 4, 5, 6]
+        assert series.last_values() == {'overall': 6}
+
+
+def test_evicted_points_roll_up_into_coarser_tiers(tmp_path):
+    # Two raw points, then 10 s buckets, then 100 s buckets
+    with TimeSeries(tmp_path / 'progress.series', tiers=((0, 2), (10, 2), (100, 3))) as series:
+        record(series, 1, 5, 12, 15)
+        # 1 and 5 share a 10 s bucket; the later value replaced the earlier one
+        assert values(series) == [5, 12, 15]
+        record(series, 31, 120, 250)
+        # 5 fell out of the 10 s tier into the 100 s tier
+        assert values(series) == [5, 15, 31, 120, 250]
+        record(series, 260)
+        # 15 joined 5's 100 s bucket and replaced it
+        assert values(series) == [15, 31, 120, 250, 260]
+        assert [series._tier(tier)[3] for tier in range(3)] == [2, 2, 1]
+        assert values(series, since=100) == [120, 250, 260]
+
+
+def test_buckets_keep_one_point_per_series(tmp_path):
+    with TimeSeries(tmp_path / 'progress.series', tiers=((0, 2), (10, 4))) as series:
+        record(series, 1, name='frontend')
+        record(series, 2, name='backend')
+        record(series, 3, 4, 5, name='frontend')
+        # frontend's 3 replaced its 1 in the shared bucket; backend's point there is untouched
+        assert series.points(['frontend', 'backend']) == {'frontend': [(3, 3), (4, 4), (5, 5)], 'backend': [(2, 2)]}
+        assert series._tier(1)[3] == 2
+        assert series.names() == ['frontend', 'backend']
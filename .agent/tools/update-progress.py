@@ -4,250 +4,696 @@ Progress tracking tool for pub-sub-demo project.
 Updates .agent/current/progress.json with current completion status.
 """
 
+import io
 import json
-import os
 import sys
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from agentlib import profiling, project
+from agentlib.daemon import forward_to_daemon
+from agentlib.fsutil import state_lock
+from agentlib.progress_store import (
+    ProgressJournal,
+    apply_operation,
+    operation_path,
+    timestamp,
+)
+from agentlib.render import FORMATS, SECTIONS, OutputBuffer, ProgressQuery, render_progress
+from agentlib.task_store import TASK_STATUSES
+# The time series, scanner and aggregate modules are imported by the commands
+# that use them, keeping start-up for everyday commands short.
+
+# Window (days) used by `trend` when none is given
+DEFAULT_TREND_DAYS = 30
+# `show` options taking a value; the integer ones map to ProgressQuery fields
+SHOW_OPTIONS = {
+    "--format": None,
+    "--category": None,
+    "--status": None,
+    "--only": None,
+    "--min": "min_score",
+    "--max": "max_score",
+    "--offset": "offset",
+    "--limit": "limit",
+}
+# `task` options, all taking a value
+TASK_OPTIONS = ("--priority", "--estimate", "--depends-on")
 
 
 def get_project_root() -> Path:
     """Find the project root directory."""
-    current = Path.cwd()
-    while current != current.parent:
-        if (current / '.agent').exists() and (current / 'package.json').exists():
-            return current
-        current = current.parent
-    raise RuntimeError("Could not find project root")
+    return project.find_project_root()
+
+
+def get_state_dir() -> Path:
+    """Get the .agent/current state directory."""
+    return project.state_dir()
+
+
+def get_journal() -> ProgressJournal:
+    """Get the journal backing progress.json."""
+    return project.get_journal()
+
+
+def get_series_file() -> Path:
+    """Get the score time series file (local to this checkout, so kept out of git in the cache)."""
+    return get_project_root() / '.agent' / 'cache' / 'progress.series'
 
 
 def load_progress() -> Dict[str, Any]:
-    """Load current progress data."""
-    progress_file = get_project_root() / '.agent' / 'current' / 'progress.json'
-
-    if not progress_file.exists():
-        # Create default progress structure
-        return {
-            "components": {
-                "frontend": {
-                    "react_app": 95,
-                    "authentication": 90,
-                    "document_editor": 85,
-                    "real_time_sync": 80,
-                    "ui_components": 90
-                },
-                "backend": {
-                    "sharedb_integration": 85,
-                    "jwt_auth": 90,
-                    "websocket_handling": 80,
-                    "api_routes": 85,
-                    "middleware": 90
-                },
-                "shared": {
-                    "type_definitions": 90,
-                    "validation_schemas": 85,
-                    "auth_utilities": 90,
-                    "logging": 80
-                },
-                "infrastructure": {
-                    "testing_setup": 85,
-                    "ci_cd_pipeline": 70,
-                    "docker_config": 80,
-                    "documentation": 85
-                }
-            },
-            "metadata": {
-                "format_version": "1.0",
-                "last_updated": datetime.now().isoformat() + "Z",
-                "project_start": "2025-01-01",
-                "package_manager": "pnpm",
-                "project": "pub-sub-demo"
-            },
-            "metrics": {
-                "blockers": [],
-                "health": "green",
-                "overall_completion": 85.0,
-                "phase": "development-stabilization"
-            },
-            "tasks": {
-                "completed": [
-                    "Basic React app setup",
-                    "ShareDB integration",
-                    "JWT authentication",
-                    "WebSocket connections",
-                    "Basic document editing"
-                ],
-                "in_progress": [
-                    "Agent system setup",
-                    "Comprehensive testing",
-                    "Security hardening"
-                ],
-                "pending": [
-                    "Performance optimization",
-                    "Production deployment",
-                    "Monitoring setup"
-                ]
-            }
-        }
-
-    with open(progress_file, 'r') as f:
-        return json.load(f)
-
-
-def calculate_overall_completion(components: Dict[str, Dict[str, int]]) -> float:
-    """Calculate overall completion percentage."""
-    total_score = 0
-    total_components = 0
-
-    for category in components.values():
-        for score in category.values():
-            total_score += score
-            total_components += 1
-
-    if total_components == 0:
-        return 0.0
-
-    return round(total_score / total_components, 1)
-
-
-def update_component(progress: Dict[str, Any], category: str, component: str, value: int) -> bool:
-    """Update a specific component's progress."""
-    if category not in progress["components"]:
-        print(f"Error: Category '{category}' not found")
-        print(f"Available categories: {', '.join(progress['components'].keys())}")
-        return False
-
-    if component not in progress["components"][category]:
-        print(f"Error: Component '{component}' not found in category '{category}'")
-        print(f"Available components: {', '.join(progress['components'][category].keys())}")
-        return False
-
-    if not 0 <= value <= 100:
-        print("Error: Progress value must be between 0 and 100")
-        return False
-
-    old_value = progress["components"][category][component]
-    progress["components"][category][component] = value
-
-    # Recalculate overall completion
-    progress["metrics"]["overall_completion"] = calculate_overall_completion(progress["components"])
-
-    # Update metadata
-    progress["metadata"]["last_updated"] = datetime.now().isoformat() + "Z"
+    """Load current progress data (metrics.blockers / health derived from blockers.md)."""
+    return project.load_progress()
+
+
+def validate_operation(progress: Dict[str, Any], op: Dict[str, Any]) -> Optional[str]:
+    """Check an operation against the current document. Returns an error message or None."""
+    kind = op.get("op")
+
+    if kind == "update":
+        components, value = progress["components"], op.get("value")
+        path = operation_path(op)
+        if len(path) < 2 or not all(isinstance(name, str) for name in path):
+            return "Update needs a category and component (or a dotted path)"
+        category = components.find(path[:1])
+        if category is None:
+            return (f"Category '{path[0]}' not found\n"
+                    f"Available categories: {', '.join(node.name for node in components.categories())}")
+        node = components.find(path)
+        if node is None or not node.is_leaf:
+            available = [leaf.split('.', 1)[1] for leaf in components.leaf_paths(category)]
+            return (f"Component '{'.'.join(path[1:])}' not found in category '{path[0]}'\n"
+                    f"Available components: {', '.join(available)}")
+        if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= 100:
+            return "Progress value must be between 0 and 100"
+
+    elif kind == "task":
+        if not isinstance(op.get("task"), str) or not op["task"]:
+            return "Task name must be a non-empty string"
+        if op.get("status", "pending") not in TASK_STATUSES:
+            return f"Status must be one of: {', '.join(TASK_STATUSES)}"
+        if op.get("owner") is not None and not isinstance(op["owner"], str):
+            return "Task owner must be a string"
+        priority, estimate, depends_on = op.get("priority"), op.get("estimate"), op.get("depends_on")
+        if priority is not None and (not isinstance(priority, int) or isinstance(priority, bool)):
+            return "Task priority must be an integer"
+        if estimate is not None and (not isinstance(estimate, (int, float)) or isinstance(estimate, bool)
+                                     or not estimate > 0):
+            return "Task estimate must be a positive number"
+        if depends_on is not None:
+            if not isinstance(depends_on, list) or not all(isinstance(dep, str) and dep for dep in depends_on):
+                return "Task dependencies must be a list of task names"
+            cycle = progress["tasks"].dependency_cycle(op["task"], depends_on)
+            if cycle:
+                return f"Dependency cycle: {' → '.join(cycle)}"
+
+    elif kind == "phase":
+        if not isinstance(op.get("phase"), str) or not op["phase"]:
+            return "Phase must be a non-empty string"
+
+    else:
+        return f"Unknown operation '{kind}' (expected update, task or phase)"
+
+    return None
 
-    print(f"Updated {category}.{component}: {old_value}% → {value}%")
-    print(f"Overall completion: {progress['metrics']['overall_completion']}%")
 
-    return True
+def read_progress() -> Dict[str, Any]:
+    """Load progress under a shared lock, for read-only commands."""
+    return project.read_progress()
 
 
-def add_task(progress: Dict[str, Any], task: str, status: str = "pending") -> bool:
-    """Add a new task to the progress tracking."""
-    valid_statuses = ["completed", "in_progress", "pending"]
+def update_component(progress: Dict[str, Any], category: str, component: str, value: int) -> Optional[Dict[str, Any]]:
+    """Update a specific component's progress. Returns the applied operation.
 
-    if status not in valid_statuses:
-        print(f"Error: Status must be one of: {', '.join(valid_statuses)}")
-        return False
+    `component` may be a dotted path for nested components (e.g. 'sharedb.ops').
+    """
+    op = {"op": "update", "category": category, "component": component, "value": value, "ts": timestamp()}
+    error = validate_operation(progress, op)
+    if error:
+        print(f"Error: {error}")
+        return None
 
-    # Remove task from other status lists first
-    for task_status in valid_statuses:
-        if task in progress["tasks"][task_status]:
-            progress["tasks"][task_status].remove(task)
+    old_value = progress["components"].find(operation_path(op)).score
+    apply_operation(progress, op)
+
+    print(f"Updated {category}.{component}: {old_value}% → {value}%")
+    print(f"Overall completion: {progress['metrics']['overall_completion']}%")
 
-    # Add to the specified status
-    if task not in progress["tasks"][status]:
-        progress["tasks"][status].append(task)
+    return op
+
+
+def add_task(progress: Dict[str, Any], task: str, status: str = "pending",
+             owner: Optional[str] = None, priority: Optional[int] = None,
+             estimate: Optional[float] = None, depends_on: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Add a new task to the progress tracking. Returns the applied operation.
+
+    `depends_on` replaces the task's prerequisites ([] clears them).
+    """
+    op = {"op": "task", "task": task, "status": status, "ts": timestamp()}
+    if owner:
+        op["owner"] = owner
+    if priority is not None:
+        op["priority"] = priority
+    if estimate is not None:
+        op["estimate"] = estimate
+    if depends_on is not None:
+        op["depends_on"] = depends_on
+    error = validate_operation(progress, op)
+    if error:
+        print(f"Error: {error}")
+        return None
+
+    if progress["tasks"].status_of(task) != status:
         print(f"Added task '{task}' with status '{status}'")
     else:
         print(f"Task '{task}' already exists with status '{status}'")
 
-    progress["metadata"]["last_updated"] = datetime.now().isoformat() + "Z"
-    return True
+    apply_operation(progress, op)
+    return op
+
+
+def set_phase(progress: Dict[str, Any], phase: str) -> Dict[str, Any]:
+    """Update the project phase. Returns the applied operation."""
+    old_phase = progress["metrics"]["phase"]
+    op = {"op": "phase", "phase": phase, "ts": timestamp()}
+    apply_operation(progress, op)
+    print(f"Updated phase: {old_phase} → {phase}")
+    return op
+
+
+def parse_task_args(args: List[str]) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Parse `task` arguments after the status: [owner] [--priority N] [--estimate H] [--depends-on A,B]."""
+    owner = None
+    options: Dict[str, Any] = {}
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg in TASK_OPTIONS and not args:
+            raise ValueError(f"{arg} requires a value")
+        if arg == "--priority":
+            value = args.pop(0)
+            try:
+                options["priority"] = int(value)
+            except ValueError:
+                raise ValueError(f"--priority expects an integer, got '{value}'") from None
+        elif arg == "--estimate":
+            value = args.pop(0)
+            try:
+                options["estimate"] = float(value)
+            except ValueError:
+                raise ValueError(f"--estimate expects a number of hours, got '{value}'") from None
+        elif arg == "--depends-on":
+            options["depends_on"] = [task for task in args.pop(0).split(',') if task]
+        elif owner is None and not arg.startswith("--"):
+            owner = arg
+        else:
+            raise ValueError(f"Unexpected argument: {arg}")
+    return owner, options
+
+
+@profiling.timed()
+def apply_batch(progress: Dict[str, Any], lines: Iterable[str],
+                applied_ops: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+    """Apply a JSONL stream of operations in memory. Returns per-operation errors.
+
+    Invalid operations are reported and skipped; the rest of the batch still
+    applies. Applied operations are appended to `applied_ops` if given.
+    """
+    errors = []
+    applied = 0
+    ts = timestamp()
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        try:
+            op = json.loads(line)
+        except ValueError as e:
+            errors.append(f"line {line_number}: invalid JSON ({e})")
+            continue
+        if not isinstance(op, dict):
+            errors.append(f"line {line_number}: operation must be a JSON object")
+            continue
+
+        error = validate_operation(progress, op)
+        if error:
+            errors.append(f"line {line_number}: {error.splitlines()[0]}")
+            continue
+
+        op.setdefault("ts", ts)
+        if op["op"] == "task":
+            op.setdefault("status", "pending")
+        apply_operation(progress, op)
+        applied += 1
+        if applied_ops is not None:
+            applied_ops.append(op)
+
+    print(f"Applied {applied} operation(s), {len(errors)} error(s)")
+    for error in errors:
+        print(f"  Error: {error}")
+    print(f"Overall completion: {progress['metrics']['overall_completion']}%")
 
+    return errors
 
+
+@profiling.timed()
 def save_progress(progress: Dict[str, Any]) -> None:
-    """Save progress data to file."""
-    progress_file = get_project_root() / '.agent' / 'current' / 'progress.json'
-    progress_file.parent.mkdir(parents=True, exist_ok=True)
-
-    with open(progress_file, 'w') as f:
-        json.dump(progress, f, indent=4)
-
-    print(f"Progress saved to {progress_file}")
-
-
-def display_progress(progress: Dict[str, Any]) -> None:
-    """Display current progress in a readable format."""
-    print(f"\nPub-Sub Demo Progress Report")
-    print(f"Overall Completion: {progress['metrics']['overall_completion']}%")
-    print(f"Current Phase: {progress['metrics']['phase']}")
-    print(f"Health Status: {progress['metrics']['health']}")
-    print(f"Last Updated: {progress['metadata']['last_updated']}")
-
-    print(f"\nComponent Progress:")
-    for category, components in progress["components"].items():
-        print(f"\n{category.title()}:")
-        for component, score in components.items():
-            bar_length = 20
-            filled_length = int(score * bar_length // 100)
-            bar = "█" * filled_length + "░" * (bar_length - filled_length)
-            print(f"  {component}: {score:3d}% [{bar}]")
-
-    print(f"\nTasks:")
-    for status, tasks in progress["tasks"].items():
-        if tasks:
-            print(f"\n{status.title().replace('_', ' ')}:")
-            for task in tasks:
-                status_icon = {"completed": "✅", "in_progress": "🔄", "pending": "⏳"}
-                print(f"  {status_icon.get(status, '•')} {task}")
+    """Save a full progress snapshot, folding in any journaled updates."""
+    journal = get_journal()
+    journal.write_snapshot(progress)
+
+    print(f"Progress saved to {journal.snapshot_file}")
+
+
+@profiling.timed()
+def record_operation(progress: Dict[str, Any], op: Dict[str, Any]) -> None:
+    """Append an applied operation to the journal, compacting when it grows too large."""
+    journal = get_journal()
+    journal.append(op)
+
+    if journal.needs_compaction():
+        save_progress(progress)
+    else:
+        print(f"Progress update journaled to {journal.journal_file}")
+    record_scores(progress, [op])
+
+
+@profiling.timed()
+def record_scores(progress: Dict[str, Any], ops: List[Dict[str, Any]]) -> None:
+    """Append overall, category and changed component scores to the time series.
+
+    Series are named by component path, with '' for overall completion. Only
+    score updates are recorded; task and phase changes leave scores alone.
+    """
+    changed = sorted({'.'.join(operation_path(op)) for op in ops if op["op"] == "update"})
+    if not changed:
+        return
+    from agentlib.timeseries import TimeSeries
+    components = progress["components"]
+    points = [('', components.overall())]
+    points.extend((category.path, category.completion) for category in components.categories())
+    points.extend((path, components.find(path).score) for path in changed)
+    with TimeSeries(get_series_file()) as series:
+        series.append(points)
+
+
+def format_eta(current: float, rate: Optional[float], now: datetime) -> str:
+    """Projected date of reaching 100% at `rate` (% per day)."""
+    if current >= 100:
+        return "done"
+    if not rate or rate <= 0:
+        return "—"
+    days = (100 - current) / rate
+    if days > 3650:
+        return "> 10 years"
+    return (now + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+@profiling.timed()
+def display_trend(progress: Dict[str, Any], days: int) -> None:
+    """Show per-category velocity and ETA over the last `days` days."""
+    from agentlib.timeseries import TimeSeries, velocity
+    components = progress["components"]
+    rows = [('overall', '')] + [(category.name, category.path) for category in components.categories()]
+    now = datetime.now()
+    since = time.time() - days * 86400
+    history: Dict[str, list] = {}
+    if get_series_file().exists():
+        with TimeSeries(get_series_file()) as series:
+            history = series.points([path for _, path in rows], since)
+
+    if not any(history.values()):
+        print("No progress history yet; it is recorded on every score update.")
+        return
+
+    print(f"\nProgress trend (last {days} days)")
+    print(f"\n{'Category':<20} {'Current':>8} {'Change':>8} {'Velocity':>12}  {'ETA (100%)':<12} Points")
+    for name, path in rows:
+        points = history[path]
+        current = components.overall() if path == '' else components.find(path).completion
+        change = f"{current - points[0][1]:+.1f}" if points else "—"
+        rate = velocity(points)
+        rate_text = f"{rate:+.2f}%/day" if rate is not None else "—"
+        print(f"{name:<20} {current:7.1f}% {change:>8} {rate_text:>12}  "
+              f"{format_eta(current, rate, now):<12} {len(points)}")
+
+
+@profiling.timed()
+def parse_show_args(args: List[str]) -> Tuple[ProgressQuery, str]:
+    """Parse `show` options into a query and an output format."""
+    fmt = 'text'
+    categories: List[str] = []
+    statuses: List[str] = []
+    options: Dict[str, Any] = {}
+
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg in SHOW_OPTIONS and not args:
+            raise ValueError(f"{arg} requires a value")
+        if arg == "--format":
+            fmt = args.pop(0)
+            if fmt not in FORMATS:
+                raise ValueError(f"Unknown format: {fmt} (expected one of {', '.join(FORMATS)})")
+        elif arg == "--category":
+            categories.extend(name for name in args.pop(0).split(',') if name)
+        elif arg == "--status":
+            statuses.extend(status for status in args.pop(0).split(',') if status)
+        elif arg == "--only":
+            section = args.pop(0)
+            if section not in SECTIONS:
+                raise ValueError(f"--only expects one of {', '.join(SECTIONS)}")
+            options['sections'] = (section,)
+        elif arg in SHOW_OPTIONS:
+            value = int(args.pop(0))
+            if value < 0:
+                raise ValueError(f"{arg} must not be negative")
+            options[SHOW_OPTIONS[arg]] = value
+        else:
+            raise ValueError(f"Unexpected argument: {arg}")
+
+    return ProgressQuery(categories=tuple(categories), statuses=tuple(statuses), **options), fmt
+
+
+@profiling.timed()
+def display_progress(progress: Dict[str, Any], query: Optional[ProgressQuery] = None, fmt: str = 'text') -> None:
+    """Display current progress as a bar chart, or as JSON/NDJSON/TSV for scripts."""
+    with OutputBuffer() as out:
+        render_progress(out.write, progress, query, fmt)
+
+
+@profiling.timed()
+def run_aggregate(args: List[str]) -> None:
+    """Handle `aggregate [root] [--manifest FILE] [--depth N] [--workers N] [--no-git]`."""
+    from agentlib.aggregate import DEFAULT_MAX_DEPTH, discover_projects, load_projects, read_manifest, rollup
+    root = manifest = workers = None
+    depth = DEFAULT_MAX_DEPTH
+    git = True
+
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg in ("--manifest", "--depth", "--workers") and not args:
+            raise ValueError(f"{arg} requires a value")
+        if arg == "--manifest":
+            manifest = Path(args.pop(0))
+        elif arg == "--depth":
+            depth = int(args.pop(0))
+        elif arg == "--workers":
+            workers = int(args.pop(0))
+        elif arg == "--no-git":
+            git = False
+        elif root is None:
+            root = Path(arg)
+        else:
+            raise ValueError(f"Unexpected argument: {arg}")
+
+    if manifest is not None:
+        projects = read_manifest(manifest)
+        root = (root or manifest.parent).resolve()
+        source = f"listed in {manifest}"
+    else:
+        root = (root or Path.cwd()).resolve()
+        with profiling.span('discover projects'):
+            projects = discover_projects(root, depth)
+        source = f"under {root}"
+
+    try:
+        # Caches for the other projects stay in this one's (git-ignored) cache
+        cache_dir = get_project_root() / '.agent' / 'cache' / 'aggregate'
+    except RuntimeError:
+        cache_dir = None
+    with profiling.span('load projects', projects=len(projects)):
+        summaries = load_projects(projects, root, workers, git, cache_dir)
+    display_aggregate(summaries, rollup(summaries), source)
+
+
+def display_aggregate(summaries: List[Any], totals: Dict[str, Any], source: str) -> None:
+    """Display an org-level report from per-project summaries."""
+    if not summaries:
+        print(f"No projects with .agent/current/progress.json {source}")
+        return
+
+    count = totals['projects']
+    print(f"\nOrg Progress Report ({count} project{'s' if count != 1 else ''} {source})")
+    print(f"Overall Completion: {totals['overall']}%")
+    print(f"Health: {', '.join(f'{projects} {health}' for health, projects in sorted(totals['health'].items()))}")
+    print(f"Active Blockers: {totals['blockers']}")
+    if totals['failed']:
+        print(f"Failed to load: {totals['failed']}")
+
+    print("\nCategory Completion:")
+    for category, completion in totals['categories'].items():
+        print(f"  {category}: {completion:.1f}%")
+
+    width = max(len(summary.name) for summary in summaries)
+    print("\nProjects:")
+    for summary in summaries:
+        if summary.error:
+            print(f"  {summary.name:<{width}}  Error: {summary.error}")
+            continue
+        git = f"  {summary.branch or '(detached)'}, {summary.modified} modified" if summary.modified is not None else ""
+        print(f"  {summary.name:<{width}}  {summary.overall:5.1f}%  {summary.health or '?':<6}  {summary.phase}{git}")
+        categories = "  ".join(f"{name} {weighted_sum / weight if weight else 0:.1f}%"
+                               for name, (weighted_sum, weight) in summary.categories.items())
+        print(f"  {'':<{width}}  {categories}")
+
+
+def get_metrics_file() -> Path:
+    """Default textfile written by `metrics`."""
+    return get_project_root() / '.agent' / 'cache' / 'metrics' / 'agent.prom'
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """`PORT` or `HOST:PORT` for `metrics --serve`."""
+    from agentlib.metrics import DEFAULT_HOST
+    host, _, port = value.rpartition(':')
+    try:
+        return host or DEFAULT_HOST, int(port)
+    except ValueError:
+        raise ValueError(f"--serve expects PORT or HOST:PORT, got '{value}'") from None
+
+
+@profiling.timed()
+def run_metrics(args: List[str]) -> None:
+    """Handle `metrics [--output FILE] [--format prometheus|openmetrics] [--serve [HOST:]PORT]`."""
+    from agentlib.metrics import DEFAULT_HOST, DEFAULT_PORT, FORMATS, MetricsExporter, serve
+    output = get_metrics_file()
+    fmt = 'prometheus'
+    address = None
+
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg in ("--output", "--format") and not args:
+            raise ValueError(f"{arg} requires a value")
+        if arg == "--output":
+            output = Path(args.pop(0)).resolve()
+        elif arg == "--format":
+            fmt = args.pop(0)
+            if fmt not in FORMATS:
+                raise ValueError(f"Unknown metrics format: {fmt} (expected one of {', '.join(FORMATS)})")
+        elif arg == "--serve":
+            # The address is optional
+            has_value = bool(args) and not args[0].startswith("--")
+            address = parse_address(args.pop(0)) if has_value else (DEFAULT_HOST, DEFAULT_PORT)
+        else:
+            raise ValueError(f"Unexpected argument: {arg}")
+
+    exporter = MetricsExporter(get_project_root(), output, read_progress, fmt)
+    rebuilt = exporter.refresh()
+    print(f"Metrics {'written to' if rebuilt else 'unchanged in'} {output}")
+    if address is None:
+        exporter.close()
+        return
+
+    def ready(server: Any) -> None:
+        host, port = server.server_address[:2]
+        print(f"Serving metrics on http://{host}:{port}/metrics (Ctrl-C to stop)", flush=True)
+
+    try:
+        serve(exporter, *address, ready=ready)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        exporter.close()
+
+
+def get_component_map_file() -> Path:
+    """Get the component → source paths mapping used by `scan`."""
+    return get_project_root() / '.agent' / 'components.json'
+
+
+def run_scan(args: List[str]) -> None:
+    """Handle `scan [--dry-run] [--workers N]`: derive component scores from the repository."""
+    from agentlib.scanner import load_component_map, scan
+    dry_run = False
+    workers = None
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg == "--dry-run":
+            dry_run = True
+        elif arg == "--workers" and args:
+            workers = int(args.pop(0))
+        else:
+            raise ValueError(f"Unexpected argument: {arg}")
+
+    map_file = get_component_map_file()
+    if not map_file.exists():
+        print(f"Error: No component map at {map_file}")
+        sys.exit(1)
+    config = load_component_map(map_file)
+    # Scan without the lock; only applying the scores needs it
+    results, counts = scan(get_project_root(), config,
+                           get_project_root() / '.agent' / 'cache' / 'scan-cache.json', workers)
+    print(f"Scanned {counts['files']} files ({counts['read']} read, {counts['changed']} changed)\n")
+
+    with state_lock(get_state_dir(), exclusive=not dry_run):
+        progress = load_progress()
+        ops = []
+        for name, result in results.items():
+            node = progress["components"].find(name)
+            if node is None or not node.is_leaf:
+                print(f"  {name}: skipped (not a component in progress.json)")
+                continue
+            if not result['files']:
+                print(f"  {name}: skipped ({result['reason']})")
+                continue
+            signals = result['signals']
+            coverage = f"{signals['coverage']:.0%}" if signals['coverage'] is not None else "n/a"
+            details = f"({result['files']} files, {result['tested']} tested, coverage {coverage}, {result['todos']} TODOs)"
+            print(f"  {name}: {node.score}% → {result['score']}%  {details}")
+            if result['score'] != node.score:
+                ops.append({"op": "update", "path": name, "value": result['score'],
+                            "ts": timestamp(), "source": "scan"})
+
+        if dry_run or not ops:
+            print(f"\n{len(ops)} score(s) would change" if dry_run else "\nAll scores up to date")
+            return
+        for op in ops:
+            apply_operation(progress, op)
+        save_progress(progress)
+        record_scores(progress, ops)
+        print(f"Updated {len(ops)} score(s); overall completion: {progress['metrics']['overall_completion']}%")
+
+
+def print_usage() -> None:
+    """Print command line usage."""
+    print("Usage:")
+    print("  python3 update-progress.py                                    # Show current progress")
+    print("  python3 update-progress.py show [--format text|json|ndjson|tsv] [--category C[,C]]")
+    print("      [--min N] [--max N] [--status S[,S]] [--only components|tasks|next] [--offset N] [--limit N]")
+    print("  python3 update-progress.py update <category> <component> <value>  # Update component")
+    print("  python3 update-progress.py update <category.path.to.component> <value>  # Update nested component")
+    print("  python3 update-progress.py task <task_name> <status> [owner]  # Add/update task")
+    print("      [--priority N] [--estimate HOURS] [--depends-on TASK[,TASK]]  # Plan it (--depends-on '' clears)")
+    print("  python3 update-progress.py phase <phase_name>                 # Update project phase")
+    print("  python3 update-progress.py compact                            # Fold journal into progress.json (before committing)")
+    print("  python3 update-progress.py batch [file|-]                     # Apply JSONL operations (default: stdin)")
+    print("  python3 update-progress.py scan [--dry-run] [--workers N]     # Derive scores from .agent/components.json")
+    print("  python3 update-progress.py aggregate [root|--manifest FILE]   # Org report over many projects")
+    print(f"  python3 update-progress.py trend [days]                       # Velocity and ETA per category (default: {DEFAULT_TREND_DAYS})")
+    print("  python3 update-progress.py metrics [--output FILE] [--format prometheus|openmetrics] [--serve [HOST:]PORT]")
+    print("      # Export metrics for Prometheus (textfile, optionally served over HTTP)")
+    print("")
+    print("Examples:")
+    print("  python3 update-progress.py update frontend document_editor 90")
+    print("  python3 update-progress.py task 'Implement real-time cursors' in_progress")
+    print("  python3 update-progress.py task 'Presence UI' pending --priority 2 --estimate 3 --depends-on 'Implement real-time cursors'")
+    print("  python3 update-progress.py phase production-ready")
+    print("  python3 update-progress.py show --format ndjson --category backend --max 80 --limit 20")
+    print("""  echo '{"op": "update", "category": "frontend", "component": "react_app", "value": 100}' | python3 update-progress.py batch""")
 
 
 def main():
     """Main function to handle command line arguments."""
     if len(sys.argv) < 2:
-        progress = load_progress()
-        display_progress(progress)
+        display_progress(read_progress())
         return
 
     command = sys.argv[1]
 
     try:
-        progress = load_progress()
-
         if command == "show" or command == "display":
-            display_progress(progress)
-
-        elif command == "update" and len(sys.argv) == 5:
-            category, component, value = sys.argv[2], sys.argv[3], int(sys.argv[4])
-            if update_component(progress, category, component, value):
+            query, fmt = parse_show_args(sys.argv[2:])
+            display_progress(read_progress(), query, fmt)
+            return
+
+        if command == "scan":
+            run_scan(sys.argv[2:])
+            return
+
+        if command == "aggregate":
+            run_aggregate(sys.argv[2:])
+            return
+
+        if command == "metrics":
+            run_metrics(sys.argv[2:])
+            return
+
+        if command == "trend" and len(sys.argv) <= 3:
+            days = int(sys.argv[2]) if len(sys.argv) == 3 else DEFAULT_TREND_DAYS
+            if days <= 0:
+                print("Error: Trend window must be a positive number of days")
+                sys.exit(1)
+            with state_lock(get_state_dir()):
+                display_trend(load_progress(), days)
+            return
+
+        batch_lines: List[str] = []
+        if command == "batch" and len(sys.argv) <= 3:
+            # Read the whole batch up front so a slow producer never holds the lock
+            source = sys.argv[2] if len(sys.argv) == 3 else "-"
+            if source == "-":
+                batch_lines = sys.stdin.readlines()
+            else:
+                with open(source, 'r') as f:
+                    batch_lines = f.readlines()
+
+        # Writers hold the exclusive lock across their whole read-modify-write
+        with state_lock(get_state_dir(), exclusive=True):
+            progress = load_progress()
+
+            if command == "update" and len(sys.argv) in (4, 5):
+                if len(sys.argv) == 4:
+                    # update <category.component[.sub...]> <value>
+                    category, _, component = sys.argv[2].partition('.')
+                else:
+                    category, component = sys.argv[2], sys.argv[3]
+                value = int(sys.argv[-1])
+                op = update_component(progress, category, component, value)
+                if op:
+                    record_operation(progress, op)
+
+            elif command == "task" and len(sys.argv) >= 4:
+                task_name = sys.argv[2]
+                task_status = sys.argv[3] if len(sys.argv) > 3 else "pending"
+                task_owner, task_options = parse_task_args(sys.argv[4:])
+                op = add_task(progress, task_name, task_status, task_owner, **task_options)
+                if op:
+                    record_operation(progress, op)
+
+            elif command == "phase" and len(sys.argv) == 3:
+                record_operation(progress, set_phase(progress, sys.argv[2]))
+
+            elif command == "compact":
                 save_progress(progress)
 
-        elif command == "task" and len(sys.argv) >= 4:
-            task_name = sys.argv[2]
-            task_status = sys.argv[3] if len(sys.argv) > 3 else "pending"
-            if add_task(progress, task_name, task_status):
+            elif command == "batch" and len(sys.argv) <= 3:
+                applied_ops: List[Dict[str, Any]] = []
+                errors = apply_batch(progress, batch_lines, applied_ops)
                 save_progress(progress)
+                record_scores(progress, applied_ops)
+                if errors:
+                    sys.exit(1)
 
-        elif command == "phase" and len(sys.argv) == 3:
-            new_phase = sys.argv[2]
-            old_phase = progress["metrics"]["phase"]
-            progress["metrics"]["phase"] = new_phase
-            progress["metadata"]["last_updated"] = datetime.now().isoformat() + "Z"
-            print(f"Updated phase: {old_phase} → {new_phase}")
-            save_progress(progress)
-
-        else:
-            print("Usage:")
-            print("  python3 update-progress.py                                    # Show current progress")
-            print("  python3 update-progress.py update <category> <component> <value>  # Update component")
-            print("  python3 update-progress.py task <task_name> <status>          # Add/update task")
-            print("  python3 update-progress.py phase <phase_name>                 # Update project phase")
-            print("")
-            print("Examples:")
-            print("  python3 update-progress.py update frontend document_editor 90")
-            print("  python3 update-progress.py task 'Implement real-time cursors' in_progress")
-            print("  python3 update-progress.py phase production-ready")
+            else:
+                print_usage()
 
     except Exception as e:
         print(f"Error: {e}")
@@ -255,4 +701,16 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.argv[1:] = profiling.configure('update-progress', sys.argv[1:], lambda: get_project_root() / '.agent' / 'cache')
+    argv = sys.argv[1:]
+    # batch reads operations from stdin; forward them to the daemon with the request
+    stdin = sys.stdin.read() if argv[:1] == ["batch"] and argv[1:2] in ([], ["-"]) else None
+    # A metrics server runs until interrupted, so it never goes to the daemon
+    serving = argv[:1] == ["metrics"] and "--serve" in argv
+    exit_code = None if serving else forward_to_daemon('update-progress', get_project_root, argv, stdin)
+    if exit_code is None:
+        if stdin is not None:
+            sys.stdin = io.StringIO(stdin)
+        main()
+    else:
+        sys.exit(exit_code)